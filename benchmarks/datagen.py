@@ -0,0 +1,139 @@
+# Générateur déterministe de jeux de données synthétiques pour les benchmarks.
+# Usage : python benchmarks/datagen.py --rows 1000000 --output benchmarks/.data
+import argparse
+import csv
+import json
+import os
+from xml.sax.saxutils import escape
+
+import numpy as np
+
+DEFAULT_SEED = 42
+CHUNK_SIZE = 50000
+FORMATS = ['csv', 'json', 'yaml', 'xml']
+
+FIRST_NAMES = ['Alice', 'Bob', 'Chloé', 'David', 'Emma', 'Farid', 'Gaëlle', 'Hugo', 'Inès', 'Jules',
+               'Karim', 'Léa', 'Marc', 'Nina', 'Oscar', 'Paul', 'Quentin', 'Rose', 'Sacha', 'Théo']
+CITIES = ['Paris', 'Lyon', 'Marseille', 'Toulouse', 'Nice', 'Nantes', 'Lille', 'Rennes']
+
+# Nom et type de chaque champ généré
+FIELDS = {
+    'name': 'str',
+    'city': 'str',
+    'age': 'int',
+    'score': 'float',
+    'active': 'bool',
+    'grades': 'list',
+}
+
+
+def iter_chunks(rows, seed=DEFAULT_SEED, chunk_size=CHUNK_SIZE):
+    # Chaque paquet a son propre générateur : le contenu ne dépend pas de la taille des paquets lus
+    for start in range(0, rows, chunk_size):
+        count = min(chunk_size, rows - start)
+        rng = np.random.default_rng([seed, start])
+        names = rng.integers(0, len(FIRST_NAMES), count)
+        suffixes = rng.integers(0, 1000, count)
+        cities = rng.integers(0, len(CITIES), count)
+        ages = rng.integers(16, 70, count)
+        scores = np.round(rng.normal(50, 15, count), 2)
+        active = rng.random(count) < 0.4
+        # Au moins une note par ligne : une liste vide s'écrirait en XML comme une balise vide
+        lengths = rng.integers(1, 6, count)
+        grades = rng.integers(0, 21, int(lengths.sum()))
+        offsets = np.concatenate([[0], np.cumsum(lengths)])
+        yield [{
+            'name': f"{FIRST_NAMES[names[i]]} {suffixes[i]}",
+            'city': CITIES[cities[i]],
+            'age': int(ages[i]),
+            'score': float(scores[i]),
+            'active': bool(active[i]),
+            'grades': grades[offsets[i]:offsets[i + 1]].tolist(),
+        } for i in range(count)]
+
+
+def generate_records(rows, seed=DEFAULT_SEED):
+    return [item for chunk in iter_chunks(rows, seed) for item in chunk]
+
+
+def write_dataset(rows, directory, seed=DEFAULT_SEED, formats=FORMATS):
+    # Les fichiers sont écrits sans passer par data_saver, pour ne pas mesurer le code testé avec lui-même
+    os.makedirs(directory, exist_ok=True)
+    paths = {}
+    for file_format in formats:
+        path = os.path.join(directory, f"data.{file_format}")
+        if not os.path.exists(path):
+            tmp_path = f"{path}.tmp"
+            WRITERS[file_format](iter_chunks(rows, seed), tmp_path)
+            os.replace(tmp_path, path)
+        paths[file_format] = path
+    return paths
+
+
+def dataset_directory(root, rows, seed=DEFAULT_SEED):
+    return os.path.join(root, f"{rows}-{seed}")
+
+
+def _write_csv(chunks, path):
+    with open(path, 'w', newline='', encoding='utf-8') as file:
+        writer = csv.writer(file)
+        writer.writerow(FIELDS)
+        for chunk in chunks:
+            writer.writerows([item[field] for field in FIELDS] for item in chunk)
+
+
+def _write_json(chunks, path):
+    with open(path, 'w', encoding='utf-8') as file:
+        first = True
+        for chunk in chunks:
+            for item in chunk:
+                file.write('[\n' if first else ',\n')
+                file.write(json.dumps(item))
+                first = False
+        file.write('[]\n' if first else '\n]\n')
+
+
+def _write_yaml(chunks, path):
+    import yaml
+    dumper = getattr(yaml, 'CSafeDumper', yaml.SafeDumper)
+    with open(path, 'w', encoding='utf-8') as file:
+        for chunk in chunks:
+            yaml.dump(chunk, file, Dumper=dumper, default_flow_style=False, sort_keys=False, allow_unicode=True)
+
+
+def _write_xml(chunks, path):
+    # Même représentation que data_saver.save_xml : les listes sont séparées par des virgules
+    with open(path, 'w', encoding='utf-8') as file:
+        file.write("<?xml version='1.0' encoding='utf-8'?>\n<root>")
+        for chunk in chunks:
+            file.writelines(
+                "<item>" + "".join(
+                    f"<{field}>{escape(','.join(map(str, value)) if isinstance(value, list) else str(value))}</{field}>"
+                    for field, value in item.items()) + "</item>"
+                for item in chunk)
+        file.write("</root>\n")
+
+
+WRITERS = {
+    'csv': _write_csv,
+    'json': _write_json,
+    'yaml': _write_yaml,
+    'xml': _write_xml,
+}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate deterministic synthetic datasets.")
+    parser.add_argument('--rows', type=int, nargs='+', default=[10000])
+    parser.add_argument('--seed', type=int, default=DEFAULT_SEED)
+    parser.add_argument('--formats', nargs='+', choices=FORMATS, default=FORMATS)
+    parser.add_argument('--output', default=os.path.join(os.path.dirname(os.path.abspath(__file__)), '.data'))
+    args = parser.parse_args(argv)
+    for rows in args.rows:
+        paths = write_dataset(rows, dataset_directory(args.output, rows, args.seed), args.seed, args.formats)
+        for path in paths.values():
+            print(f"{path}  {os.path.getsize(path) / 1e6:.1f} MB")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,224 @@
+# Suite de benchmarks : chargeurs, filtres, tris, statistiques et sauvegardes sur des données synthétiques.
+# Usage : python benchmarks/run.py --rows 100000 --output results.json [--compare baseline.json] [-k filter]
+#         [--record-rows 1000000] [--cap yaml=1]
+import argparse
+import gc
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, 'src'))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from datagen import DEFAULT_SEED, FIELDS, dataset_directory, generate_records, iter_chunks, write_dataset
+from data_filter import CONDITION_COSTS, filter_data
+from data_loader import load_binary, load_csv, load_dataset, load_json, load_xml, load_yaml
+from data_saver import save_binary, save_csv, save_json, save_jsonl, save_xml, save_yaml
+from data_sort import sort_data
+from data_stats import calculate_statistics
+from dataset import Dataset, Records
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '.data')
+
+# Lignes des cas sur une liste de dictionnaires : au-delà, la liste seule occupe des dizaines de Go
+DEFAULT_RECORD_ROWS = 1000000
+
+# Nombre maximal de mesures par cas dont le nom contient la clé : formats lus et écrits en Python pur
+REPEAT_CAPS = {'yaml': 1, 'xml': 1}
+
+# Une entrée par condition de filtre : champ, condition, valeur
+FILTERS = [
+    ('age', 'equals', 30), ('age', 'not_equals', 30),
+    ('age', 'less_than', 30), ('age', 'less_than_equals', 30),
+    ('score', 'greater_than', 50.0), ('score', 'greater_than_equals', 50.0),
+    ('name', 'contains', 'li'), ('name', 'not_contains', 'li'),
+    ('name', 'starts_with', 'al'), ('name', 'ends_with', '7'),
+    ('name', 'regex', r'^[A-E]\w* \d{2}$'), ('city', 'in_set', ['Paris', 'Lyon', 'Nice']),
+    ('name', 'lexicographically_less_than', 'M'), ('name', 'lexicographically_greater_than', 'M'),
+    ('name', 'lexicographically_less_than_field', 'city'), ('name', 'lexicographically_greater_than_field', 'city'),
+    ('active', 'true', True), ('active', 'false', False),
+    ('grades', 'exact_length', 3), ('grades', 'min_length', 2), ('grades', 'max_length', 2),
+    ('grades', 'average_equals', 10), ('grades', 'average_greater', 10), ('grades', 'average_less', 10),
+]
+
+SORTS = [
+    ('age', 'ascending'), ('age', 'descending'),
+    ('score', 'ascending'), ('score', 'descending'),
+    ('active', 'false_to_true'), ('active', 'true_to_false'),
+    ('name', 'a_to_z'), ('name', 'z_to_a'),
+]
+
+SAVERS = {
+    'csv': save_csv,
+    'json': save_json,
+    'jsonl': save_jsonl,
+    'yaml': save_yaml,
+    'xml': save_xml,
+    'npd': save_binary,
+}
+
+
+def build_cases(paths, records, dataset, tmp_dir):
+    # (nom, fonction, lignes) ; records n'est qu'un échantillon, les autres cas traitent tout le jeu de données
+    missing = set(CONDITION_COSTS) - {condition for _, condition, _ in FILTERS}
+    if missing:
+        raise RuntimeError(f"No benchmark for filter conditions: {', '.join(sorted(missing))}")
+
+    binary_path = os.path.join(tmp_dir, 'input.npd')
+    save_binary(dataset, binary_path)
+    rows = len(dataset)
+    cases = [
+        ('load/csv', lambda: load_csv(paths['csv'])),
+        ('load/json', lambda: load_json(paths['json'])),
+        ('load/yaml', lambda: load_yaml(paths['yaml'])),
+        ('load/xml', lambda: load_xml(paths['xml'])),
+        ('load/binary', lambda: load_binary(binary_path)),
+    ]
+    cases += [(f'load_dataset/{name}', lambda path=path: load_dataset(path)) for name, path in paths.items()]
+    cases += [(f'filter/{condition}', lambda f=field, c=condition, v=value: filter_data(dataset, f, c, v))
+              for field, condition, value in FILTERS]
+    cases += [(f'sort/{field}/{order}', lambda f=field, o=order: sort_data(dataset, f, o)) for field, order in SORTS]
+    cases.append(('sort/age,name/multi', lambda: sort_data(dataset, [('age', 'descending'), ('name', 'a_to_z')])))
+    cases.append(('sort/score/top100', lambda: sort_data(dataset, 'score', 'descending', limit=100)))
+    cases.append(('stats/dataset', lambda: calculate_statistics(dataset)))
+    # Les sauvegardes lisent la vue sur les colonnes, écrite par paquets : aucune liste de dictionnaires
+    view = Records(dataset)
+    cases += [(f'save/{name}', lambda s=saver, n=name: s(view, os.path.join(tmp_dir, f'output.{n}')))
+              for name, saver in SAVERS.items()]
+    cases = [(name, function, rows) for name, function in cases]
+
+    # Anciennes API sur une liste de dictionnaires, mesurées sur l'échantillon records
+    cases += [(name, function, len(records)) for name, function in [
+        ('filter/records/equals', lambda: filter_data(records, 'city', 'equals', 'Paris')),
+        ('sort/records/age', lambda: sort_data(records, 'age', 'ascending')),
+        # Pic mémoire : place occupée par les lignes une fois rangées en colonnes
+        ('store/records', lambda: Records(Dataset.from_records(records))),
+        ('stats/records', lambda: calculate_statistics(records)),
+    ]]
+    return cases
+
+
+def build_dataset(rows, seed=DEFAULT_SEED):
+    # Colonnes construites paquet par paquet depuis le générateur : toutes les lignes ne sont jamais
+    # en mémoire sous forme de dictionnaires
+    parts = [Dataset.from_records(chunk, FIELDS) for chunk in iter_chunks(rows, seed)]
+    columns = {field: np.concatenate([part.column(field)[0] for part in parts]) for field in FIELDS}
+    valid = {field: np.concatenate([part.valid[field] for part in parts]) for field in FIELDS}
+    return Dataset(columns, valid, parts[0].kinds)
+
+
+def repeat_cap(name, repeat, caps=REPEAT_CAPS):
+    return min([repeat] + [cap for keyword, cap in caps.items() if keyword in name])
+
+
+def measure(function, repeat, warm_up=True):
+    # Un premier appel à blanc : imports paresseux et caches ne sont pas comptés ; on s'en passe pour
+    # les cas lents dont le nombre de mesures est plafonné
+    if warm_up:
+        function()
+    timings = []
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - start)
+
+    # Passe séparée pour la mémoire : tracemalloc ralentit l'exécution mesurée
+    gc.collect()
+    tracemalloc.start()
+    try:
+        function()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {'best': min(timings), 'median': statistics.median(timings), 'peak_bytes': peak}
+
+
+def run(rows, repeat=3, seed=DEFAULT_SEED, keyword=None, data_dir=DATA_DIR, record_rows=DEFAULT_RECORD_ROWS,
+        caps=REPEAT_CAPS):
+    paths = write_dataset(rows, dataset_directory(data_dir, rows, seed), seed)
+    records = generate_records(min(rows, record_rows), seed)
+    dataset = build_dataset(rows, seed)
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for name, function, case_rows in build_cases(paths, records, dataset, tmp_dir):
+            if keyword and keyword not in name:
+                continue
+            case_repeat = repeat_cap(name, repeat, caps)
+            result = measure(function, case_repeat, warm_up=case_repeat == repeat)
+            result['rows'] = case_rows
+            result['repeat'] = case_repeat
+            result['rows_per_second'] = case_rows / result['best'] if result['best'] else None
+            results[name] = result
+            print(_format_line(name, result), flush=True)
+    return {'commit': _commit(), 'python': platform.python_version(), 'rows': rows, 'seed': seed,
+            'repeat': repeat, 'results': results}
+
+
+def compare(current, baseline):
+    # Rapport > 1 : plus lent que la référence
+    print(f"\n{'case':<44}{'time ratio':>12}{'memory ratio':>14}")
+    for name, result in current['results'].items():
+        reference = baseline['results'].get(name)
+        if reference is None:
+            continue
+        time_ratio = result['best'] / reference['best'] if reference['best'] else float('nan')
+        memory_ratio = result['peak_bytes'] / reference['peak_bytes'] if reference['peak_bytes'] else float('nan')
+        print(f"{name:<44}{time_ratio:>12.2f}{memory_ratio:>14.2f}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the PyDataFilter benchmark suite.")
+    parser.add_argument('--rows', type=int, default=10000, help="dataset size (10k to 10M rows)")
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--record-rows', type=int, default=DEFAULT_RECORD_ROWS,
+                        help="rows of the list-of-dicts sample used by the record cases")
+    parser.add_argument('--cap', action='append', default=[], metavar='KEYWORD=N',
+                        help="at most N measurements for cases whose name contains KEYWORD")
+    parser.add_argument('--seed', type=int, default=DEFAULT_SEED)
+    parser.add_argument('-k', '--keyword', help="only run cases whose name contains this text")
+    parser.add_argument('--output', help="write the results as JSON to this file")
+    parser.add_argument('--compare', help="JSON results of a previous run to compare against")
+    args = parser.parse_args(argv)
+
+    caps = dict(REPEAT_CAPS)
+    for cap in args.cap:
+        keyword, _, count = cap.partition('=')
+        if not count.isdigit() or int(count) < 1:
+            parser.error(f"invalid --cap {cap!r}, expected KEYWORD=N")
+        caps[keyword] = int(count)
+
+    current = run(args.rows, args.repeat, args.seed, args.keyword, record_rows=args.record_rows, caps=caps)
+    if args.output:
+        with open(args.output, 'w') as file:
+            json.dump(current, file, indent=4)
+    if args.compare:
+        with open(args.compare) as file:
+            compare(current, json.load(file))
+
+
+def _format_line(name, result):
+    throughput = f"{result['rows_per_second']:,.0f} rows/s" if result['rows_per_second'] else "-"
+    return (f"{name:<44}{result['best'] * 1000:>10.1f} ms{throughput:>20}"
+            f"{result['peak_bytes'] / 1e6:>10.1f} MB peak")
+
+
+def _commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+if __name__ == '__main__':
+    main()
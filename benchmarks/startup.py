@@ -0,0 +1,71 @@
+# Temps d'import à froid des modules de src, mesuré dans un interpréteur neuf à chaque essai.
+# Usage : python benchmarks/startup.py [--runs 5] [--check]
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+SRC = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src')
+
+# Modules lourds qui ne doivent être importés qu'au premier usage du format ou de l'interface
+BACKENDS = ['pandas', 'yaml', 'tkinter', 'ttkbootstrap', 'urllib.request']
+
+# Pour chaque module : les modules lourds qu'un simple import ne doit pas charger
+FORBIDDEN = {
+    'data_filter': BACKENDS,
+    'data_sort': BACKENDS,
+    'data_stats': BACKENDS,
+    'data_loader': BACKENDS,
+    'data_saver': BACKENDS,
+    'pipeline': BACKENDS,
+    'cli': BACKENDS,
+    'gui': ['pandas', 'yaml'],
+}
+
+PROBE = """
+import sys, time, json
+sys.path.insert(0, {src!r})
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+print(json.dumps({{'seconds': elapsed, 'loaded': [name for name in {backends!r} if name in sys.modules]}}))
+"""
+
+
+def measure(module, runs=5):
+    timings, loaded = [], set()
+    for _ in range(runs):
+        code = PROBE.format(src=SRC, module=module, backends=BACKENDS)
+        result = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True)
+        probe = json.loads(result.stdout)
+        timings.append(probe['seconds'])
+        loaded.update(probe['loaded'])
+    return statistics.median(timings), sorted(loaded)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure cold import time of the PyDataFilter modules.")
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--check', action='store_true', help="fail if a module imports a forbidden back-end")
+    parser.add_argument('modules', nargs='*', default=list(FORBIDDEN))
+    args = parser.parse_args(argv)
+
+    failures = []
+    print(f"{'module':<14}{'median ms':>12}  back-ends loaded")
+    for module in args.modules:
+        seconds, loaded = measure(module, args.runs)
+        print(f"{module:<14}{seconds * 1000:>12.1f}  {', '.join(loaded) or '-'}")
+        unexpected = set(loaded) & set(FORBIDDEN.get(module, []))
+        if unexpected:
+            failures.append(f"{module} imports {', '.join(sorted(unexpected))}")
+
+    if args.check and failures:
+        print("\n".join(failures), file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,10 @@
+import os
+import sys
+
+# Les modules de src s'importent entre eux sans préfixe de paquet
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from cli import main
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,135 @@
+import argparse
+import itertools
+import re
+import sys
+
+from data_filter import CONDITION_COSTS
+from data_loader import DEFAULT_CHUNK_SIZE, ITERATORS, apply_schema, expand_paths, iter_file
+from data_saver import CHUNK_WRITERS, file_format, save_chunks
+from data_sort import DEFAULT_RUN_SIZE
+from pipeline import Pipeline
+
+# Conditions dont la valeur est un nombre, comme dans l'écran de filtre de l'interface
+NUMERIC_CONDITIONS = ["less_than", "less_than_equals", "greater_than", "greater_than_equals",
+                      "average_equals", "average_greater", "average_less"]
+STREAM = '-'
+STREAM_FORMAT = 'jsonl'
+
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    try:
+        return args.command(args)
+    except (ValueError, TypeError, FileNotFoundError) as error:
+        parser.exit(2, f"pydatafilter: error: {error}\n")
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="pydatafilter", description="Filter, sort and convert data files.")
+    commands = parser.add_subparsers(dest="command_name", required=True)
+
+    run = commands.add_parser("run", help="read, filter, sort and write records in chunks")
+    run.add_argument("inputs", nargs="*", default=[STREAM],
+                     help="input files, directories or glob patterns ('-' for standard input)")
+    run.add_argument("-o", "--output", default=STREAM, help="output file ('-' for standard output)")
+    run.add_argument("-w", "--where", nargs="+", action="append", default=[], metavar="ARG",
+                     help="filter as FIELD CONDITION [VALUE]; repeated filters are combined with AND")
+    run.add_argument("-s", "--sort", nargs=2, action="append", default=[], metavar=("FIELD", "ORDER"),
+                     help="sort by FIELD in ORDER; repeat for secondary keys")
+    run.add_argument("--nulls", choices=["first", "last"], default="last",
+                     help="where records without the sort field go (default: last)")
+    run.add_argument("--limit", type=int, help="keep only the first LIMIT sorted records")
+    run.add_argument("--input-format", choices=_format_names(ITERATORS),
+                     help=f"format of standard input (default: {STREAM_FORMAT})")
+    run.add_argument("--output-format", choices=_format_names(CHUNK_WRITERS),
+                     help="format of standard output (default: the input format)")
+    run.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE, help="records per chunk")
+    run.add_argument("--max-rows", type=int, default=DEFAULT_RUN_SIZE,
+                     help="records kept in memory by the sort before spilling to disk")
+    run.add_argument("--tmp-dir", help="directory for sort spill files")
+    run.set_defaults(command=run_command)
+    return parser
+
+
+def run_command(args):
+    input_format = '.' + (args.input_format or STREAM_FORMAT)
+    pipeline = Pipeline(read_inputs(args.inputs, input_format, args.chunk_size), args.chunk_size)
+    for spec in args.where:
+        pipeline.filter(*parse_filter(spec))
+    if args.limit is not None and not args.sort:
+        raise ValueError("--limit requires --sort")
+    if args.sort:
+        # Plusieurs --sort : clés (champ, ordre) par priorité décroissante
+        field, order = args.sort[0] if len(args.sort) == 1 else (args.sort, None)
+        pipeline.sort(field, order, max_rows=args.max_rows, tmp_dir=args.tmp_dir, limit=args.limit,
+                      nulls=args.nulls)
+
+    if args.output == STREAM:
+        output_format = '.' + args.output_format if args.output_format else _stream_format(args.inputs, input_format)
+        CHUNK_WRITERS[output_format](pipeline.chunks(), sys.stdout)
+        sys.stdout.flush()
+    else:
+        save_chunks(pipeline.chunks(), args.output)
+    return 0
+
+
+def read_inputs(inputs, input_format, chunk_size):
+    # Les paquets de tous les fichiers se suivent ; aucun fichier n'est chargé en entier
+    sources = []
+    for source in inputs:
+        if source == STREAM:
+            sources.append(ITERATORS[input_format](sys.stdin, chunk_size))
+        else:
+            paths = expand_paths(source)
+            if not paths:
+                raise FileNotFoundError(f"No supported files match: {source}")
+            sources.extend(iter_file(path, chunk_size) for path in paths)
+    return _coerced(itertools.chain.from_iterable(sources))
+
+
+def parse_filter(spec):
+    if len(spec) not in (2, 3):
+        raise ValueError(f"--where expects FIELD CONDITION [VALUE], got: {' '.join(spec)}")
+    field, condition = spec[:2]
+    if condition not in CONDITION_COSTS:
+        raise ValueError(f"Unknown condition: {condition}")
+    text = spec[2] if len(spec) == 3 else ""
+    return field, condition, parse_value(condition, text)
+
+
+def parse_value(condition, text):
+    # equals, not_equals et in_set gardent le texte : le filtre le lit selon le type de la colonne
+    if condition in NUMERIC_CONDITIONS:
+        try:
+            return int(text)
+        except ValueError:
+            return float(text)
+    if condition in ["true", "false"]:
+        return condition == "true"
+    if condition == "regex":
+        try:
+            re.compile(text)
+        except re.error as error:
+            raise ValueError(f"Invalid regular expression {text!r}: {error}")
+    return text
+
+
+def _coerced(chunks):
+    # Booléens et listes écrits sous forme de texte (CSV, XML) sont convertis comme au chargement
+    for chunk in chunks:
+        apply_schema(chunk)
+        yield chunk
+
+
+def _format_names(formats):
+    return sorted(extension.lstrip('.') for extension in formats)
+
+
+def _stream_format(inputs, input_format):
+    files = [source for source in inputs if source != STREAM]
+    return file_format(files[0]) if files and file_format(files[0]) in CHUNK_WRITERS else input_format
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,49 +1,477 @@
-def filter_data(data, field, condition, value):
-    def safe_get(item, key, default=''):
-        return item.get(key, default)
+import operator
+import re
+import threading
+
+import numpy as np
+
+from dataset import Dataset, Records
+from profiling import profiled
+
+# Nombre de résultats de filtre conservés par FilterCache
+DEFAULT_CACHE_SIZE = 16
+
+# Conditions sur la valeur évaluées sur le dictionnaire d'une colonne de texte (not_equals est l'inverse d'equals)
+VALUE_CONDITIONS = {
+    "equals": lambda values, value: _equals(values, 'str', value),
+    "not_equals": lambda values, value: _equals(values, 'str', value),
+    "in_set": lambda values, value: _in_set(values, 'str', value),
+    "less_than": operator.lt,
+    "less_than_equals": operator.le,
+    "greater_than": operator.gt,
+    "greater_than_equals": operator.ge,
+}
+
+
+@profiled('filter_data')
+def filter_data(data, field, condition, value, schema=None):
+    if isinstance(data, Dataset):
+        return data.filter(filter_mask(data, field, condition, value))
+    if isinstance(data, Records):
+        # Les colonnes du jeu sont filtrées directement, sans reconstruire de dictionnaires
+        return data.select(np.flatnonzero(filter_mask(data.dataset, field, condition, value, data.rows)))
+
+    # Adaptateur pour l'ancienne API : on garde les dictionnaires d'origine
+    mask = filter_mask(Dataset.from_records(data, schema), field, condition, value)
+    return [data[i] for i in np.flatnonzero(mask)]
+
+
+def filter_mask(dataset, field, condition, value, rows=None):
+    # rows : indices des lignes à évaluer (toutes par défaut)
+    value = _typed_value(dataset.kind(field), condition, value)
+    index = dataset.find_index(field, condition)
+    if index is not None:
+        mask = index.lookup(condition, value)
+        if mask is not None:
+            return mask if rows is None else mask[rows]
+
+    if field in dataset.dictionaries and condition in VALUE_CONDITIONS:
+        # Texte codé : la condition n'est évaluée qu'une fois par valeur distincte
+        valid = dataset.valid[field] if rows is None else dataset.valid[field][rows]
+        test = VALUE_CONDITIONS[condition]
+        mask = valid & _by_value(dataset, field, rows, lambda values: test(values, value))
+        return ~mask if condition == "not_equals" else mask
+
+    column, valid = _column(dataset, field, rows)
+    kind = dataset.kind(field)
 
     if condition == "equals":
-        return [item for item in data if item.get(field) == value]
+        return valid & _equals(column, kind, value)
     elif condition == "not_equals":
-        return [item for item in data if item.get(field) != value]
+        return ~(valid & _equals(column, kind, value))
     elif condition == "contains":
-        return [item for item in data if value in item.get(field, '')]
+        return _contains(dataset, field, value, rows)
     elif condition == "not_contains":
-        return [item for item in data if value not in item.get(field, '')]
+        return ~_contains(dataset, field, value, rows)
+    elif condition == "regex":
+        return _regex(dataset, field, value, rows)
+    elif condition == "in_set":
+        return valid & _in_set(column, kind, value)
     elif condition == "less_than":
-        return [item for item in data if item.get(field) < value]
+        return _compare(column, valid, kind, operator.lt, value)
     elif condition == "less_than_equals":
-        return [item for item in data if item.get(field) <= value]
+        return _compare(column, valid, kind, operator.le, value)
     elif condition == "lexicographically_less_than":
-        return [item for item in data if item.get(field, '').lower() < value.lower()]
+        return _by_value(dataset, field, rows, lambda values: values < value.lower(), lower=True)
     elif condition == "lexicographically_greater_than":
-        return [item for item in data if item.get(field, '').lower() > value.lower()]
+        return _by_value(dataset, field, rows, lambda values: values > value.lower(), lower=True)
     elif condition == "starts_with":
-        return [item for item in data if item.get(field, '').lower().startswith(value)]
+        return _by_value(dataset, field, rows, lambda values: np.strings.startswith(values, value.lower()),
+                         lower=True)
     elif condition == "ends_with":
-        return [item for item in data if item.get(field, '').lower().endswith(value)]
+        return _by_value(dataset, field, rows, lambda values: np.strings.endswith(values, value.lower()),
+                         lower=True)
     elif condition == "greater_than":
-        return [item for item in data if item.get(field) > value]
+        return _compare(column, valid, kind, operator.gt, value)
     elif condition == "greater_than_equals":
-        return [item for item in data if item.get(field) >= value]
+        return _compare(column, valid, kind, operator.ge, value)
     elif condition == "lexicographically_less_than_field":
-        return [item for item in data if safe_get(item, field, '').lower() < safe_get(item, value, '').lower()]
+        return _text(dataset, field, rows, lower=True) < _text(dataset, value, rows, lower=True)
     elif condition == "lexicographically_greater_than_field":
-        return [item for item in data if safe_get(item, field, '').lower() > safe_get(item, value, '').lower()]
+        return _text(dataset, field, rows, lower=True) > _text(dataset, value, rows, lower=True)
     elif condition == "true":
-        return [item for item in data if item.get(field) is True]
+        return valid & _is_bool(column, kind, True)
     elif condition == "false":
-        return [item for item in data if item.get(field) is False]
+        return valid & _is_bool(column, kind, False)
     elif condition == "exact_length":
-        return [item for item in data if len(item.get(field, [])) == int(value)]
+        return _lengths(dataset, field, rows) == int(value)
     elif condition == "min_length":
-        return [item for item in data if len(item.get(field, [])) >= int(value)]
+        return _lengths(dataset, field, rows) >= int(value)
     elif condition == "max_length":
-        return [item for item in data if len(item.get(field, [])) <= int(value)]
+        return _lengths(dataset, field, rows) <= int(value)
     elif condition == "average_equals":
-        return [item for item in data if (sum(item.get(field, [])) / len(item.get(field, []))) == float(value)]
+        return _averages(dataset, field, rows) == float(value)
     elif condition == "average_less":
-        return [item for item in data if (sum(item.get(field, [])) / len(item.get(field, []))) < float(value)]
+        return _averages(dataset, field, rows) < float(value)
     elif condition == "average_greater":
-        return [item for item in data if (sum(item.get(field, [])) / len(item.get(field, []))) > float(value)]
-    return data
+        return _averages(dataset, field, rows) > float(value)
+    return np.ones(len(dataset) if rows is None else len(rows), dtype=bool)
+
+
+@profiled('filter_expression')
+def filter_expression(data, expression, schema=None):
+    compiled = compile_expression(expression)
+    if isinstance(data, Dataset):
+        return data.filter(compiled.mask(data))
+    if isinstance(data, Records):
+        return data.select(np.flatnonzero(compiled.mask(data.dataset, data.rows)))
+
+    mask = compiled.mask(Dataset.from_records(data, schema))
+    return [data[i] for i in np.flatnonzero(mask)]
+
+
+class Expression:
+    def __and__(self, other):
+        return And(self, other)
+
+    def __or__(self, other):
+        return Or(self, other)
+
+    def __invert__(self):
+        return Not(self)
+
+
+class Condition(Expression):
+    def __init__(self, field, condition, value=None):
+        self.field = field
+        self.condition = condition
+        self.value = value
+
+    def __repr__(self):
+        return f"Condition({self.field!r}, {self.condition!r}, {self.value!r})"
+
+
+class And(Expression):
+    def __init__(self, *operands):
+        self.operands = list(operands)
+
+    def __repr__(self):
+        return f"And({', '.join(map(repr, self.operands))})"
+
+
+class Or(Expression):
+    def __init__(self, *operands):
+        self.operands = list(operands)
+
+    def __repr__(self):
+        return f"Or({', '.join(map(repr, self.operands))})"
+
+
+class Not(Expression):
+    def __init__(self, operand):
+        self.operand = operand
+
+    def __repr__(self):
+        return f"Not({self.operand!r})"
+
+
+# Coût relatif de chaque condition et part estimée des lignes qui la satisfont
+CONDITION_COSTS = {
+    "true": (1, 0.5), "false": (1, 0.5),
+    "equals": (1, 0.1), "not_equals": (1, 0.9),
+    "less_than": (1, 0.5), "less_than_equals": (1, 0.5),
+    "greater_than": (1, 0.5), "greater_than_equals": (1, 0.5),
+    "contains": (4, 0.3), "not_contains": (4, 0.7),
+    "in_set": (2, 0.2), "regex": (12, 0.2),
+    "starts_with": (5, 0.2), "ends_with": (5, 0.2),
+    "lexicographically_less_than": (5, 0.5), "lexicographically_greater_than": (5, 0.5),
+    "lexicographically_less_than_field": (8, 0.5), "lexicographically_greater_than_field": (8, 0.5),
+    "exact_length": (10, 0.2), "min_length": (10, 0.5), "max_length": (10, 0.5),
+    "average_equals": (20, 0.1), "average_less": (20, 0.5), "average_greater": (20, 0.5),
+}
+
+
+def compile_expression(expression):
+    if isinstance(expression, CompiledExpression):
+        return expression
+    if isinstance(expression, Condition):
+        cost, selectivity = CONDITION_COSTS.get(expression.condition, (1, 1.0))
+        return CompiledExpression('condition', expression, cost, selectivity)
+    if isinstance(expression, Not):
+        operand = compile_expression(expression.operand)
+        return CompiledExpression('not', [operand], operand.cost, 1 - operand.selectivity)
+    if isinstance(expression, (And, Or)):
+        operands = [compile_expression(operand) for operand in expression.operands]
+        if isinstance(expression, And):
+            # Les conditions peu coûteuses qui éliminent le plus de lignes passent en premier
+            operands.sort(key=lambda op: op.cost / max(1 - op.selectivity, 1e-3))
+            selectivity = float(np.prod([op.selectivity for op in operands]))
+            kind = 'and'
+        else:
+            operands.sort(key=lambda op: op.cost / max(op.selectivity, 1e-3))
+            selectivity = 1 - float(np.prod([1 - op.selectivity for op in operands]))
+            kind = 'or'
+        return CompiledExpression(kind, operands, sum(op.cost for op in operands), selectivity)
+    raise TypeError(f"Unsupported filter expression: {expression!r}")
+
+
+class CompiledExpression:
+    def __init__(self, kind, operands, cost, selectivity):
+        self.kind = kind
+        self.operands = operands
+        self.cost = cost
+        self.selectivity = selectivity
+
+    def mask(self, dataset, rows=None):
+        # Chaque opérande n'est évalué que sur les lignes encore indécises
+        if self.kind == 'condition':
+            condition = self.operands
+            return filter_mask(dataset, condition.field, condition.condition, condition.value, rows)
+        if self.kind == 'not':
+            return ~self.operands[0].mask(dataset, rows)
+
+        size = len(dataset) if rows is None else len(rows)
+        positions = np.arange(size)
+        result = np.full(size, self.kind == 'and')
+        for operand in self.operands:
+            if not len(positions):
+                break
+            if len(positions) == size:
+                pending = rows
+            else:
+                pending = positions if rows is None else rows[positions]
+            matched = operand.mask(dataset, pending)
+            if self.kind == 'and':
+                result[positions[~matched]] = False
+                positions = positions[matched]
+            else:
+                result[positions[matched]] = True
+                positions = positions[~matched]
+        return result
+
+
+class FilterCache:
+    # Lignes retenues par les derniers filtres, par jeu, version, lignes de départ et condition ;
+    # un filtre plus strict qu'un filtre en cache n'est évalué que sur les lignes déjà retenues
+    def __init__(self, max_size=DEFAULT_CACHE_SIZE, mask=filter_mask):
+        self.max_size = max_size
+        self.mask = mask
+        self.results = {}
+        self._lock = threading.Lock()
+
+    def select(self, dataset, field, condition, value, rows=None):
+        # rows : lignes de départ ; le cache ne sert que si le même tableau est repassé
+        key = (id(dataset), dataset.version, id(rows), field, condition, _hashable(value))
+        with self._lock:
+            entry = self.results.pop(key, None)
+            if entry is not None:
+                self.results[key] = entry
+                return entry[3]
+            # Un résultat calculé avant une modification du jeu (autre version) ne sert jamais de base
+            candidates = [entry for entry in self.results.values()
+                          if entry[0] is dataset and entry[1] == dataset.version and entry[2] is rows
+                          and entry[4] == (field, condition)
+                          and _narrows(condition, dataset.kind(field), entry[5], value)]
+
+        if candidates:
+            base = min(candidates, key=lambda entry: len(entry[3]))[3]
+        else:
+            base = None if rows is None else np.asarray(rows).astype(np.intp, copy=False)
+        mask = self.mask(dataset, field, condition, value, base)
+        selected = np.flatnonzero(mask) if base is None else base[mask]
+
+        with self._lock:
+            # Les références au jeu et aux lignes empêchent la réutilisation de leurs id tant que l'entrée existe
+            self.results[key] = (dataset, dataset.version, rows, selected, (field, condition), value)
+            while len(self.results) > self.max_size:
+                del self.results[next(iter(self.results))]
+        return selected
+
+    def clear(self):
+        with self._lock:
+            self.results = {}
+
+
+# Pour chaque condition, vrai si la nouvelle valeur ne peut retenir que des lignes retenues par l'ancienne
+NARROWING = {
+    "contains": lambda old, new: old in new,
+    "starts_with": lambda old, new: new.lower().startswith(old.lower()),
+    "ends_with": lambda old, new: new.lower().endswith(old.lower()),
+    "in_set": lambda old, new: set(_set_values(new)) <= set(_set_values(old)),
+    "less_than": lambda old, new: new <= old,
+    "less_than_equals": lambda old, new: new <= old,
+    "greater_than": lambda old, new: new >= old,
+    "greater_than_equals": lambda old, new: new >= old,
+    "lexicographically_less_than": lambda old, new: new.lower() <= old.lower(),
+    "lexicographically_greater_than": lambda old, new: new.lower() >= old.lower(),
+    "min_length": lambda old, new: int(new) >= int(old),
+    "max_length": lambda old, new: int(new) <= int(old),
+    "average_greater": lambda old, new: float(new) >= float(old),
+    "average_less": lambda old, new: float(new) <= float(old),
+}
+
+
+def _narrows(condition, kind, old, new):
+    narrows = NARROWING.get(condition)
+    if narrows is None:
+        return False
+    if condition == "contains" and kind in ('list', 'object'):
+        # Appartenance d'un élément : une liste qui contient 'abc' ne contient pas forcément 'ab'
+        return False
+    try:
+        return bool(narrows(old, new))
+    except (TypeError, ValueError, AttributeError):
+        return False
+
+
+def _equals(column, kind, value):
+    if kind in ('list', 'object'):
+        return np.fromiter((v == value for v in column), dtype=bool, count=len(column))
+    return np.asarray(column == value, dtype=bool)
+
+
+def _is_bool(column, kind, flag):
+    if kind == 'bool':
+        return column if flag else ~column
+    return np.fromiter((v is flag for v in column), dtype=bool, count=len(column))
+
+
+def _column(dataset, field, rows):
+    return dataset.column(field, rows)
+
+
+def _text(dataset, field, rows, lower=False):
+    # Les valeurs manquantes valent '' comme avec item.get(field, '')
+    return dataset.text(field, lower, rows)
+
+
+def _by_value(dataset, field, rows, function, lower=False):
+    # function est appliquée aux valeurs distinctes du texte, puis son résultat est reporté sur chaque ligne
+    values, codes = dataset.dictionary(field, lower)
+    results = np.asarray(function(values))
+    return results[codes] if rows is None else results[codes[rows]]
+
+
+def _compare(column, valid, kind, compare, value):
+    if kind in ('list', 'object'):
+        # Types mélangés : une valeur qui ne se compare pas à value ne satisfait pas la condition
+        return np.fromiter((ok and _compared(compare, v, value) for v, ok in zip(column, valid)), dtype=bool,
+                           count=len(column))
+    return valid & compare(column, value)
+
+
+def _compared(compare, left, right):
+    try:
+        return bool(compare(left, right))
+    except TypeError:
+        return False
+
+
+def _contains(dataset, field, value, rows):
+    if dataset.kind(field) in ('list', 'object'):
+        # Appartenance d'un élément à la liste, ou d'un texte à la valeur, comme avec value in item[field]
+        column, valid = _column(dataset, field, rows)
+        return np.fromiter((ok and _member(value, v) for v, ok in zip(column, valid)), dtype=bool,
+                           count=len(column))
+    return _by_value(dataset, field, rows, lambda values: np.strings.find(values, value) >= 0)
+
+
+def _member(value, container):
+    try:
+        return value in container
+    except TypeError:
+        return False
+
+
+def _regex(dataset, field, pattern, rows):
+    # L'expression n'est évaluée qu'une fois par valeur distincte
+    search = re.compile(pattern).search
+    return _by_value(dataset, field, rows, lambda values: np.fromiter(
+        (search(value) is not None for value in values.tolist()), dtype=bool, count=len(values)))
+
+
+def _set_values(values, kind=None):
+    # values : itérable de valeurs, ou texte séparé par des virgules lu selon le type de la colonne
+    if isinstance(values, str):
+        items = [value.strip() for value in values.split(',')]
+        return [_number(item) for item in items] if kind in ('int', 'float') else items
+    return [_hashable(value) for value in values]
+
+
+def _typed_value(kind, condition, value):
+    # Texte saisi (ligne de commande, interface) comparé à une colonne de nombres : lu comme un nombre
+    if condition in ("equals", "not_equals") and isinstance(value, str) and kind in ('int', 'float'):
+        return _number(value)
+    return value
+
+
+def _number(text):
+    # Comme pour la saisie d'un filtre : un texte qui n'est pas un nombre est une erreur, pas un résultat vide
+    try:
+        return int(text)
+    except ValueError:
+        try:
+            return float(text)
+        except ValueError:
+            raise ValueError(f"Invalid number: {text!r}") from None
+
+
+def _in_set(column, kind, values):
+    values = _set_values(values, kind)
+    if kind in ('list', 'object'):
+        hashable = set(values)
+        return np.fromiter((_hashable(v) in hashable for v in column), dtype=bool, count=len(column))
+    if kind in ('int', 'float'):
+        values = [value for value in values if isinstance(value, (int, float)) and not isinstance(value, bool)]
+    elif kind == 'str':
+        values = [value for value in values if isinstance(value, str)]
+    return np.isin(column, np.array(values)) if values else np.zeros(len(column), dtype=bool)
+
+
+def _hashable(value):
+    return tuple(_hashable(v) for v in value) if isinstance(value, list) else value
+
+
+def _lengths(dataset, field, rows):
+    kind = dataset.kind(field)
+    if kind == 'list':
+        # Longueurs lues dans les positions de début de chaque liste
+        _, offsets = dataset.ragged(field)
+        lengths = np.diff(offsets)
+        return lengths if rows is None else lengths[rows]
+    if kind == 'str':
+        return _by_value(dataset, field, rows, np.strings.str_len)
+    column, valid = _column(dataset, field, rows)
+    lengths = np.fromiter((len(v) if ok else 0 for v, ok in zip(column, valid)), dtype=np.int64,
+                          count=len(column))
+    return lengths
+
+
+def _averages(dataset, field, rows):
+    # Moyenne de chaque liste ; NaN pour une liste vide ou absente, qui ne satisfait aucune condition
+    values, offsets = dataset.ragged(field) if dataset.kind(field) == 'list' else (None, None)
+    if values is None:
+        column, valid = _column(dataset, field, rows)
+        return np.fromiter((_average(v) if ok else np.nan for v, ok in zip(column, valid)), dtype=np.float64,
+                           count=len(column))
+
+    starts, lengths = offsets[:-1], np.diff(offsets)
+    if rows is not None:
+        starts, lengths = starts[rows], lengths[rows]
+    sums = _segment_sums(values, starts, lengths)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(lengths > 0, sums / np.maximum(lengths, 1), np.nan)
+
+
+def _segment_sums(values, starts, lengths):
+    # Une seule réduction sur les valeurs à plat ; les listes vides sont exclues car reduceat ne les gère pas
+    sums = np.zeros(len(starts), dtype=np.float64)
+    present = np.flatnonzero(lengths > 0)
+    if not len(present):
+        return sums
+    starts, lengths = starts[present], lengths[present]
+    bounds = np.concatenate([[0], np.cumsum(lengths)[:-1]])
+    if np.array_equal(starts - starts[0], bounds):
+        # Listes qui se suivent dans values (toutes les lignes par exemple) : aucune copie
+        segments = values[starts[0]:starts[-1] + lengths[-1]]
+    else:
+        # Lignes réordonnées ou sautées : les éléments sont d'abord rassemblés dans l'ordre demandé
+        segments = values[np.repeat(starts - bounds, lengths) + np.arange(bounds[-1] + lengths[-1])]
+    sums[present] = np.add.reduceat(segments, bounds)
+    return sums
+
+
+def _average(value):
+    try:
+        return sum(value) / len(value) if len(value) else np.nan
+    except TypeError:
+        return np.nan
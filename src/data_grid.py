@@ -0,0 +1,108 @@
+import tkinter as tk
+
+import ttkbootstrap as ttk
+from ttkbootstrap.constants import *
+
+from profiling import PROFILER
+
+DEFAULT_PAGE_SIZE = 25
+MAX_CELL_LENGTH = 80
+
+
+class DataGrid(ttk.Frame):
+    # Tableau virtualisé : seules les lignes visibles sont mises en forme et insérées dans le Treeview
+    def __init__(self, master, fields, page_size=DEFAULT_PAGE_SIZE, on_sort=None, **kwargs):
+        super().__init__(master, **kwargs)
+        self.fields = list(fields)
+        self.page_size = page_size
+        self.on_sort = on_sort
+        self.records = []
+        self.offset = 0
+        self.sort_state = None
+
+        self.tree = ttk.Treeview(self, columns=self.fields, show="headings", height=page_size, selectmode="browse")
+        for field in self.fields:
+            self.tree.heading(field, text=field, command=lambda f=field: self.sort_by(f))
+            self.tree.column(field, width=120, stretch=True)
+        self.scrollbar = ttk.Scrollbar(self, orient=VERTICAL, command=self.scroll)
+        self.scrollbar.pack(side=RIGHT, fill=Y)
+        self.tree.pack(side=LEFT, fill=BOTH, expand=True)
+
+        for sequence in ("<MouseWheel>", "<Button-4>", "<Button-5>"):
+            self.tree.bind(sequence, self.on_mouse_wheel)
+        self.tree.bind("<Configure>", self.on_resize)
+
+    def set_data(self, records):
+        # records : toute séquence indexable (liste d'enregistrements, vue de l'historique...)
+        self.records = records
+        self.offset = 0
+        self.refresh()
+
+    def refresh(self):
+        self.offset = clamp_offset(self.offset, len(self.records), self.page_size)
+        with PROFILER.measure("render_grid", len(self.records)) as measurement:
+            self.tree.delete(*self.tree.get_children())
+            visible = self.records[self.offset:self.offset + self.page_size]
+            for item in visible:
+                self.tree.insert("", tk.END, values=format_row(item, self.fields))
+            measurement.rows_out = len(visible)
+        first, last = scroll_fractions(self.offset, len(self.records), self.page_size)
+        self.scrollbar.set(first, last)
+
+    def scroll(self, action, amount, unit=None):
+        total = len(self.records)
+        if action == "moveto":
+            self.offset = int(float(amount) * total)
+        elif unit == "pages":
+            self.offset += int(amount) * self.page_size
+        else:
+            self.offset += int(amount)
+        self.refresh()
+
+    def on_mouse_wheel(self, event):
+        if event.num == 4 or getattr(event, "delta", 0) > 0:
+            self.scroll("scroll", -3, "units")
+        else:
+            self.scroll("scroll", 3, "units")
+        return "break"
+
+    def on_resize(self, event):
+        row_height = int(ttk.Style().lookup("Treeview", "rowheight") or 20)
+        page_size = max(1, (event.height - row_height) // row_height)
+        if page_size != self.page_size:
+            self.page_size = page_size
+            self.refresh()
+
+    def sort_by(self, field):
+        if self.on_sort is None:
+            return
+        order = "descending" if self.sort_state == (field, "ascending") else "ascending"
+        self.sort_state = (field, order)
+        for name in self.fields:
+            arrow = (" ▲" if order == "ascending" else " ▼") if name == field else ""
+            self.tree.heading(name, text=f"{name}{arrow}")
+        # on_sort renvoie les lignes triées, ou None s'il les transmet plus tard par set_data (tri en tâche de fond)
+        records = self.on_sort(field, order)
+        if records is not None:
+            self.set_data(records)
+
+
+def clamp_offset(offset, total, page_size):
+    return max(0, min(offset, total - page_size))
+
+
+def scroll_fractions(offset, total, page_size):
+    if total == 0:
+        return 0.0, 1.0
+    return offset / total, min(1.0, (offset + page_size) / total)
+
+
+def format_row(item, fields):
+    return [format_cell(item.get(field, "")) for field in fields]
+
+
+def format_cell(value):
+    if isinstance(value, list):
+        value = ", ".join(map(str, value))
+    text = str(value)
+    return text if len(text) <= MAX_CELL_LENGTH else text[:MAX_CELL_LENGTH - 1] + "…"
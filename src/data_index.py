@@ -0,0 +1,114 @@
+import numpy as np
+
+
+class HashIndex:
+    kind = 'hash'
+    conditions = ("equals", "not_equals")
+
+    def __init__(self, column, valid):
+        self.length = len(column)
+        rows = np.flatnonzero(valid)
+        values = column[rows]
+        self.buckets = {}
+        if values.dtype != object and len(values):
+            # Regroupement vectorisé : un tri puis un découpage par valeur distincte
+            uniques, inverse = np.unique(values, return_inverse=True)
+            order = np.argsort(inverse, kind='stable')
+            bounds = np.cumsum(np.bincount(inverse, minlength=len(uniques)))[:-1]
+            for value, ids in zip(uniques.tolist(), np.split(rows[order], bounds)):
+                self.buckets[value] = ids
+        else:
+            for row, value in zip(rows.tolist(), values.tolist()):
+                self.buckets.setdefault(_hashable(value), []).append(row)
+            self.buckets = {value: np.array(ids, dtype=np.intp) for value, ids in self.buckets.items()}
+
+    def lookup(self, condition, value):
+        try:
+            ids = self.buckets.get(_hashable(value))
+        except TypeError:
+            return None
+        mask = np.zeros(self.length, dtype=bool)
+        if ids is not None:
+            mask[ids] = True
+        return mask if condition == "equals" else ~mask
+
+
+class SortedIndex:
+    kind = 'sorted'
+    conditions = ("less_than", "less_than_equals", "greater_than", "greater_than_equals")
+
+    def __init__(self, column, valid):
+        self.length = len(column)
+        valid = valid & ~np.isnan(column) if column.dtype.kind == 'f' else valid
+        rows = np.flatnonzero(valid)
+        order = np.argsort(column[rows], kind='stable')
+        self.values = column[rows][order]
+        self.rows = rows[order]
+
+    def lookup(self, condition, value):
+        if condition == "less_than":
+            ids = self.rows[:np.searchsorted(self.values, value, side='left')]
+        elif condition == "less_than_equals":
+            ids = self.rows[:np.searchsorted(self.values, value, side='right')]
+        elif condition == "greater_than":
+            ids = self.rows[np.searchsorted(self.values, value, side='right'):]
+        else:
+            ids = self.rows[np.searchsorted(self.values, value, side='left'):]
+        mask = np.zeros(self.length, dtype=bool)
+        mask[ids] = True
+        return mask
+
+
+class StringIndex:
+    kind = 'string'
+    conditions = ("starts_with", "lexicographically_less_than", "lexicographically_greater_than")
+
+    def __init__(self, column, valid):
+        # Même normalisation que le filtre : minuscules, '' pour les valeurs manquantes
+        self.length = len(column)
+        lowered = np.strings.lower(np.where(valid, column, ''))
+        self.rows = np.argsort(lowered, kind='stable')
+        self.values = lowered[self.rows]
+
+    def lookup(self, condition, value):
+        if condition == "starts_with":
+            value = value.lower()
+            start = np.searchsorted(self.values, value, side='left')
+            end = np.searchsorted(self.values, _prefix_end(value), side='left') if value else self.length
+            ids = self.rows[start:end]
+        elif condition == "lexicographically_less_than":
+            ids = self.rows[:np.searchsorted(self.values, value.lower(), side='left')]
+        else:
+            ids = self.rows[np.searchsorted(self.values, value.lower(), side='right'):]
+        mask = np.zeros(self.length, dtype=bool)
+        mask[ids] = True
+        return mask
+
+
+INDEX_TYPES = {
+    'hash': HashIndex,
+    'sorted': SortedIndex,
+    'string': StringIndex,
+}
+
+DEFAULT_INDEXES = {
+    'bool': ('hash',),
+    'int': ('hash', 'sorted'),
+    'float': ('hash', 'sorted'),
+    'str': ('hash', 'string'),
+    'list': (),
+    'object': ('hash',),
+}
+
+
+def build_index(column, valid, kind):
+    return INDEX_TYPES[kind](column, valid)
+
+
+def _prefix_end(prefix):
+    # Première chaîne qui ne commence plus par le préfixe
+    return prefix[:-1] + chr(ord(prefix[-1]) + 1)
+
+
+def _hashable(value):
+    return tuple(value) if isinstance(value, list) else value
@@ -1,35 +1,422 @@
-import pandas as pd
+import glob
+import hashlib
 import json
-import yaml
+import mmap
+import os
+import xml.etree.ElementTree as ET
+from concurrent.futures import ThreadPoolExecutor
 
+import numpy as np
 
+from data_saver import BINARY_MAGIC, align_offset, file_format, open_file, save_binary
+from dataset import Dataset, batched, convert_value, infer_kind, lists_from_ragged, share_strings
+from profiling import profiled
+
+DEFAULT_CHUNK_SIZE = 10000
+DEFAULT_SAMPLE_SIZE = 1000
+READ_BLOCK_SIZE = 1 << 16
+SOURCE_FIELD = 'source_file'
+
+
+# pandas et PyYAML sont lents à importer : ils ne sont chargés qu'à la première lecture du format
+@profiled('load_csv')
 def load_csv(file_path):
+    import pandas as pd
     return pd.read_csv(file_path).to_dict(orient='records')
 
 
+@profiled('load_json')
 def load_json(file_path):
     with open(file_path, 'r') as file:
         return json.load(file)
 
 
+@profiled('load_yaml')
 def load_yaml(file_path):
+    import yaml
     with open(file_path, 'r') as file:
         return yaml.safe_load(file)
 
 
+@profiled('load_xml')
 def load_xml(file_path):
-    import xml.etree.ElementTree as ET
-    tree = ET.parse(file_path)
-    root = tree.getroot()
-
-    data = []
-    for elem in root:
-        item = {}
-        for subelem in elem:
-            # Convert lists represented as strings to actual lists
-            if ',' in subelem.text:
-                item[subelem.tag] = list(map(int, subelem.text.split(',')))
-            else:
-                item[subelem.tag] = subelem.text if not subelem.text.isdigit() else int(subelem.text)
-        data.append(item)
-    return data
\ No newline at end of file
+    return [item for chunk in iter_xml(file_path) for item in chunk]
+
+
+def iter_csv(file_path, chunk_size=DEFAULT_CHUNK_SIZE):
+    import pandas as pd
+    with pd.read_csv(file_path, chunksize=chunk_size) as reader:
+        for chunk in reader:
+            yield chunk.to_dict(orient='records')
+
+
+def iter_json(file_path, chunk_size=DEFAULT_CHUNK_SIZE):
+    with open_file(file_path) as file:
+        yield from batched(_iter_json_array(file), chunk_size)
+
+
+def iter_jsonl(file_path, chunk_size=DEFAULT_CHUNK_SIZE):
+    with open_file(file_path) as file:
+        yield from batched((json.loads(line) for line in file if line.strip()), chunk_size)
+
+
+def iter_yaml(file_path, chunk_size=DEFAULT_CHUNK_SIZE):
+    with open_file(file_path) as file:
+        yield from batched(_iter_yaml_sequence(file), chunk_size)
+
+
+def iter_xml(file_path, chunk_size=DEFAULT_CHUNK_SIZE):
+    with open_file(file_path, 'rb') as file:
+        # Champs reconnus comme listes dans les paquets précédents (voir apply_schema pour tout le fichier)
+        listed = set()
+        for chunk in batched(_iter_xml_items(file), chunk_size):
+            _parse_xml_lists(chunk, listed)
+            yield chunk
+
+
+@profiled('load_dataset')
+def load_dataset(file_path, index_fields=(), chunk_size=DEFAULT_CHUNK_SIZE):
+    if is_pattern(file_path):
+        records, schema = load_many(file_path, chunk_size=chunk_size)
+    else:
+        records = [item for chunk in iter_file(file_path, chunk_size) for item in chunk]
+        schema = apply_schema(records)
+    dataset = Dataset.from_records(records, schema)
+    for field in index_fields:
+        dataset.create_index(field)
+    return dataset
+
+
+@profiled('load_many', rows_out=lambda result: len(result[0]))
+def load_many(pattern, source_field=SOURCE_FIELD, max_workers=None, chunk_size=DEFAULT_CHUNK_SIZE, on_file=None):
+    # Les fichiers sont lus en parallèle : les lectures et l'analyse par pandas libèrent le GIL
+    paths = expand_paths(pattern)
+    if not paths:
+        raise FileNotFoundError(f"No supported files match: {pattern}")
+    root = os.path.commonpath([os.path.dirname(os.path.abspath(path)) for path in paths])
+
+    records, schema = [], {}
+    executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="pydatafilter-load")
+    try:
+        shards = executor.map(lambda path: _load_shard(path, chunk_size), paths)
+        for count, (path, (shard, shard_schema)) in enumerate(zip(paths, shards), start=1):
+            if source_field:
+                source = os.path.relpath(os.path.abspath(path), root)
+                for item in shard:
+                    item[source_field] = source
+            records.extend(shard)
+            for field, kind in shard_schema.items():
+                schema[field] = union_kind(schema.get(field), kind)
+            if on_file is not None:
+                on_file(count, len(paths))
+    finally:
+        # Une annulation (exception levée par on_file) abandonne les fichiers pas encore commencés
+        executor.shutdown(cancel_futures=True)
+    # Champs restés sans valeur dans tous les fichiers
+    schema = {field: kind or 'object' for field, kind in schema.items()}
+    if source_field and records:
+        schema[source_field] = 'str'
+    return records, schema
+
+
+def expand_paths(pattern):
+    # Un dossier, un motif glob ou un simple fichier ; l'ordre des fichiers est stable
+    if os.path.isdir(pattern):
+        paths = [os.path.join(pattern, name) for name in os.listdir(pattern)]
+    elif is_pattern(pattern):
+        paths = glob.glob(pattern, recursive=True)
+    else:
+        return [pattern]
+    return sorted(path for path in paths if os.path.isfile(path) and file_format(path) in ITERATORS)
+
+
+def is_pattern(file_path):
+    return os.path.isdir(file_path) or any(char in file_path for char in '*?[')
+
+
+def union_kind(left, right):
+    # Type commun de deux fichiers : les entiers s'élargissent en flottants, le reste devient 'object'
+    # None : type encore inconnu (aucune valeur), sans effet sur l'autre
+    if left is None or left == right:
+        return right
+    if right is None:
+        return left
+    if {left, right} == {'int', 'float'}:
+        return 'float'
+    return 'object'
+
+
+def infer_schema(records, sample_size=DEFAULT_SAMPLE_SIZE):
+    # Les types sont déduits d'un échantillon réparti sur tout le fichier
+    step = max(1, len(records) // sample_size)
+    sample = records[::step]
+    fields = dict.fromkeys(key for item in sample for key in item)
+    return {field: infer_kind(convert_value(item[field]) for item in sample if field in item)
+            for field in fields}
+
+
+def apply_schema(records, schema=None, unknown='object'):
+    # Convertit les valeurs une fois pour toutes et renvoie le schéma vérifié sur toutes les lignes ;
+    # unknown : type d'un champ toujours absent ou à null
+    schema = infer_schema(records) if schema is None else schema
+    fields = dict.fromkeys(key for item in records for key in item)
+    verified = {}
+    for field in fields:
+        kind = schema.get(field)
+        values = [item[field] for item in records if field in item]
+        # Les colonnes de nombres n'ont rien à convertir ; le texte répété (catégories, statuts) est partagé
+        if kind == 'str':
+            values = share_strings(values)
+        elif kind not in ('int', 'float'):
+            values = [convert_value(value) for value in values]
+        if kind not in ('int', 'float') and any(isinstance(value, list) for value in values):
+            # Champ de listes décidé sur toutes les lignes, quel que soit le découpage en paquets
+            values = [_as_list(value) for value in values]
+        if kind not in ('int', 'float'):
+            for item, value in zip((item for item in records if field in item), values):
+                item[field] = value
+        verified[field] = infer_kind(values, unknown)
+    return verified
+
+
+@profiled('load_binary')
+def load_binary(file_path):
+    with open(file_path, 'rb') as file:
+        if file.read(len(BINARY_MAGIC)) != BINARY_MAGIC:
+            raise ValueError(f"Not a binary dataset file: {file_path}")
+        header_size = int.from_bytes(file.read(8), 'little')
+        header = json.loads(file.read(header_size))
+        buffer = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+    data_start = align_offset(len(BINARY_MAGIC) + 8 + header_size)
+
+    def read(entry):
+        # Vue en lecture seule sur le fichier mappé : aucune copie
+        return np.frombuffer(buffer, dtype=entry['dtype'], count=entry['length'],
+                             offset=data_start + entry['offset'])
+
+    columns, valid, kinds, lists, dictionaries = {}, {}, {}, {}, {}
+    for entry in header['fields']:
+        name = entry['name']
+        valid[name] = read(entry['valid'])
+        kinds[name] = entry['kind']
+        if 'values' in entry:
+            values, offsets = read(entry['values']), read(entry['offsets'])
+            column = lists_from_ragged(values, offsets)
+            if values.dtype.kind in 'iuf':
+                # Les filtres et statistiques de listes lisent directement le fichier mappé
+                lists[name] = (values, offsets)
+        elif 'json' in entry:
+            values = json.loads(read(entry['json']).tobytes())
+            column = np.fromiter(values, dtype=object, count=header['length'])
+        elif 'pickle' in entry:
+            # Ancien format : le contenu pickle n'est jamais chargé, il pourrait exécuter du code
+            raise ValueError(f"Unsupported pickled column '{name}' in {file_path}; save the file again")
+        elif 'codes' in entry:
+            column = read(entry['codes'])
+            dictionaries[name] = read(entry['uniques'])
+        else:
+            column = read(entry['data'])
+        columns[name] = column
+    dataset = Dataset(columns, valid, kinds, dictionaries)
+    dataset.lists.update(lists)
+    return dataset
+
+
+@profiled('load_cached')
+def load_cached(file_path, cache_dir=None):
+    # Cache binaire à côté de la source, valable tant que le chemin, la taille et la date sont inchangés
+    file_path = os.path.abspath(file_path)
+    cache_dir = cache_dir or os.path.join(os.path.dirname(file_path), '.pydatafilter_cache')
+    stat = os.stat(file_path)
+    prefix = hashlib.sha1(file_path.encode('utf-8')).hexdigest()[:16]
+    cache_path = os.path.join(cache_dir, f"{prefix}-{stat.st_size}-{stat.st_mtime_ns}.npd")
+    if os.path.exists(cache_path):
+        try:
+            return load_binary(cache_path)
+        except ValueError:
+            # Cache d'un ancien format : reconstruit depuis la source
+            pass
+
+    dataset = load_dataset(file_path)
+    os.makedirs(cache_dir, exist_ok=True)
+    for name in os.listdir(cache_dir):
+        if name.startswith(prefix + '-'):
+            os.remove(os.path.join(cache_dir, name))
+    save_binary(dataset, cache_path)
+    return load_binary(cache_path)
+
+
+ITERATORS = {
+    '.csv': iter_csv,
+    '.json': iter_json,
+    '.jsonl': iter_jsonl,
+    '.yaml': iter_yaml,
+    '.xml': iter_xml,
+}
+
+
+def iter_file(file_path, chunk_size=DEFAULT_CHUNK_SIZE):
+    iterator = ITERATORS.get(file_format(file_path))
+    if iterator is None:
+        raise ValueError(f"Unsupported file format: {file_path}")
+    return iterator(file_path, chunk_size)
+
+
+def _load_shard(file_path, chunk_size):
+    records = [item for chunk in iter_file(file_path, chunk_size) for item in chunk]
+    # Un champ entièrement à null reste inconnu : il ne force pas 'object' à la fusion avec les autres fichiers
+    return records, apply_schema(records, unknown=None)
+
+
+def _iter_json_array(file):
+    decoder = json.JSONDecoder()
+    buffer = ''
+    pos = 0
+    eof = False
+
+    def fill():
+        # On ne garde que la partie non consommée du tampon
+        nonlocal buffer, pos, eof
+        block = file.read(READ_BLOCK_SIZE)
+        eof = not block
+        buffer = buffer[pos:] + block
+        pos = 0
+
+    def skip_whitespace():
+        nonlocal pos
+        while True:
+            while pos < len(buffer) and buffer[pos].isspace():
+                pos += 1
+            if pos < len(buffer) or eof:
+                return buffer[pos:pos + 1]
+            fill()
+
+    fill()
+    if skip_whitespace() != '[':
+        # Pas un tableau : on retombe sur un chargement complet
+        document = json.loads(buffer[pos:] + file.read())
+        yield from document if isinstance(document, list) else [document]
+        return
+
+    pos += 1
+    if skip_whitespace() == ']':
+        return
+    while True:
+        try:
+            item, end = decoder.raw_decode(buffer, pos)
+        except json.JSONDecodeError:
+            if eof:
+                raise
+            fill()
+            continue
+        if end == len(buffer) and not eof:
+            # Un nombre en fin de bloc peut être tronqué : on relit avant de valider
+            fill()
+            continue
+        yield item
+
+        pos = end
+        separator = skip_whitespace()
+        if separator == ']':
+            return
+        if separator != ',':
+            raise json.JSONDecodeError("Expecting ',' delimiter", buffer, pos)
+        pos += 1
+        skip_whitespace()
+
+
+def _iter_yaml_sequence(file):
+    import yaml
+    loader = yaml.SafeLoader(file)
+    try:
+        loader.get_event()  # StreamStartEvent
+        if loader.check_event(yaml.StreamEndEvent):
+            return
+        loader.get_event()  # DocumentStartEvent
+        if not loader.check_event(yaml.SequenceStartEvent):
+            document = loader.construct_document(loader.compose_node(None, None))
+            yield from document if isinstance(document, list) else [document]
+            return
+        loader.get_event()
+        while not loader.check_event(yaml.SequenceEndEvent):
+            yield loader.construct_document(loader.compose_node(None, None))
+    finally:
+        loader.dispose()
+
+
+def _iter_xml_items(file):
+    depth = 0
+    root = None
+    for event, elem in ET.iterparse(file, events=('start', 'end')):
+        if event == 'start':
+            if root is None:
+                root = elem
+            depth += 1
+            continue
+        depth -= 1
+        if depth == 1:
+            yield _xml_item(elem)
+            # Libérer les éléments déjà traités pour garder une mémoire bornée
+            elem.clear()
+            root.clear()
+
+
+def _xml_item(elem):
+    # Les listes "1,2,3" restent du texte ici : elles sont converties par paquet dans _parse_xml_lists
+    item = {}
+    for subelem in elem:
+        text = subelem.text or ''
+        item[subelem.tag] = int(text) if text.isdigit() else text
+    return item
+
+
+def _parse_xml_lists(items, listed):
+    # Toutes les listes d'un champ sont converties en une seule fois, par un tableau NumPy ;
+    # listed reçoit les champs de listes et sert aux paquets suivants
+    found = {}
+    for item in items:
+        for key, value in item.items():
+            if isinstance(value, str) and ',' in value:
+                found.setdefault(key, []).append(item)
+
+    for key, rows in found.items():
+        texts = [item[key] for item in rows]
+        values = _parse_numbers(','.join(texts).split(','))
+        if values is None:
+            # Du texte qui contient des virgules, pas une liste de nombres
+            continue
+        start = 0
+        for item, text in zip(rows, texts):
+            stop = start + text.count(',') + 1
+            item[key] = values[start:stop]
+            start = stop
+        listed.add(key)
+
+    for key in listed:
+        for item in items:
+            if key in item:
+                item[key] = _as_list(item[key])
+
+
+def _as_list(value):
+    # Dans une colonne de listes, une balise vide est une liste vide et un nombre seul une liste d'un élément
+    if isinstance(value, list):
+        return value
+    if value == '':
+        return []
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return [value]
+    if isinstance(value, str):
+        number = _parse_numbers([value])
+        return value if number is None else number
+    return value
+
+
+def _parse_numbers(texts):
+    array = np.array(texts)
+    for dtype in (np.int64, np.float64):
+        try:
+            return array.astype(dtype).tolist()
+        except ValueError:
+            pass
+    return None
@@ -1,32 +1,243 @@
-import pandas as pd
+import contextlib
+import csv
+import gzip
+import io
+import itertools
 import json
-import yaml
-import xml.etree.ElementTree as ET
+import math
+import os
+import numpy as np
 
+from dataset import Dataset, Records, as_dataset, batched, infer_kind
+from profiling import profiled
+
+BINARY_MAGIC = b'PYDF1\n'
+BINARY_ALIGNMENT = 64
+BUFFER_SIZE = 1 << 20
+WRITE_CHUNK_SIZE = 10000
+GZIP_LEVEL = 6
+
+@profiled('save_csv', rows_out=None)
 def save_csv(data, file_path):
-    df = pd.DataFrame(data)
-    df.to_csv(file_path, index=False)
+    # Toutes les colonnes sont connues d'avance pour une liste, un jeu ou une vue ; sinon elles viennent du
+    # premier paquet (voir write_csv_chunks)
+    if isinstance(data, Dataset):
+        data = Records(data)
+    if isinstance(data, Records):
+        fieldnames = list(data.fields)
+    elif isinstance(data, list):
+        fieldnames = list(dict.fromkeys(key for item in data for key in item))
+    else:
+        fieldnames = None
+    write_csv_chunks(batched(data, WRITE_CHUNK_SIZE), file_path, fieldnames)
+
+@profiled('save_json', rows_out=None)
+def save_json(data, file_path, indent=4):
+    write_json_chunks(batched(data, WRITE_CHUNK_SIZE), file_path, indent)
 
-def save_json(data, file_path):
-    with open(file_path, 'w') as file:
-        json.dump(data, file, indent=4)
+@profiled('save_jsonl', rows_out=None)
+def save_jsonl(data, file_path):
+    write_jsonl_chunks(batched(data, WRITE_CHUNK_SIZE), file_path)
 
+@profiled('save_yaml', rows_out=None)
 def save_yaml(data, file_path):
-    with open(file_path, 'w') as file:
-        yaml.dump(data, file, default_flow_style=False)
+    write_yaml_chunks(batched(data, WRITE_CHUNK_SIZE), file_path)
 
+@profiled('save_xml', rows_out=None)
 def save_xml(data, file_path):
-    root = ET.Element("root")
-    for item in data:
-        elem = ET.Element("item")
-        for key, val in item.items():
-            child = ET.Element(key)
-            if isinstance(val, list):
-                child.text = ','.join(map(str, val))
-            else:
-                child.text = str(val)
-            elem.append(child)
-        root.append(elem)
-
-    tree = ET.ElementTree(root)
-    tree.write(file_path, encoding='utf-8', xml_declaration=True)
+    write_xml_chunks(batched(data, WRITE_CHUNK_SIZE), file_path)
+
+def save_file(data, file_path):
+    saver = SAVERS.get(file_format(file_path))
+    if saver is None:
+        raise ValueError(f"Unsupported file format: {file_path}")
+    saver(data, file_path)
+
+@profiled('save_binary', rows_out=None)
+def save_binary(data, file_path):
+    # Format colonne : en-tête JSON puis un tableau brut aligné par colonne, relu par memory mapping
+    dataset = as_dataset(data)
+    sections = []
+    size = 0
+
+    def add(array):
+        nonlocal size
+        array = np.ascontiguousarray(array)
+        offset = align_offset(size)
+        sections.append((offset, array))
+        size = offset + array.nbytes
+        return {'offset': offset, 'dtype': array.dtype.str, 'length': len(array)}
+
+    fields = []
+    for field in dataset.fields:
+        # Colonnes telles que stockées : codes pour le texte, sans décodage
+        column, valid = dataset.columns[field], dataset.valid[field]
+        kind = dataset.kind(field)
+        entry = {'name': field, 'kind': kind, 'valid': add(valid)}
+        elements = list(itertools.chain.from_iterable(column[valid])) if kind == 'list' else None
+        values = np.array(elements) if elements and infer_kind(elements) in ('bool', 'int', 'float', 'str') else None
+        if values is not None and values.dtype != object:
+            lengths = np.fromiter((len(v) if ok else 0 for v, ok in zip(column, valid)), dtype=np.int64,
+                                  count=len(column))
+            entry['values'] = add(values)
+            entry['offsets'] = add(np.concatenate([[0], np.cumsum(lengths)]))
+        elif field in dataset.dictionaries:
+            # Texte codé : codes et valeurs distinctes sont écrits tels quels
+            entry['codes'] = add(column)
+            entry['uniques'] = add(dataset.dictionaries[field])
+        elif column.dtype == object:
+            # JSON et non pickle : ouvrir un fichier .npd ne doit jamais exécuter de code.
+            # Les entiers au-delà d'int64 y restent exacts ; les valeurs non JSON (dates YAML) deviennent du texte
+            text = json.dumps(column.tolist(), default=str)
+            entry['json'] = add(np.frombuffer(text.encode('utf-8'), dtype=np.uint8))
+        else:
+            entry['data'] = add(column)
+        fields.append(entry)
+
+    header = json.dumps({'length': len(dataset), 'fields': fields}).encode('utf-8')
+    data_start = align_offset(len(BINARY_MAGIC) + 8 + len(header))
+    tmp_path = f"{file_path}.tmp"
+    with open(tmp_path, 'wb') as file:
+        file.write(BINARY_MAGIC)
+        file.write(len(header).to_bytes(8, 'little'))
+        file.write(header)
+        for offset, array in sections:
+            file.write(b'\0' * (data_start + offset - file.tell()))
+            file.write(array.view(np.uint8))
+    # Remplacement atomique : un lecteur ne voit jamais un fichier à moitié écrit
+    os.replace(tmp_path, file_path)
+
+def align_offset(offset):
+    return -(-offset // BINARY_ALIGNMENT) * BINARY_ALIGNMENT
+
+@profiled('save_chunks', rows_out=None)
+def save_chunks(chunks, file_path):
+    writer = CHUNK_WRITERS.get(file_format(file_path))
+    if writer is None:
+        raise ValueError(f"Unsupported file format: {file_path}")
+    return writer(chunks, file_path)
+
+def write_csv_chunks(chunks, file_path, fieldnames=None):
+    # Sans fieldnames, l'en-tête est fixé par le premier paquet : un champ qui n'apparaît qu'ensuite ne peut
+    # plus être écrit et lève une erreur plutôt que d'être perdu
+    checked = fieldnames is None
+    with open_file(file_path, 'w', newline='') as file:
+        writer = csv.writer(file)
+        if fieldnames is not None:
+            writer.writerow(fieldnames)
+        for chunk in chunks:
+            if not chunk:
+                continue
+            if fieldnames is None:
+                fieldnames = list(dict.fromkeys(key for item in chunk for key in item))
+                header = set(fieldnames)
+                writer.writerow(fieldnames)
+            elif checked:
+                missing = {key for item in chunk for key in item} - header
+                if missing:
+                    raise ValueError(f"Fields missing from the CSV header written from the first chunk: "
+                                     f"{', '.join(map(str, sorted(missing, key=str)))}; pass fieldnames")
+            writer.writerows([_csv_value(item.get(key, '')) for key in fieldnames] for item in chunk)
+
+def write_json_chunks(chunks, file_path, indent=4):
+    # indent=None écrit un tableau compact, un enregistrement par ligne
+    encoder = json.JSONEncoder(indent=indent, separators=None if indent is not None else (',', ':'))
+    separator = '\n' + ' ' * (indent or 0)
+    with open_file(file_path, 'w') as file:
+        first = True
+        for chunk in chunks:
+            for item in chunk:
+                file.write('[' + separator if first else ',' + separator)
+                file.write(encoder.encode(item).replace('\n', separator) if indent else encoder.encode(item))
+                first = False
+        file.write('[]' if first else '\n]')
+
+def write_jsonl_chunks(chunks, file_path):
+    encoder = json.JSONEncoder(separators=(',', ':'))
+    with open_file(file_path, 'w') as file:
+        for chunk in chunks:
+            file.writelines(encoder.encode(item) + '\n' for item in chunk)
+
+def write_yaml_chunks(chunks, file_path):
+    # PyYAML n'est importé que pour écrire du YAML
+    import yaml
+    with open_file(file_path, 'w') as file:
+        empty = True
+        for chunk in chunks:
+            if chunk:
+                # Des séquences YAML en bloc mises bout à bout forment une seule séquence
+                yaml.dump(chunk, file, default_flow_style=False)
+                empty = False
+        if empty:
+            yaml.dump([], file)
+
+def write_xml_chunks(chunks, file_path):
+    # xml.sax.saxutils importe urllib : coûteux au démarrage, donc importé ici
+    from xml.sax.saxutils import XMLGenerator
+    with open_file(file_path, 'w') as file:
+        generator = XMLGenerator(file, encoding='utf-8', short_empty_elements=True)
+        generator.startDocument()
+        generator.startElement("root", {})
+        for chunk in chunks:
+            for item in chunk:
+                generator.startElement("item", {})
+                for key, val in item.items():
+                    generator.startElement(key, {})
+                    generator.characters(','.join(map(str, val)) if isinstance(val, list) else str(val))
+                    generator.endElement(key)
+                generator.endElement("item")
+        generator.endElement("root")
+        generator.endDocument()
+
+def open_file(file_path, mode='r', newline=None):
+    # Fichier avec un grand tampon, compressé à la volée selon l'extension (.gz, .zst)
+    binary = 'b' in mode
+    if not isinstance(file_path, (str, os.PathLike)):
+        # Flux déjà ouvert (entrée ou sortie standard) : il reste ouvert après usage
+        if binary and isinstance(file_path, io.TextIOBase):
+            file_path = file_path.buffer
+        return contextlib.nullcontext(file_path)
+    text_options = {} if binary else {'encoding': 'utf-8', 'newline': newline}
+    if file_path.endswith('.gz'):
+        return gzip.open(file_path, mode if binary else mode + 't', compresslevel=GZIP_LEVEL, **text_options)
+    if file_path.endswith('.zst'):
+        # Dépendance optionnelle, importée seulement pour les fichiers .zst
+        import zstandard
+        raw = open(file_path, mode.replace('b', '') + 'b')
+        if 'w' in mode:
+            stream = zstandard.ZstdCompressor().stream_writer(raw)
+        else:
+            stream = zstandard.ZstdDecompressor().stream_reader(raw)
+        return stream if binary else io.TextIOWrapper(stream, **text_options)
+    return open(file_path, mode, buffering=BUFFER_SIZE, **text_options)
+
+def file_format(file_path):
+    # Extension du format, sans celle de la compression : data.json.gz -> .json
+    root, extension = os.path.splitext(file_path)
+    if extension in COMPRESSIONS:
+        extension = os.path.splitext(root)[1]
+    return extension
+
+COMPRESSIONS = ('.gz', '.zst')
+
+SAVERS = {
+    '.csv': save_csv,
+    '.json': save_json,
+    '.jsonl': save_jsonl,
+    '.yaml': save_yaml,
+    '.xml': save_xml,
+}
+
+CHUNK_WRITERS = {
+    '.csv': write_csv_chunks,
+    '.json': write_json_chunks,
+    '.jsonl': write_jsonl_chunks,
+    '.yaml': write_yaml_chunks,
+    '.xml': write_xml_chunks,
+}
+
+def _csv_value(val):
+    # Les valeurs manquantes sont écrites comme des cellules vides
+    if val is None or (isinstance(val, float) and math.isnan(val)):
+        return ''
+    return val
@@ -1,3 +1,276 @@
-def sort_data(data, field, order):
-    reverse = order == "descending" or order == "true_to_false" or order == "z_to_a"
-    return sorted(data, key=lambda x: x[field], reverse=reverse)
+import heapq
+import math
+import os
+import pickle
+import tempfile
+
+import numpy as np
+
+from dataset import Dataset, Records, batched
+from profiling import profiled
+
+
+DEFAULT_RUN_SIZE = 100000
+SPILL_BLOCK_SIZE = 1000
+REVERSE_ORDERS = ("descending", "true_to_false", "z_to_a")
+DEFAULT_CACHE_SIZE = 8
+
+
+@profiled('sort_data')
+def sort_data(data, field, order=None, schema=None, nulls='last', limit=None):
+    # field : un champ trié selon order, ou une liste de clés (champ, ordre[, nulls]) de priorité décroissante
+    if isinstance(data, Dataset):
+        return data.take(sort_order(data, field, order, nulls=nulls, limit=limit))
+    if isinstance(data, Records):
+        return Records(data.dataset, sort_order(data.dataset, field, order, data.rows, nulls, limit))
+
+    order = sort_order(Dataset.from_records(data, schema), field, order, nulls=nulls, limit=limit)
+    return [data[i] for i in order]
+
+
+def sort_order(dataset, field, order=None, rows=None, nulls='last', limit=None):
+    # rows : indices des lignes à trier ; le résultat est alors une permutation de rows
+    # limit : seules les limit premières lignes sont renvoyées, sans trier tout le reste
+    return _sort_rows(dataset, sort_keys(field, order, nulls), rows, limit)
+
+
+def sort_keys(field, order=None, nulls='last'):
+    # Clés normalisées : (champ, décroissant, valeurs manquantes en premier)
+    if isinstance(field, str):
+        return [(field, order in REVERSE_ORDERS, nulls == 'first')]
+    keys = []
+    for key in field:
+        if isinstance(key, str):
+            key = (key,)
+        key_order = key[1] if len(key) > 1 else None
+        key_nulls = key[2] if len(key) > 2 else nulls
+        keys.append((key[0], key_order in REVERSE_ORDERS, key_nulls == 'first'))
+    return keys
+
+
+class SortCache:
+    # Permutations déjà calculées sur toutes les lignes, par clés de tri ; invalidées quand le jeu change
+    def __init__(self, max_size=DEFAULT_CACHE_SIZE):
+        self.max_size = max_size
+        self.orders = {}
+
+    def sort_order(self, dataset, field, order=None, rows=None, nulls='last'):
+        keys = tuple(sort_keys(field, order, nulls))
+        entry = self.orders.pop(keys, None)
+        if entry is None or entry[0] is not dataset or entry[1] != dataset.version:
+            entry = (dataset, dataset.version, _sort_rows(dataset, keys))
+        self.orders[keys] = entry
+        while len(self.orders) > self.max_size:
+            del self.orders[next(iter(self.orders))]
+
+        permutation = entry[2]
+        if rows is None:
+            return permutation
+        if len(rows) > 1 and not np.all(rows[1:] > rows[:-1]):
+            # Lignes déjà réordonnées : leur ordre départage les égalités, la permutation globale ne convient pas
+            return _sort_rows(dataset, keys, rows)
+        # Sous-ensemble dans l'ordre du fichier : une simple sélection dans la permutation, en O(n)
+        selected = np.zeros(len(dataset), dtype=bool)
+        selected[rows] = True
+        return permutation[selected[permutation]]
+
+    def clear(self):
+        self.orders = {}
+
+
+def _sort_rows(dataset, keys, rows=None, limit=None):
+    if limit is not None:
+        if limit <= 0:
+            return np.array([], dtype=np.intp)
+        rows = _top_candidates(dataset, keys[0], rows, limit)
+    # Tris stables successifs, de la clé la moins prioritaire à la plus prioritaire
+    for key in reversed(keys):
+        rows = _sort_key(dataset, key, rows)
+    return rows if limit is None else rows[:limit]
+
+
+def _sort_key(dataset, key, rows):
+    field, reverse, nulls_first = key
+    column, valid = _sort_column(dataset, field, rows)
+    present = np.flatnonzero(valid)
+    values = column[present]
+
+    if dataset.kind(field) in ('list', 'object'):
+        ranks = _object_order(values, reverse)
+    elif reverse:
+        # Tri stable décroissant : les égalités gardent leur ordre d'origine
+        n = len(values)
+        ranks = (n - 1 - np.argsort(values[::-1], kind='stable'))[::-1]
+    else:
+        ranks = np.argsort(values, kind='stable')
+    # Les lignes sans valeur sont placées à la fin, ou au début si demandé
+    parts = [present[ranks], np.flatnonzero(~valid)]
+    positions = np.concatenate(parts[::-1] if nulls_first else parts).astype(np.intp)
+    return positions if rows is None else rows[positions]
+
+
+def _sort_column(dataset, field, rows):
+    # Texte codé : les codes suivent l'ordre des valeurs distinctes triées, ils se trient à leur place
+    if field in dataset.dictionaries:
+        column, valid = dataset.columns[field], dataset.valid[field]
+    else:
+        column, valid = dataset.column(field)
+    if rows is not None:
+        column, valid = column[rows], valid[rows]
+    if dataset.kind(field) == 'float':
+        # NaN est une valeur manquante (cellule CSV vide), triée avec les lignes sans le champ
+        valid = valid & ~np.isnan(column)
+    return column, valid
+
+
+def _object_order(values, reverse):
+    keys = [_order_key(value) for value in values]
+    return np.array(sorted(range(len(values)), key=keys.__getitem__, reverse=reverse), dtype=np.intp)
+
+
+def _order_key(value):
+    # Ordre total des valeurs de types mélangés, partagé avec la fusion d'external_sort : groupe de type,
+    # puis valeur comparée nativement dans son groupe (les nombres restent des nombres)
+    if isinstance(value, (bool, int, float)):
+        return (0, value)
+    if isinstance(value, str):
+        return (1, value)
+    if isinstance(value, (list, tuple)):
+        return (2, tuple(_order_key(v) for v in value))
+    if isinstance(value, dict):
+        return (3, repr(value))
+    return (4, type(value).__name__, value)
+
+
+def _top_candidates(dataset, key, rows, limit):
+    # Lignes pouvant figurer parmi les limit premières selon la clé principale, dans l'ordre d'origine ;
+    # toutes les égalités à la frontière sont gardées pour que les clés suivantes les départagent
+    field, reverse, nulls_first = key
+    column, valid = _sort_column(dataset, field, rows)
+    present = np.flatnonzero(valid)
+    missing = np.flatnonzero(~valid)
+    if nulls_first:
+        if len(missing) >= limit:
+            positions = missing[:limit]
+        else:
+            present = _best_positions(column, present, dataset.kind(field), reverse, limit - len(missing))
+            positions = np.sort(np.concatenate([present, missing]))
+    else:
+        present = _best_positions(column, present, dataset.kind(field), reverse, limit)
+        if len(present) < limit:
+            present = np.sort(np.concatenate([present, missing[:limit - len(present)]]))
+        positions = present
+    positions = positions.astype(np.intp)
+    return positions if rows is None else rows[positions]
+
+
+def _best_positions(column, present, kind, reverse, count):
+    if len(present) <= count:
+        return present
+    values = column[present]
+    if kind in ('list', 'object'):
+        # Tri complet des objets, puis toutes les valeurs égales à la dernière retenue
+        order = _object_order(values, reverse)[:count]
+        keys = [_order_key(value) for value in values]
+        boundary = keys[order[-1]]
+        keep = [i for i, key in enumerate(keys) if (key >= boundary if reverse else key <= boundary)]
+        return present[np.asarray(keep, dtype=np.intp)]
+    # Sélection partielle en O(n) : seule la valeur de rang count est cherchée
+    if reverse:
+        boundary = np.partition(values, len(values) - count)[len(values) - count]
+        return present[values >= boundary]
+    boundary = np.partition(values, count - 1)[count - 1]
+    return present[values <= boundary]
+
+
+def top_k(chunks, field, order=None, limit=10, chunk_size=SPILL_BLOCK_SIZE, nulls='last'):
+    # Les limit premières lignes d'un flux de paquets, en gardant au plus limit lignes en mémoire
+    best = []
+    for chunk in chunks:
+        # Les lignes déjà retenues passent en premier : à égalité, les plus anciennes restent devant
+        best = sort_data(best + list(chunk), field, order, nulls=nulls, limit=limit)
+    yield from batched(best, chunk_size)
+
+
+def external_sort(chunks, field, order=None, max_rows=DEFAULT_RUN_SIZE, chunk_size=SPILL_BLOCK_SIZE, tmp_dir=None,
+                  nulls='last'):
+    # field, order, nulls : comme sort_data, y compris plusieurs clés
+    keys = sort_keys(field, order, nulls)
+    with tempfile.TemporaryDirectory(dir=tmp_dir) as directory:
+        runs = []
+        buffer = []
+        for chunk in chunks:
+            buffer.extend(chunk)
+            if len(buffer) >= max_rows:
+                runs.append(_spill(buffer, field, order, nulls, directory))
+                buffer = []
+
+        if not runs:
+            # Tout tient dans le budget mémoire : tri classique
+            merged = iter(sort_data(buffer, field, order, nulls=nulls))
+        else:
+            if buffer:
+                runs.append(_spill(buffer, field, order, nulls, directory))
+            buffer = []
+            # heapq.merge est stable : à égalité, les lignes des premiers paquets restent devant
+            merged = heapq.merge(*(run.read() for run in runs), key=lambda item: _merge_key(item, keys))
+
+        yield from batched(merged, chunk_size)
+
+
+def _merge_key(item, keys):
+    # Même ordre que _sort_rows : valeurs manquantes groupées au début ou à la fin, puis valeur de la clé
+    key = []
+    for field, reverse, nulls_first in keys:
+        value = item.get(field)
+        if _is_missing(value):
+            key.append((0,) if nulls_first else (2,))
+        else:
+            key.append((1, _MergeValue(value, reverse)))
+    return key
+
+
+class _MergeValue:
+    # Valeur comparable dans les deux sens, avec la clé de _object_order
+    __slots__ = ('key', 'reverse')
+
+    def __init__(self, value, reverse):
+        self.key = _order_key(value)
+        self.reverse = reverse
+
+    def __eq__(self, other):
+        return self.key == other.key
+
+    def __lt__(self, other):
+        return other.key < self.key if self.reverse else self.key < other.key
+
+
+def _is_missing(value):
+    # Même définition que _sort_column : NaN vient d'une cellule CSV vide
+    return value is None or (isinstance(value, float) and math.isnan(value))
+
+
+def _spill(buffer, field, order, nulls, directory):
+    run = _Run(directory)
+    run.write(sort_data(buffer, field, order, nulls=nulls))
+    return run
+
+
+class _Run:
+    def __init__(self, directory):
+        handle, self.path = tempfile.mkstemp(dir=directory, suffix='.run')
+        os.close(handle)
+
+    def write(self, items):
+        with open(self.path, 'ab') as file:
+            for start in range(0, len(items), SPILL_BLOCK_SIZE):
+                pickle.dump(items[start:start + SPILL_BLOCK_SIZE], file, pickle.HIGHEST_PROTOCOL)
+
+    def read(self):
+        with open(self.path, 'rb') as file:
+            while True:
+                try:
+                    block = pickle.load(file)
+                except EOFError:
+                    return
+                yield from block
@@ -1,45 +1,258 @@
-import ast
-
-
-def calculate_statistics(data):
-    stats = {}
-    for key in data[0].keys():
-        values = [item[key] for item in data if key in item]
-
-        # Convertir les chaînes "true"/"false" en booléens
-        for i in range(len(values)):
-            if isinstance(values[i], str):
-                if values[i].lower() == "true":
-                    values[i] = True
-                elif values[i].lower() == "false":
-                    values[i] = False
-                # Convertir les listes sous forme de chaînes en listes réelles
-                elif values[i].startswith("[") and values[i].endswith("]"):
-                    values[i] = ast.literal_eval(values[i])
-
-        # Vérification robuste des types
-        if all(isinstance(v, bool) for v in values):
-            true_count = sum(values)
-            false_count = len(values) - true_count
-            stats[key] = {
-                'true_percentage': true_count / len(values) * 100,
-                'false_percentage': false_count / len(values) * 100
-            }
+import math
+
+import numpy as np
+
+from dataset import Dataset, Records, convert_value, to_python
+from profiling import profiled
+
+UNSUPPORTED = {'note': 'Type non pris en charge ou mixte'}
+
+
+@profiled('calculate_statistics', rows_out=None)
+def calculate_statistics(data, schema=None):
+    # Import local : parallel dépend de ce module ; les gros jeux sont répartis entre plusieurs processus
+    from parallel import parallel_accumulate
+    return {key: column.summary() for key, column in parallel_accumulate(data, schema=schema).items()}
+
+
+def accumulate(data, keys=None, schema=None):
+    if isinstance(data, Records):
+        # Les lignes de la vue sont lues dans les colonnes du jeu, sans le recopier
+        keys = data.fields if keys is None else keys
+        return {key: _column_stats(data.dataset, key, data.rows) for key in keys}
+    if isinstance(data, Dataset):
+        keys = data.fields if keys is None else keys
+        return {key: _column_stats(data, key) for key in keys}
+
+    keys = list(data[0].keys()) if keys is None else keys
+    stats = {key: ColumnStats() for key in keys}
+    # Avec un schéma, les valeurs sont déjà converties et le texte n'a pas de statistiques
+    convert = convert_value if schema is None else (lambda value: value)
+    scanned = {key: column for key, column in stats.items() if schema is None or schema.get(key) != 'str'}
+    for key in stats.keys() - scanned.keys():
+        stats[key].kind = 'mixed'
+
+    # Une seule passe sur les lignes met à jour toutes les colonnes à la fois
+    for item in data:
+        for key, column in scanned.items():
+            if key in item:
+                column.add(convert(item[key]))
+            else:
+                column.null_count += 1
+    return stats
+
+
+class ColumnStats:
+    def __init__(self):
+        # kind : None tant qu'aucune valeur n'a été vue, puis 'bool', 'number', 'list' ou 'mixed'
+        self.kind = None
+        self.count = 0
+        self.null_count = 0
+        self.true_count = 0
+        self.total = 0
+        self.min = None
+        self.max = None
+        self.element_count = 0
+
+    @classmethod
+    def from_column(cls, column, valid, kind):
+        stats = cls()
+        values = column[valid]
+        stats.null_count = int(len(column) - len(values))
+
+        if kind == 'str':
+            lowered = np.strings.lower(values)
+            if len(values) and np.isin(lowered, ['true', 'false']).all():
+                return stats._from_values(lowered == 'true', 'bool')
+            if not (np.strings.startswith(values, '[') & np.strings.endswith(values, ']')).all():
+                stats.count = len(values)
+                stats.kind = 'mixed' if len(values) else None
+                return stats
+        if kind == 'bool':
+            return stats._from_values(values, 'bool')
+        if kind in ('int', 'float'):
+            if kind == 'float':
+                missing = np.isnan(values)
+                stats.null_count += int(missing.sum())
+                values = values[~missing]
+            return stats._from_values(values, 'number')
+
+        for value in values:
+            stats.add(convert_value(to_python(value)))
+        return stats
+
+    @classmethod
+    def from_lists(cls, values, valid):
+        # values : tous les éléments des listes bout à bout (voir Dataset.ragged) ; une réduction par statistique
+        stats = cls()
+        stats.count = int(np.count_nonzero(valid))
+        stats.null_count = len(valid) - stats.count
+        if stats.count:
+            stats.kind = 'list'
+            stats.element_count = len(values)
+        if len(values):
+            stats.total = to_python(values.sum())
+            stats.min = to_python(values.min())
+            stats.max = to_python(values.max())
+        return stats
+
+    def _from_values(self, values, kind):
+        self.count = len(values)
+        if not self.count:
+            return self
+        self.kind = kind
+        if kind == 'bool':
+            self.true_count = int(np.count_nonzero(values))
+        else:
+            self.total = to_python(values.sum())
+            self.min = to_python(values.min())
+            self.max = to_python(values.max())
+        return self
 
-        elif all(isinstance(v, (int, float)) for v in values):
-            stats[key] = {
-                'min': min(values),
-                'max': max(values),
-                'avg': sum(values) / len(values)
+    def add(self, value):
+        if value is None or (isinstance(value, float) and math.isnan(value)):
+            self.null_count += 1
+            return
+        self.count += 1
+        if isinstance(value, bool):
+            self._set_kind('bool')
+            self.true_count += value
+        elif isinstance(value, (int, float)):
+            self._set_kind('number')
+            self._update(value, value, value)
+        elif isinstance(value, (list, tuple)):
+            self._set_kind('list')
+            if all(isinstance(v, (int, float)) and not isinstance(v, bool) for v in value):
+                if value:
+                    self.element_count += len(value)
+                    self._update(sum(value), min(value), max(value))
+            else:
+                self.kind = 'mixed'
+        else:
+            self.kind = 'mixed'
+
+    def merge(self, other):
+        # Combine les statistiques de deux ensembles de lignes disjoints
+        result = ColumnStats()
+        if self.kind is None or other.kind is None or self.kind == other.kind:
+            result.kind = self.kind or other.kind
+        else:
+            result.kind = 'mixed'
+        result.count = self.count + other.count
+        result.null_count = self.null_count + other.null_count
+        result.true_count = self.true_count + other.true_count
+        result.total = self.total + other.total
+        result.element_count = self.element_count + other.element_count
+        result.min = _pick(min, self.min, other.min)
+        result.max = _pick(max, self.max, other.max)
+        return result
+
+    def subtract(self, removed):
+        # Retire des lignes déjà comptées ; None si le min ou le max doit être recalculé
+        if removed.kind not in (None, self.kind) or self.kind == 'mixed':
+            return None
+        if removed.min is not None and (removed.min <= self.min or removed.max >= self.max):
+            return None
+        result = ColumnStats()
+        result.kind = self.kind
+        result.count = self.count - removed.count
+        result.null_count = self.null_count - removed.null_count
+        result.true_count = self.true_count - removed.true_count
+        result.total = self.total - removed.total
+        result.element_count = self.element_count - removed.element_count
+        result.min = self.min
+        result.max = self.max
+        if result.count == 0:
+            result.kind = None
+        return result
+
+    def summary(self):
+        if self.kind == 'bool' and self.count:
+            return {
+                'true_percentage': self.true_count / self.count * 100,
+                'false_percentage': (self.count - self.true_count) / self.count * 100,
+                'count': self.count,
+                'null_count': self.null_count
             }
-        elif all(isinstance(v, list) for v in values):
-            # Extraire les éléments des listes et combiner toutes les valeurs
-            combined_values = [elem for sublist in values for elem in sublist]
-            stats[key] = {
-                'min': min(combined_values),
-                'max': max(combined_values),
-                'avg': sum(combined_values) / len(combined_values)
+        elif self.kind == 'number' and self.count:
+            return {
+                'min': self.min,
+                'max': self.max,
+                'avg': self.total / self.count,
+                'count': self.count,
+                'null_count': self.null_count
             }
-        else:
-            stats[key] = {'note': 'Type non pris en charge ou mixte'}
-    return stats
+        elif self.kind == 'list' and self.element_count:
+            return {
+                'min': self.min,
+                'max': self.max,
+                'avg': self.total / self.element_count,
+                'count': self.count,
+                'null_count': self.null_count,
+                'element_count': self.element_count
+            }
+        return dict(UNSUPPORTED)
+
+    def _set_kind(self, kind):
+        if self.kind is None:
+            self.kind = kind
+        elif self.kind != kind:
+            self.kind = 'mixed'
+
+    def _update(self, total, low, high):
+        self.total += total
+        self.min = low if self.min is None or low < self.min else self.min
+        self.max = high if self.max is None or high > self.max else self.max
+
+
+class StatisticsCache:
+    # accumulate : calcul des statistiques par colonne (parallel_accumulate pour les gros jeux)
+    def __init__(self, schema=None, accumulate=accumulate):
+        self.columns = {}
+        self.keys = None
+        self.schema = schema
+        self.accumulate = accumulate
+
+    def statistics(self, data):
+        if not len(data):
+            return {}
+        if self.keys is None:
+            self.keys = list(data.fields if isinstance(data, (Dataset, Records)) else data[0].keys())
+        # Seules les colonnes absentes ou invalidées sont recalculées
+        stale = [key for key in self.keys if key not in self.columns]
+        if stale:
+            self.columns.update(self.accumulate(data, stale, self.schema))
+        return {key: self.columns[key].summary() for key in self.keys}
+
+    def remove_rows(self, removed):
+        if self.keys is None or not len(removed):
+            return
+        removed_stats = self.accumulate(removed, self.keys, self.schema)
+        for key in list(self.columns):
+            updated = self.columns[key].subtract(removed_stats[key])
+            if updated is None:
+                del self.columns[key]
+            else:
+                self.columns[key] = updated
+
+    def invalidate(self, schema=None):
+        self.columns = {}
+        self.keys = None
+        self.schema = schema or self.schema
+
+
+def _column_stats(dataset, key, rows=None):
+    column, valid = dataset.column(key, rows)
+    if dataset.kind(key) == 'list':
+        values, _ = dataset.ragged(key, rows)
+        if values is not None:
+            return ColumnStats.from_lists(values, valid)
+    return ColumnStats.from_column(column, valid, dataset.kind(key))
+
+
+def _pick(function, left, right):
+    if left is None:
+        return right
+    if right is None:
+        return left
+    return function(left, right)
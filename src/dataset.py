@@ -0,0 +1,454 @@
+import ast
+import collections.abc
+import functools
+import itertools
+
+import numpy as np
+
+from data_index import DEFAULT_INDEXES, build_index
+
+
+# Valeur utilisée pour remplir les cases manquantes de chaque type de colonne
+FILL_VALUES = {
+    'bool': False,
+    'int': 0,
+    'float': np.nan,
+    'str': '',
+    'list': (),
+    'object': None,
+}
+
+DTYPES = {
+    'bool': bool,
+    'int': np.int64,
+    'float': np.float64,
+    'str': np.str_,
+    'list': object,
+    'object': object,
+}
+
+
+def infer_kind(values, default='object'):
+    # default : type d'une colonne sans aucune valeur (None pour le laisser inconnu)
+    kind = None
+    for v in values:
+        if v is None:
+            # null (JSON, YAML) : valeur manquante, sans effet sur le type de la colonne
+            continue
+        if isinstance(v, bool):
+            current = 'bool'
+        elif isinstance(v, int):
+            current = 'int'
+        elif isinstance(v, float):
+            current = 'float'
+        elif isinstance(v, str):
+            current = 'str'
+        elif isinstance(v, (list, tuple)):
+            current = 'list'
+        else:
+            return 'object'
+
+        if kind is None or kind == current:
+            kind = current
+        elif {kind, current} == {'int', 'float'}:
+            kind = 'float'
+        else:
+            return 'object'
+    return kind or default
+
+
+def convert_value(value):
+    # Chaînes "true"/"false" et listes écrites sous forme de texte (CSV, XML)
+    if isinstance(value, str):
+        lowered = value.lower()
+        if lowered == "true":
+            return True
+        elif lowered == "false":
+            return False
+        elif value.startswith("[") and value.endswith("]"):
+            try:
+                return list(_literal(value))
+            except (ValueError, SyntaxError):
+                return value
+    return value
+
+
+@functools.lru_cache(maxsize=65536)
+def _literal(value):
+    # Les mêmes chaînes reviennent souvent : on ne les analyse qu'une fois
+    return ast.literal_eval(value)
+
+
+def share_strings(values):
+    # Une seule chaîne Python par valeur distincte, partagée par toutes les lignes qui la contiennent
+    seen = {}
+    return [seen.setdefault(value, value) if isinstance(value, str) else value for value in values]
+
+
+def to_python(value):
+    if isinstance(value, np.generic):
+        return value.item()
+    return value
+
+
+def build_column(values, valid, kind):
+    fill = FILL_VALUES[kind]
+    filled = [v if ok else fill for v, ok in zip(values, valid)]
+    if DTYPES[kind] is object:
+        column = np.empty(len(filled), dtype=object)
+        column[:] = filled
+        return column
+    try:
+        return np.array(filled, dtype=DTYPES[kind])
+    except OverflowError:
+        column = np.empty(len(filled), dtype=object)
+        column[:] = filled
+        return column
+
+
+def encode_strings(values):
+    # Codage par dictionnaire : valeurs distinctes triées et, pour chaque ligne, le rang de sa valeur ;
+    # aucun tableau de largeur fixe n'est construit pour toutes les lignes
+    positions = {}
+    codes = np.fromiter((positions.setdefault(value, len(positions)) for value in values), dtype=np.int64)
+    uniques = np.array(list(positions), dtype=np.str_)
+    order = np.argsort(uniques, kind='stable')
+    ranks = np.empty(len(order), dtype=np.int64)
+    ranks[order] = np.arange(len(order))
+    return uniques[order], ranks[codes].astype(_code_dtype(len(uniques)))
+
+
+def encode_array(column):
+    uniques, codes = np.unique(column, return_inverse=True)
+    return uniques, codes.astype(_code_dtype(len(uniques)))
+
+
+def _code_dtype(count):
+    if count <= 1 << 8:
+        return np.uint8
+    return np.uint16 if count <= 1 << 16 else np.int32
+
+
+def batched(items, chunk_size):
+    # Paquets de chunk_size lignes ; une vue Records ne construit ses dictionnaires qu'un paquet à la fois
+    if isinstance(items, Records):
+        for start in range(0, len(items), chunk_size):
+            yield items[start:start + chunk_size].to_records()
+        return
+    items = iter(items)
+    while True:
+        chunk = list(itertools.islice(items, chunk_size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def lists_from_ragged(values, offsets):
+    # Colonne d'objets reconstruite depuis les listes à plat (voir Dataset.ragged)
+    column = np.empty(len(offsets) - 1, dtype=object)
+    column[:] = [values[start:end].tolist() for start, end in zip(offsets[:-1], offsets[1:])]
+    return column
+
+
+class Dataset:
+    # Les colonnes de texte sont codées : columns[field] contient les codes, dictionaries[field] les valeurs
+    # distinctes triées (l'ordre des codes est celui des valeurs)
+    def __init__(self, columns, valid=None, kinds=None, dictionaries=None):
+        self.columns = dict(columns)
+        self.fields = list(self.columns)
+        lengths = {len(column) for column in self.columns.values()}
+        if len(lengths) > 1:
+            raise ValueError("All columns must have the same length")
+        self.length = lengths.pop() if lengths else 0
+
+        valid = valid or {}
+        kinds = kinds or {}
+        self.valid = {}
+        self.kinds = {}
+        self.indexes = {}
+        self.texts = {}
+        self.lists = {}
+        self.dictionaries = dict(dictionaries or {})
+        self.version = 0
+        for name, column in self.columns.items():
+            self.valid[name] = valid[name] if name in valid else np.ones(self.length, dtype=bool)
+            self.kinds[name] = kinds[name] if name in kinds else _kind_of(column)
+            if self.kinds[name] == 'str' and name not in self.dictionaries:
+                self.dictionaries[name], self.columns[name] = encode_array(column)
+
+    @classmethod
+    def from_records(cls, records, schema=None):
+        # schema : types déjà connus (voir data_loader.infer_schema), évite de les redéduire
+        records = records if isinstance(records, list) else list(records)
+        fields = dict(schema) if schema is not None else {}
+        if schema is None:
+            for item in records:
+                for key in item:
+                    fields.setdefault(key, None)
+
+        columns, valid, kinds, dictionaries = {}, {}, {}, {}
+        for name in fields:
+            values = [item.get(name) for item in records]
+            # Un champ absent ou à null est une valeur manquante
+            mask = np.fromiter((v is not None for v in values), dtype=bool, count=len(records))
+            kind = fields[name] or infer_kind(v for v, ok in zip(values, mask) if ok)
+            if kind == 'str':
+                dictionaries[name], columns[name] = encode_strings(
+                    v if ok and isinstance(v, str) else str(v) if ok else '' for v, ok in zip(values, mask))
+            else:
+                columns[name] = build_column(values, mask, kind)
+            valid[name] = mask
+            kinds[name] = 'object' if kind == 'int' and columns[name].dtype == object else kind
+        return cls(columns, valid, kinds, dictionaries)
+
+    def __len__(self):
+        return self.length
+
+    def __contains__(self, field):
+        return field in self.columns
+
+    def __iter__(self):
+        for i in range(self.length):
+            yield self.row(i)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return self.take(np.arange(self.length)[index])
+        return self.row(index)
+
+    def row(self, index):
+        return {name: self.value(name, index) for name in self.fields if self.valid[name][index]}
+
+    def value(self, field, index):
+        value = self.columns[field][index]
+        if field in self.dictionaries:
+            value = self.dictionaries[field][value]
+        return to_python(value)
+
+    def column(self, field, rows=None):
+        # Valeurs de la colonne (décodées pour le texte), seulement pour rows si demandé
+        if field not in self.columns:
+            length = self.length if rows is None else len(rows)
+            return np.full(length, None, dtype=object), np.zeros(length, dtype=bool)
+        column, valid = self.columns[field], self.valid[field]
+        if rows is not None:
+            column, valid = column[rows], valid[rows]
+        if field in self.dictionaries:
+            column = self.dictionaries[field][column]
+        return column, valid
+
+    @property
+    def schema(self):
+        return dict(self.kinds)
+
+    def kind(self, field):
+        return self.kinds.get(field, 'object')
+
+    def set_column(self, field, column, valid=None, kind=None):
+        column = np.asarray(column)
+        if len(column) != self.length:
+            raise ValueError("All columns must have the same length")
+        if field not in self.columns:
+            self.fields.append(field)
+        self.valid[field] = valid if valid is not None else np.ones(self.length, dtype=bool)
+        self.kinds[field] = kind or _kind_of(column)
+        self.dictionaries.pop(field, None)
+        if self.kinds[field] == 'str':
+            self.dictionaries[field], column = encode_array(column)
+        self.columns[field] = column
+        self.invalidate(field)
+
+    def invalidate(self, field=None):
+        # Toute modification des données rend les index, textes et listes calculés obsolètes
+        self.version += 1
+        if field is None:
+            self.indexes.clear()
+            self.texts.clear()
+            self.lists.clear()
+        else:
+            self.indexes.pop(field, None)
+            self.lists.pop(field, None)
+            for key in [key for key in self.texts if key[0] == field]:
+                del self.texts[key]
+
+    def text(self, field, lower=False, rows=None):
+        # Colonne sous forme de texte ('' pour les valeurs manquantes), en minuscules si demandé ;
+        # décodée à la demande depuis le dictionnaire, seulement pour rows si demandé
+        values, codes = self.dictionary(field, lower)
+        return values[codes] if rows is None else values[codes[rows]]
+
+    def dictionary(self, field, lower=False):
+        # Valeurs distinctes du texte (en minuscules si demandé, elles peuvent alors se répéter)
+        # et code de chaque ligne ; les filtres de texte ne travaillent que sur les valeurs distinctes
+        key = (field, 'dictionary', lower)
+        if key not in self.texts:
+            if lower:
+                values, codes = self.dictionary(field)
+                self.texts[key] = (np.strings.lower(values), codes)
+            elif field in self.dictionaries:
+                self.texts[key] = (self.dictionaries[field], self.columns[field])
+            else:
+                column, valid = self.column(field)
+                self.texts[key] = encode_array(np.where(valid, column.astype(str), ''))
+        return self.texts[key]
+
+    def ragged(self, field, rows=None):
+        # Colonne de listes à plat : toutes les valeurs bout à bout et le début de chaque ligne dans values ;
+        # les lignes sans liste ont une longueur nulle. values est None si un élément n'est pas un nombre.
+        # Avec rows, les listes de ces lignes sont extraites de la disposition en cache, dans l'ordre de rows
+        if rows is not None:
+            values, offsets = self.ragged(field)
+            lengths = np.diff(offsets)[rows]
+            taken = np.zeros(len(lengths) + 1, dtype=np.int64)
+            np.cumsum(lengths, out=taken[1:])
+            if values is None:
+                return None, taken
+            positions = np.repeat(offsets[:-1][rows] - taken[:-1], lengths) + np.arange(taken[-1])
+            return values[positions], taken
+        if field not in self.lists:
+            column, valid = self.column(field)
+            lists = [v if ok and isinstance(v, (list, tuple)) else () for v, ok in zip(column, valid)]
+            offsets = np.zeros(len(lists) + 1, dtype=np.int64)
+            np.cumsum(np.fromiter(map(len, lists), dtype=np.int64, count=len(lists)), out=offsets[1:])
+            flat = list(itertools.chain.from_iterable(lists))
+            numeric = all(isinstance(v, (int, float)) and not isinstance(v, bool) for v in flat)
+            values = _number_array(flat) if numeric else None
+            self.lists[field] = (values, offsets)
+        return self.lists[field]
+
+    def create_index(self, field, kinds=None):
+        column, valid = self.column(field)
+        kinds = DEFAULT_INDEXES[self.kind(field)] if kinds is None else kinds
+        indexes = self.indexes.setdefault(field, {})
+        for kind in kinds:
+            indexes[kind] = build_index(column, valid, kind)
+        return indexes
+
+    def find_index(self, field, condition):
+        for index in self.indexes.get(field, {}).values():
+            if condition in index.conditions:
+                return index
+        return None
+
+    def take(self, indices):
+        indices = np.asarray(indices, dtype=np.intp)
+        columns = {name: column[indices] for name, column in self.columns.items()}
+        valid = {name: mask[indices] for name, mask in self.valid.items()}
+        # Les codes sont repris tels quels : le dictionnaire est partagé
+        return Dataset(columns, valid, self.kinds, self.dictionaries)
+
+    def filter(self, mask):
+        return self.take(np.flatnonzero(mask))
+
+    def to_records(self):
+        values = {name: self._values(name) for name in self.fields}
+        valid = {name: mask.tolist() for name, mask in self.valid.items()}
+        return [
+            {name: values[name][i] for name in self.fields if valid[name][i]}
+            for i in range(self.length)
+        ]
+
+    def _values(self, field):
+        if field not in self.dictionaries:
+            return self.columns[field].tolist()
+        # Une seule chaîne Python par valeur distincte, partagée par toutes les lignes qui la contiennent
+        uniques = self.dictionaries[field].tolist()
+        return [uniques[code] for code in self.columns[field].tolist()]
+
+
+class Row(collections.abc.Mapping):
+    # Une ligne d'un Dataset vue comme un dictionnaire en lecture seule ; les valeurs restent dans les colonnes
+    __slots__ = ('dataset', 'index')
+
+    def __init__(self, dataset, index):
+        self.dataset = dataset
+        self.index = index
+
+    def __getitem__(self, field):
+        if field not in self.dataset.columns or not self.dataset.valid[field][self.index]:
+            raise KeyError(field)
+        return self.dataset.value(field, self.index)
+
+    def __iter__(self):
+        return (name for name in self.dataset.fields if self.dataset.valid[name][self.index])
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+    def __repr__(self):
+        return repr(dict(self))
+
+
+class Records(collections.abc.Sequence):
+    # Lignes d'un Dataset (toutes, ou rows dans cet ordre) utilisables comme une liste de dictionnaires
+    def __init__(self, dataset, rows=None):
+        self.dataset = dataset
+        self.rows = None if rows is None else np.asarray(rows, dtype=np.intp)
+
+    @property
+    def fields(self):
+        return self.dataset.fields
+
+    def __len__(self):
+        return len(self.dataset) if self.rows is None else len(self.rows)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return Records(self.dataset, self.row_ids()[index])
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("Record index out of range")
+        return Row(self.dataset, index if self.rows is None else int(self.rows[index]))
+
+    def __iter__(self):
+        rows = range(len(self.dataset)) if self.rows is None else self.rows.tolist()
+        return (Row(self.dataset, index) for index in rows)
+
+    def __eq__(self, other):
+        if not isinstance(other, collections.abc.Sequence) or isinstance(other, str):
+            return NotImplemented
+        return len(self) == len(other) and all(a == b for a, b in zip(self, other))
+
+    __hash__ = None
+
+    def __repr__(self):
+        return f"Records({len(self)} rows)"
+
+    def row_ids(self):
+        return np.arange(len(self.dataset)) if self.rows is None else self.rows
+
+    def select(self, positions):
+        # positions : indices dans cette vue ; le résultat partage le même Dataset
+        return Records(self.dataset, self.row_ids()[np.asarray(positions, dtype=np.intp)])
+
+    def to_dataset(self):
+        return self.dataset if self.rows is None else self.dataset.take(self.rows)
+
+    def to_records(self):
+        return self.to_dataset().to_records()
+
+
+def _number_array(values):
+    try:
+        return np.array(values, dtype=np.int64 if all(isinstance(v, int) for v in values) else np.float64)
+    except OverflowError:
+        return np.array(values, dtype=np.float64)
+
+
+def _kind_of(column):
+    if column.dtype == bool:
+        return 'bool'
+    if np.issubdtype(column.dtype, np.integer):
+        return 'int'
+    if np.issubdtype(column.dtype, np.floating):
+        return 'float'
+    if column.dtype.kind == 'U':
+        return 'str'
+    return 'object'
+
+
+def as_dataset(data, schema=None):
+    if isinstance(data, Records):
+        return data.to_dataset()
+    return data if isinstance(data, Dataset) else Dataset.from_records(data, schema)
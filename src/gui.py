@@ -1,17 +1,45 @@
 # src/gui.py
-import ast
-import datetime
+import re
 import tkinter as tk
 from tkinter import filedialog, messagebox
 
 import ttkbootstrap as ttk
 from ttkbootstrap.constants import *
 
-from data_filter import filter_data
-from data_loader import load_csv, load_json, load_yaml, load_xml
-from data_saver import save_csv, save_json, save_yaml, save_xml
-from data_sort import sort_data
-from data_stats import calculate_statistics
+from data_loader import apply_schema, is_pattern, iter_file, load_binary, load_many
+from data_grid import DataGrid
+from data_saver import save_binary, save_file
+from data_stats import StatisticsCache
+from history import History, Operation
+from jobs import JobScheduler
+from parallel import parallel_accumulate
+from profiling import PROFILER, count_rows
+
+
+# Conditions et ordres proposés selon le type de la colonne (voir data_loader.infer_schema)
+CONDITIONS = {
+    'list': ["exact_length", "min_length", "max_length", "average_equals", "average_greater", "average_less"],
+    'bool': ["true", "false"],
+    'int': ["less_than", "less_than_equals", "equals", "greater_than", "greater_than_equals", "not_equals",
+            "in_set"],
+    'float': ["less_than", "less_than_equals", "equals", "greater_than", "greater_than_equals", "not_equals",
+              "in_set"],
+    'str': ["equals", "not_equals", "contains", "not_contains", "lexicographically_less_than",
+            "lexicographically_greater_than", "starts_with", "ends_with", "lexicographically_less_than_field",
+            "lexicographically_greater_than_field", "regex", "in_set"],
+    # Valeurs de types mélangés
+    'object': ["equals", "not_equals", "contains", "not_contains", "in_set"],
+}
+
+ORDERS = {
+    'int': ["ascending", "descending"],
+    'float': ["ascending", "descending"],
+    'bool': ["false_to_true", "true_to_false"],
+    'str': ["a_to_z", "z_to_a"],
+}
+
+# Délai (ms) sans saisie avant de recalculer l'aperçu du filtre
+PREVIEW_DELAY = 300
 
 
 class DataApp:
@@ -21,14 +49,32 @@ class DataApp:
         self.root.geometry("800x600")
         self.data = []
         self.fields = []
+        self.schema = {}
         self.file_loaded = False
         self.filename = tk.StringVar(value="No file loaded")
-        self.history = []
+        self.history = None
+        self.stats_cache = StatisticsCache(accumulate=parallel_accumulate)
+        # Les traitements longs tournent hors du thread de Tk pour que la fenêtre reste réactive
+        self.scheduler = JobScheduler(self.root)
+        self.current_job = None
+        self.last_measurement = None
+        self.capture_profile = tk.BooleanVar(value=PROFILER.capturing)
+        self.status = tk.StringVar(value="")
+        self.root.protocol("WM_DELETE_WINDOW", self.close)
 
         self.create_widgets()
         self.update_buttons()
 
     def create_widgets(self):
+        self.status_frame = ttk.Frame(self.root, padding=5)
+        self.status_frame.pack(side=BOTTOM, fill=X)
+        ttk.Label(self.status_frame, textvariable=self.status).pack(side=LEFT, padx=5)
+        self.cancel_button = ttk.Button(self.status_frame, text="Cancel", command=self.cancel_job,
+                                        bootstyle="danger", state=tk.DISABLED)
+        self.cancel_button.pack(side=RIGHT, padx=5)
+        self.progress_bar = ttk.Progressbar(self.status_frame, mode="indeterminate")
+        self.progress_bar.pack(side=RIGHT, padx=5, fill=X, expand=True)
+
         self.main_frame = ttk.Frame(self.root, padding=10)
         self.main_frame.pack(fill=BOTH, expand=True)
 
@@ -38,6 +84,10 @@ class DataApp:
         self.load_button = ttk.Button(self.main_frame, text="Load Data", command=self.load_data, bootstyle="primary")
         self.load_button.pack(pady=5, fill=X)
 
+        self.load_folder_button = ttk.Button(self.main_frame, text="Load Folder", command=self.load_folder,
+                                             bootstyle="primary")
+        self.load_folder_button.pack(pady=5, fill=X)
+
         self.save_button = ttk.Button(self.main_frame, text="Save Data", command=self.save_data, bootstyle="primary")
         self.save_button.pack(pady=5, fill=X)
 
@@ -65,7 +115,9 @@ class DataApp:
         self.history_button.pack(pady=5, fill=X)
 
     def update_buttons(self):
-        state = tk.NORMAL if self.file_loaded else tk.DISABLED
+        state = tk.NORMAL if self.file_loaded and self.current_job is None else tk.DISABLED
+        self.load_button.config(state=tk.NORMAL if self.current_job is None else tk.DISABLED)
+        self.load_folder_button.config(state=tk.NORMAL if self.current_job is None else tk.DISABLED)
         self.save_button.config(state=state)
         self.stats_button.config(state=state)
         self.filter_button.config(state=state)
@@ -76,68 +128,153 @@ class DataApp:
 
     def load_data(self):
         file_path = filedialog.askopenfilename(
-            filetypes=[("CSV files", "*.csv"), ("JSON files", "*.json"), ("YAML files", "*.yaml"),
-                       ("XML files", "*.xml")])
+            filetypes=[("CSV files", "*.csv"), ("JSON files", "*.json"), ("JSON Lines files", "*.jsonl"),
+                       ("YAML files", "*.yaml"), ("XML files", "*.xml"), ("Binary dataset files", "*.npd"),
+                       ("Compressed files", "*.gz *.zst")])
         if not file_path:
             return
 
-        try:
-            if file_path.endswith('.csv'):
-                self.data = load_csv(file_path)
-            elif file_path.endswith('.json'):
-                self.data = load_json(file_path)
-            elif file_path.endswith('.yaml'):
-                self.data = load_yaml(file_path)
-            elif file_path.endswith('.xml'):
-                self.data = load_xml(file_path)
-            self.original_data = self.data.copy()
-            self.fields = list(self.data[0].keys())
-            self.filename.set(f"Loaded: {file_path.split('/')[-1]}")
-            self.file_loaded = True
-            self.update_buttons()
-            messagebox.showinfo("Info", "Data Loaded Successfully")
-            self.add_to_history("Load Data", f"Loaded {file_path.split('/')[-1]}")
-        except Exception as e:
-            messagebox.showerror("Error", f"Failed to load data: {e}")
+        self.run_job("Loading", self.load_task, file_path,
+                     on_done=lambda result: self.finish_load(file_path, result),
+                     error_message="Failed to load data", rows_out=lambda result: len(result[1].records))
+
+    def load_folder(self):
+        # Tous les fichiers pris en charge du dossier sont chargés ensemble
+        directory = filedialog.askdirectory()
+        if not directory:
+            return
+
+        self.run_job("Loading", self.load_task, directory,
+                     on_done=lambda result: self.finish_load(directory, result),
+                     error_message="Failed to load data", rows_out=lambda result: len(result[1].records))
+
+    def load_task(self, job, file_path):
+        if is_pattern(file_path):
+            def on_file(count, total):
+                job.check()
+                job.report(count / total, f"{count}/{total} files read")
+
+            data, schema = load_many(file_path, on_file=on_file)
+            return schema, History(data, schema)
+        if file_path.endswith('.npd'):
+            # Les colonnes projetées en mémoire servent directement, sans passer par des dictionnaires
+            dataset = load_binary(file_path)
+            return dataset.schema, History(dataset)
+
+        data = []
+        for chunk in iter_file(file_path):
+            job.check()
+            data.extend(chunk)
+            job.report(message=f"{len(data)} rows read")
+        job.check()
+        # Types déduits et valeurs converties une seule fois, au chargement
+        schema = apply_schema(data)
+        # L'historique range les lignes en colonnes ; chaque état n'est qu'une liste d'indices de lignes
+        return schema, History(data, schema)
+
+    def finish_load(self, file_path, result):
+        self.schema, self.history = result
+        self.history.push(Operation("Load Data", f"Loaded {file_path.rstrip('/').split('/')[-1]}",
+                                    measurement=self.last_measurement))
+        self.data = self.history.view()
+        self.stats_cache.invalidate(self.schema)
+        self.fields = list(self.schema)
+        self.filename.set(f"Loaded: {file_path.rstrip('/').split('/')[-1]}")
+        self.file_loaded = True
+        self.update_buttons()
+        messagebox.showinfo("Info", "Data Loaded Successfully")
+
+    def run_job(self, name, function, *args, on_done, error_message, rows_in=None, rows_out=count_rows):
+        if self.current_job is not None:
+            return
+
+        def measured(job, *args):
+            # Chaque traitement est mesuré ; la mesure accompagne l'opération dans l'historique
+            with PROFILER.measure(name, rows_in) as measurement:
+                result = function(job, *args)
+                measurement.rows_out = rows_out(result)
+            self.last_measurement = measurement
+            return result
+
+        def done(result):
+            self.end_job("")
+            on_done(result)
+
+        def failed(error):
+            self.end_job("")
+            messagebox.showerror("Error", f"{error_message}: {error}")
+
+        def progress(job):
+            self.status.set(f"{name}: {job.message}")
+
+        self.current_job = self.scheduler.submit(name, measured, *args, on_done=done, on_error=failed,
+                                                 on_cancel=lambda: self.end_job(f"{name} cancelled"),
+                                                 on_progress=progress)
+        self.status.set(f"{name}...")
+        self.cancel_button.config(state=tk.NORMAL)
+        self.progress_bar.start()
+        self.update_buttons()
+
+    def end_job(self, status):
+        self.current_job = None
+        self.status.set(status)
+        self.cancel_button.config(state=tk.DISABLED)
+        self.progress_bar.stop()
+        self.update_buttons()
+
+    def cancel_job(self):
+        if self.current_job is not None:
+            self.current_job.cancel()
+
+    def close(self):
+        self.scheduler.shutdown()
+        self.root.destroy()
 
     def save_data(self):
         file_path = filedialog.asksaveasfilename(defaultextension=".csv",
                                                  filetypes=[("CSV files", "*.csv"), ("JSON files", "*.json"),
-                                                            ("YAML files", "*.yaml"), ("XML files", "*.xml")])
+                                                            ("JSON Lines files", "*.jsonl"),
+                                                            ("YAML files", "*.yaml"), ("XML files", "*.xml"),
+                                                            ("Binary dataset files", "*.npd"),
+                                                            ("Compressed files", "*.gz *.zst")])
         if not file_path:
             return
 
-        try:
-            if file_path.endswith('.csv'):
-                save_csv(self.data, file_path)
-            elif file_path.endswith('.json'):
-                save_json(self.data, file_path)
-            elif file_path.endswith('.yaml'):
-                save_yaml(self.data, file_path)
-            elif file_path.endswith('.xml'):
-                save_xml(self.data, file_path)
-            messagebox.showinfo("Info", "Data Saved Successfully")
-        except Exception as e:
-            messagebox.showerror("Error", f"Failed to save data: {e}")
+        self.run_job("Saving", self.save_task, self.data, file_path,
+                     on_done=lambda result: messagebox.showinfo("Info", "Data Saved Successfully"),
+                     error_message="Failed to save data", rows_in=len(self.data))
+
+    def save_task(self, job, data, file_path):
+        if file_path.endswith('.npd'):
+            save_binary(data, file_path)
+        else:
+            # Écriture en continu, compressée si le nom se termine par .gz ou .zst
+            save_file(data, file_path)
 
     def show_statistics_screen(self):
+        # Les statistiques sont mises en cache par colonne entre deux visites
+        self.run_job("Computing statistics", lambda job: self.stats_cache.statistics(self.data),
+                     on_done=self.display_statistics, error_message="Failed to compute statistics",
+                     rows_in=len(self.data), rows_out=lambda result: None)
+
+    def display_statistics(self, stats):
         self.main_frame.pack_forget()
         self.stats_frame = ttk.Frame(self.root, padding=10)
         self.stats_frame.pack(fill=BOTH, expand=True)
 
         ttk.Label(self.stats_frame, text="Statistics", font=("Helvetica", 16)).pack(pady=10)
 
-        stats = calculate_statistics(self.data)
         text = tk.Text(self.stats_frame, wrap="word", font=("Helvetica", 12))
         text.pack(padx=10, pady=10, expand=True, fill=BOTH)
-        for key, value in stats.items():
-            text.insert(tk.END, f"{key}:\n")
-            if 'true_percentage' in value and 'false_percentage' in value:
-                text.insert(tk.END, f"  true: {value['true_percentage']:.2f}%\n")
-                text.insert(tk.END, f"  false: {value['false_percentage']:.2f}%\n")
-            else:
-                for stat, val in value.items():
-                    text.insert(tk.END, f"  {stat}: {val}\n")
+        with PROFILER.measure("render_statistics", len(stats)):
+            for key, value in stats.items():
+                text.insert(tk.END, f"{key}:\n")
+                if 'true_percentage' in value and 'false_percentage' in value:
+                    text.insert(tk.END, f"  true: {value['true_percentage']:.2f}%\n")
+                    text.insert(tk.END, f"  false: {value['false_percentage']:.2f}%\n")
+                else:
+                    for stat, val in value.items():
+                        text.insert(tk.END, f"  {stat}: {val}\n")
 
         ttk.Button(self.stats_frame, text="Back", command=self.back_to_main, bootstyle="primary").pack(pady=5, fill=X)
 
@@ -163,66 +300,118 @@ class DataApp:
         self.value_entry.pack(pady=5, fill=X)
 
         self.field_menu.bind("<<ComboboxSelected>>", self.update_conditions)
+        # Aperçu en direct pendant la saisie, après une courte pause
+        self.preview_after = None
+        self.preview_job = None
+        self.condition_menu.bind("<<ComboboxSelected>>", self.schedule_preview)
+        self.value_entry.bind("<KeyRelease>", self.schedule_preview)
 
         self.filtered_out_label = ttk.Label(self.filter_frame, text="Filtered Out Rows:", font=("Helvetica", 14))
         self.filtered_out_label.pack(pady=10)
 
-        self.filtered_out_text = tk.Text(self.filter_frame, wrap="word", font=("Helvetica", 12), height=10)
-        self.filtered_out_text.pack(pady=10, padx=10, fill=BOTH)
+        self.filtered_out_grid = DataGrid(self.filter_frame, self.fields, page_size=10)
+        self.filtered_out_grid.pack(pady=10, padx=10, fill=BOTH)
 
         ttk.Button(self.filter_frame, text="Apply", command=self.apply_filter, bootstyle="success").pack(pady=5, fill=X)
         ttk.Button(self.filter_frame, text="Back", command=self.back_to_main, bootstyle="primary").pack(pady=5, fill=X)
 
     def update_conditions(self, event):
         field = self.field_menu.get()
+        self.condition_menu.config(values=CONDITIONS.get(self.schema.get(field), []))
+        self.schedule_preview()
 
-        # Convertir les chaînes "true"/"false" en booléens et les listes sous forme de chaînes en listes réelles
-        for item in self.data:
-            if isinstance(item[field], str):
-                if item[field].lower() == "true":
-                    item[field] = True
-                elif item[field].lower() == "false":
-                    item[field] = False
-                elif item[field].startswith("[") and item[field].endswith("]"):
-                    item[field] = ast.literal_eval(item[field])
-
-        if all(isinstance(item[field], list) for item in self.data):
-            self.condition_menu.config(
-                values=["exact_length", "min_length", "max_length", "average_equals", "average_greater",
-                        "average_less"])
-        elif all(isinstance(item[field], bool) for item in self.data):
-            self.condition_menu.config(values=["true", "false"])
-        elif all(isinstance(item[field], (int, float)) for item in self.data):
-            self.condition_menu.config(
-                values=["less_than", "less_than_equals", "equals", "greater_than", "greater_than_equals", "not_equals"])
-        elif all(isinstance(item[field], str) for item in self.data):
-            self.condition_menu.config(
-                values=["equals", "not_equals", "contains", "not_contains", "lexicographically_less_than",
-                        "lexicographically_greater_than", "starts_with", "ends_with", "lexicographically_less_than_field", "lexicographically_greater_than_field"])
-        else:
-            self.condition_menu.config(values=[])
-
-    def apply_filter(self):
-        field = self.field_menu.get()
-        condition = self.condition_menu.get()
-        value = self.value_entry.get()
+    def filter_value(self, field, condition, value):
         if condition in ["less_than", "less_than_equals", "greater_than", "greater_than_equals"]:
             value = float(value) if '.' in value else int(value)
         elif condition in ["true", "false"]:
             value = True if condition == "true" else False
+        elif condition == "in_set":
+            # Valeurs séparées par des virgules ; des nombres pour les colonnes numériques
+            value = [item.strip() for item in value.split(',')]
+            if self.schema.get(field) in ('int', 'float'):
+                value = [float(item) if '.' in item else int(item) for item in value]
+        elif condition == "regex":
+            try:
+                re.compile(value)
+            except re.error as error:
+                raise ValueError(f"Invalid regular expression: {error}")
+        return value
+
+    def schedule_preview(self, event=None):
+        if self.preview_after is not None:
+            self.root.after_cancel(self.preview_after)
+        self.preview_after = self.root.after(PREVIEW_DELAY, self.preview_filter)
+
+    def cancel_preview(self):
+        if self.preview_after is not None:
+            self.root.after_cancel(self.preview_after)
+            self.preview_after = None
+        if self.preview_job is not None:
+            self.preview_job.cancel()
+            self.preview_job = None
+
+    def preview_filter(self):
+        self.preview_after = None
+        field = self.field_menu.get()
+        condition = self.condition_menu.get()
+        if field not in self.fields or condition not in CONDITIONS.get(self.schema.get(field), []):
+            return
+        try:
+            value = self.filter_value(field, condition, self.value_entry.get())
+        except ValueError:
+            # Saisie incomplète : l'aperçu précédent reste affiché
+            return
+
+        # Un aperçu encore en cours est abandonné ; son résultat reste dans le cache s'il se termine
+        if self.preview_job is not None:
+            self.preview_job.cancel()
+        job = self.scheduler.submit("Preview", lambda job: self.history.filter_rows(field, condition, value),
+                                    on_done=lambda rows: self.show_preview(job, rows))
+        self.preview_job = job
+
+    def show_preview(self, job, rows):
+        if job is not self.preview_job:
+            # Saisie modifiée entre-temps : un aperçu plus récent est en route
+            return
+        self.preview_job = None
+        self.filtered_out_grid.set_data(self.history.records_for(rows))
+        self.filtered_out_label.config(text=f"Filtered Out Rows: {len(rows)} of {len(self.data)}")
 
-        filtered_out_data = filter_data(self.data, field, condition, value)
-        self.filtered_out_text.delete(1.0, tk.END)
-        for item in filtered_out_data:
-            self.filtered_out_text.insert(tk.END, f"{item}\n")
+    def apply_filter(self):
+        field = self.field_menu.get()
+        condition = self.condition_menu.get()
+        try:
+            value = self.filter_value(field, condition, self.value_entry.get())
+        except ValueError as error:
+            messagebox.showerror("Error", str(error))
+            return
+
+        # Le résultat de l'aperçu est repris du cache : rien n'est recalculé
+        self.cancel_preview()
+        self.run_job("Filtering", lambda job: self.history.filter_rows(field, condition, value),
+                     on_done=lambda rows: self.confirm_filter(field, condition, value, rows),
+                     error_message="Failed to filter data", rows_in=len(self.data))
+
+    def confirm_filter(self, field, condition, value, rows):
+        filtered_out_data = self.history.records_for(rows)
+        self.filtered_out_grid.set_data(filtered_out_data)
 
         # Mettre à jour les données filtrées après la confirmation
         confirm = messagebox.askyesno("Confirm Filter", "Do you want to apply this filter?")
         if confirm:
-            self.data = filtered_out_data
-            messagebox.showinfo("Info", "Data Filtered Successfully")
-            self.add_to_history("Filter Data", f"Filtered by {field} {condition} {value}")
-            self.back_to_main()
+            # La mise à jour des statistiques parcourt les lignes retirées : elle tourne hors du thread de Tk
+            operation = Operation("Filter Data", f"Filtered by {field} {condition} {value}",
+                                  {'field': field, 'condition': condition, 'value': value}, self.last_measurement)
+            self.run_job("Updating statistics",
+                         lambda job: self.stats_cache.remove_rows(self.history.removed_rows(rows)),
+                         on_done=lambda result: self.filter_applied(operation, rows, filtered_out_data),
+                         error_message="Failed to update statistics", rows_in=len(self.data))
+
+    def filter_applied(self, operation, rows, filtered_out_data):
+        self.data = filtered_out_data
+        self.history.push(operation, rows)
+        messagebox.showinfo("Info", "Data Filtered Successfully")
+        self.back_to_main()
 
     def show_sort_screen(self):
         self.main_frame.pack_forget()
@@ -242,42 +431,66 @@ class DataApp:
 
         self.sort_field_menu.bind("<<ComboboxSelected>>", self.update_sort_conditions)
 
+        # Clé secondaire facultative : départage les lignes égales sur le premier champ
+        ttk.Label(self.sort_frame, text="Then by:").pack(pady=5)
+        self.then_field_menu = ttk.Combobox(self.sort_frame, values=[""] + self.fields)
+        self.then_field_menu.pack(pady=5, fill=X)
+        self.then_order_menu = ttk.Combobox(self.sort_frame)
+        self.then_order_menu.pack(pady=5, fill=X)
+        self.then_field_menu.bind("<<ComboboxSelected>>", self.update_then_conditions)
+
+        self.nulls_first = tk.BooleanVar(value=False)
+        ttk.Checkbutton(self.sort_frame, text="Missing values first", variable=self.nulls_first).pack(pady=5)
+
         self.sorted_data_label = ttk.Label(self.sort_frame, text="Sorted Data:", font=("Helvetica", 14))
         self.sorted_data_label.pack(pady=10)
 
-        self.sorted_data_text = tk.Text(self.sort_frame, wrap="word", font=("Helvetica", 12), height=10)
-        self.sorted_data_text.pack(pady=10, padx=10, fill=BOTH)
+        self.sorted_data_grid = DataGrid(self.sort_frame, self.fields, page_size=10)
+        self.sorted_data_grid.pack(pady=10, padx=10, fill=BOTH)
 
         ttk.Button(self.sort_frame, text="Apply", command=self.apply_sort, bootstyle="success").pack(pady=5, fill=X)
         ttk.Button(self.sort_frame, text="Back", command=self.back_to_main, bootstyle="primary").pack(pady=5, fill=X)
 
     def update_sort_conditions(self, event):
         field = self.sort_field_menu.get()
-        if all(isinstance(item[field], (int, float)) for item in self.data):
-            self.order_menu.config(values=["ascending", "descending"])
-        elif all(isinstance(item[field], bool) for item in self.data):
-            self.order_menu.config(values=["false_to_true", "true_to_false"])
-        elif all(isinstance(item[field], str) for item in self.data):
-            self.order_menu.config(values=["a_to_z", "z_to_a"])
-        else:
-            self.order_menu.config(values=[])
+        self.order_menu.config(values=ORDERS.get(self.schema.get(field), []))
+
+    def update_then_conditions(self, event):
+        field = self.then_field_menu.get()
+        self.then_order_menu.config(values=ORDERS.get(self.schema.get(field), []))
+
+    def sort_keys(self):
+        keys = [(self.sort_field_menu.get(), self.order_menu.get())]
+        if self.then_field_menu.get():
+            keys.append((self.then_field_menu.get(), self.then_order_menu.get()))
+        return keys
 
     def apply_sort(self):
-        field = self.sort_field_menu.get()
-        order = self.order_menu.get()
-        sorted_data = sort_data(self.data, field, order)
+        keys = self.sort_keys()
+        nulls = "first" if self.nulls_first.get() else "last"
+        # L'aperçu ne trie que les lignes affichées ; le tri complet n'est fait qu'à la confirmation
+        limit = self.sorted_data_grid.page_size
+        self.run_job("Sorting", lambda job: self.history.sort_rows(keys, nulls=nulls, limit=limit),
+                     on_done=lambda rows: self.confirm_sort(keys, nulls, rows),
+                     error_message="Failed to sort data", rows_in=len(self.data))
 
-        self.sorted_data_text.delete(1.0, tk.END)
-        for item in sorted_data:
-            self.sorted_data_text.insert(tk.END, f"{item}\n")
+    def confirm_sort(self, keys, nulls, preview_rows):
+        self.sorted_data_grid.set_data(self.history.records_for(preview_rows))
 
         # Mettre à jour les données triées après la confirmation
         confirm = messagebox.askyesno("Confirm Sort", "Do you want to apply this sort?")
         if confirm:
-            self.data = sorted_data
-            messagebox.showinfo("Info", "Data Sorted Successfully")
-            self.add_to_history("Sort Data", f"Sorted by {field} in {order} order")
-            self.back_to_main()
+            self.run_job("Sorting", lambda job: self.history.sort_rows(keys, nulls=nulls),
+                         on_done=lambda rows: self.finish_sort(keys, nulls, rows),
+                         error_message="Failed to sort data", rows_in=len(self.data))
+
+    def finish_sort(self, keys, nulls, rows):
+        self.data = self.history.records_for(rows)
+        details = ", then ".join(f"{field} in {order} order" for field, order in keys)
+        self.history.push(Operation("Sort Data", f"Sorted by {details}",
+                                    {'keys': keys, 'nulls': nulls}, self.last_measurement), rows)
+        messagebox.showinfo("Info", "Data Sorted Successfully")
+        self.back_to_main()
 
     def show_data(self):
         self.main_frame.pack_forget()
@@ -286,25 +499,28 @@ class DataApp:
 
         ttk.Label(self.data_frame, text="Data", font=("Helvetica", 16)).pack(pady=10)
 
-        text = tk.Text(self.data_frame, wrap="word", font=("Helvetica", 12))
-        text.pack(padx=10, pady=10, expand=True, fill=BOTH)
-        for item in self.data:
-            text.insert(tk.END, f"{item}\n")
+        # Seules les lignes visibles sont affichées ; un clic sur un en-tête trie l'affichage
+        self.data_grid = DataGrid(self.data_frame, self.fields, on_sort=self.sorted_view)
+        self.data_grid.pack(padx=10, pady=10, expand=True, fill=BOTH)
+        self.data_grid.set_data(self.data)
 
         ttk.Button(self.data_frame, text="Back", command=self.back_to_main, bootstyle="primary").pack(pady=5, fill=X)
 
+    def sorted_view(self, field, order):
+        # Le tri tourne hors du thread de Tk ; le tableau est rempli quand il se termine
+        grid = self.data_grid
+        self.run_job("Sorting view", lambda job: self.history.records_for(self.history.sort_rows(field, order)),
+                     on_done=grid.set_data, error_message="Failed to sort data", rows_in=len(self.data))
+
     def back_to_main(self):
         self.stats_frame.pack_forget() if hasattr(self, 'stats_frame') else None
         self.filter_frame.pack_forget() if hasattr(self, 'filter_frame') else None
+        self.cancel_preview() if hasattr(self, 'preview_after') else None
         self.sort_frame.pack_forget() if hasattr(self, 'sort_frame') else None
         self.data_frame.pack_forget() if hasattr(self, 'data_frame') else None
         self.history_frame.pack_forget() if hasattr(self, 'history_frame') else None
         self.main_frame.pack(fill=BOTH, expand=True)
 
-    def add_to_history(self, action, result):
-        timestamp = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        self.history.append(f"{timestamp} - {action}: {result}")
-
     def show_history_screen(self):
         self.main_frame.pack_forget()
         self.history_frame = ttk.Frame(self.root, padding=10)
@@ -312,72 +528,71 @@ class DataApp:
 
         ttk.Label(self.history_frame, text="History", font=("Helvetica", 16)).pack(pady=10)
 
-        for idx, entry in enumerate(self.history):
+        for idx, operation in enumerate(self.history.operations):
             frame = ttk.Frame(self.history_frame)
             frame.pack(fill=X, pady=2)
 
-            ttk.Label(frame, text=entry, font=("Helvetica", 12)).pack(side=LEFT, padx=10, pady=5)
-
-            if "Load Data" not in entry:  # Ne pas ajouter de bouton "Annuler" pour le chargement de fichier
-                action = entry.split(" - ")[1].split(": ")[0]
-                details = entry.split(": ")[1]
-                if action == "Filter Data":
-                    ttk.Button(frame, text="Undo", command=lambda d=details: self.undo_filter(d),
-                               bootstyle="danger").pack(side=RIGHT, padx=10)
-                elif action == "Sort Data":
-                    ttk.Button(frame, text="Undo", command=lambda d=details: self.undo_sort(d),
-                               bootstyle="danger").pack(side=RIGHT, padx=10)
-                elif action == "Reset Data":
-                    ttk.Button(frame, text="Undo", command=self.undo_reset, bootstyle="danger").pack(side=RIGHT,
-                                                                                                     padx=10)
-
+            current = " (current)" if idx == self.history.cursor else ""
+            ttk.Label(frame, text=f"{operation}{current}", font=("Helvetica", 12)).pack(side=LEFT, padx=10, pady=5)
+            if operation.measurement is not None:
+                ttk.Label(frame, text=str(operation.measurement), font=("Helvetica", 10),
+                          bootstyle="secondary").pack(side=LEFT, padx=5)
+
+            # Annuler une opération revient à l'état qui la précède ; le chargement ne s'annule pas
+            if 0 < idx <= self.history.cursor:
+                ttk.Button(frame, text="Undo", command=lambda i=idx: self.undo_to(i),
+                           bootstyle="danger").pack(side=RIGHT, padx=10)
+            elif idx > self.history.cursor:
+                ttk.Button(frame, text="Redo", command=lambda i=idx: self.redo_to(i),
+                           bootstyle="success").pack(side=RIGHT, padx=10)
+
+        # Mode capture : cProfile et tracemalloc pour les opérations suivantes, exportés avec les mesures
+        ttk.Checkbutton(self.history_frame, text="Capture profile (cProfile + tracemalloc)",
+                        variable=self.capture_profile, command=self.toggle_capture,
+                        bootstyle="round-toggle").pack(pady=5)
+        ttk.Button(self.history_frame, text="Export Timings", command=self.export_timings,
+                   bootstyle="secondary").pack(pady=5, fill=X)
         ttk.Button(self.history_frame, text="Back", command=self.back_to_main, bootstyle="primary").pack(pady=5, fill=X)
 
-    def undo_filter(self, action_details):
-        # Restaurer les données originales avant le filtre
-        self.data = self.original_data.copy()
-        for previous_action in self.history:
-            if "Filter Data" in previous_action:
-                self.apply_undo_filter(previous_action.split(": ")[1])
-        messagebox.showinfo("Info", "Filter undone successfully")
-        self.show_data()
+    def toggle_capture(self):
+        if self.capture_profile.get():
+            PROFILER.start_capture()
+        else:
+            PROFILER.stop_capture()
 
-    def apply_undo_filter(self, details):
-        field, condition, value = details.split(" ")
-        if condition in ["less_than", "less_than_equals", "greater_than", "greater_than_equals"]:
-            value = float(value) if '.' in value else int(value)
-        elif condition in ["true", "false"]:
-            value = True if condition == "true" else False
-        self.data = filter_data(self.data, field, condition, value)
-
-    def undo_sort(self, action_details):
-        # Restaurer les données originales avant le tri
-        self.data = self.original_data.copy()
-        for previous_action in self.history:
-            if "Sort Data" in previous_action:
-                self.apply_undo_sort(previous_action.split(": ")[1])
-        messagebox.showinfo("Info", "Sort undone successfully")
-        self.show_data()
+    def export_timings(self):
+        file_path = filedialog.asksaveasfilename(defaultextension=".json", filetypes=[("JSON files", "*.json")])
+        if not file_path:
+            return
+        try:
+            PROFILER.export(file_path)
+        except OSError as error:
+            messagebox.showerror("Error", f"Failed to export timings: {error}")
+            return
+        messagebox.showinfo("Info", "Timings Exported Successfully")
 
-    def apply_undo_sort(self, details):
-        field, order = details.split(" by ")[1].split(" in ")
-        self.data = sort_data(self.data, field, order)
+    def undo_to(self, index):
+        self.go_to_state(index - 1, f"{self.history.operations[index].action} undone successfully")
 
-    def undo_reset(self):
-        # Réinitialiser les données à leur état original
-        self.data = self.original_data.copy()
-        messagebox.showinfo("Info", "Reset undone successfully")
+    def redo_to(self, index):
+        self.go_to_state(index, f"{self.history.operations[index].action} redone successfully")
+
+    def go_to_state(self, index, message):
+        self.data = self.history.goto(index)
+        self.stats_cache.invalidate()
+        messagebox.showinfo("Info", message)
+        self.history_frame.pack_forget()
         self.show_data()
 
     def reset_data(self):
         confirm = messagebox.askyesno("Confirm Reset", "Do you want to reset the data to its original state?")
         if confirm:
-            self.data = self.original_data.copy()
+            self.history.push(Operation("Reset Data", "Data reset to original state"))
+            self.data = self.history.view()
+            self.stats_cache.invalidate()
             messagebox.showinfo("Info", "Data has been reset to its original state.")
-            self.add_to_history("Reset Data", "Data reset to original state")
             self.back_to_main()
 
-
 if __name__ == "__main__":
     root = ttk.Window(themename="darkly")  # You can change the theme to any other supported by ttkbootstrap
     app = DataApp(root)
@@ -0,0 +1,111 @@
+import datetime
+
+import numpy as np
+
+from data_filter import FilterCache
+from data_sort import SortCache, sort_order
+from dataset import Records, as_dataset
+from parallel import parallel_filter_mask, parallel_mask
+
+
+class Operation:
+    def __init__(self, action, details, params=None, measurement=None):
+        self.action = action
+        self.details = details
+        self.params = params or {}
+        # Mesure du traitement qui a produit cet état (voir profiling.Measurement)
+        self.measurement = measurement
+        self.timestamp = datetime.datetime.now()
+
+    def __str__(self):
+        return f"{self.timestamp.strftime('%Y-%m-%d %H:%M:%S')} - {self.action}: {self.details}"
+
+
+class History:
+    # Les données chargées ne sont jamais modifiées : chaque état n'est qu'une liste d'indices de lignes
+    def __init__(self, records, schema=None):
+        # Les dictionnaires chargés ne sont pas conservés : les lignes sont relues dans les colonnes
+        self.dataset = as_dataset(records, schema)
+        self.records = Records(self.dataset)
+        self.sort_cache = SortCache()
+        self.filter_cache = FilterCache(mask=parallel_filter_mask)
+        self.operations = []
+        self.states = []
+        self.cursor = -1
+
+    @property
+    def rows(self):
+        # None : toutes les lignes dans l'ordre du fichier
+        return self.states[self.cursor] if self.cursor >= 0 else None
+
+    @property
+    def current(self):
+        return self.operations[self.cursor] if self.cursor >= 0 else None
+
+    def push(self, operation, rows=None):
+        # Une nouvelle opération efface les états qui pouvaient être rétablis
+        del self.operations[self.cursor + 1:]
+        del self.states[self.cursor + 1:]
+        self.operations.append(operation)
+        self.states.append(_compact(rows, len(self.records)))
+        self.cursor = len(self.operations) - 1
+
+    def filter_rows(self, field, condition, value):
+        # Les aperçus successifs et la confirmation réutilisent les résultats déjà calculés
+        return self.filter_cache.select(self.dataset, field, condition, value, self.rows)
+
+    def expression_rows(self, expression):
+        return self._select(parallel_mask(self.dataset, expression, self._row_ids()))
+
+    def sort_rows(self, field, order=None, nulls='last', limit=None):
+        if limit is not None:
+            # Aperçu : seules les premières lignes sont triées
+            return sort_order(self.dataset, field, order, self._row_ids(), nulls, limit)
+        # Un tri déjà calculé n'est pas refait : le résultat est extrait de la permutation en cache
+        return self.sort_cache.sort_order(self.dataset, field, order, self._row_ids(), nulls)
+
+    def records_for(self, rows):
+        return Records(self.dataset, rows)
+
+    def removed_rows(self, rows):
+        # Lignes de l'état courant que rows ne garde pas
+        current = np.arange(len(self.dataset)) if self.rows is None else self.rows
+        return self.records_for(current[~np.isin(current, rows)])
+
+    def view(self):
+        return self.records_for(self.rows)
+
+    def can_undo(self):
+        return self.cursor > 0
+
+    def can_redo(self):
+        return self.cursor < len(self.operations) - 1
+
+    def undo(self):
+        return self.goto(self.cursor - 1)
+
+    def redo(self):
+        return self.goto(self.cursor + 1)
+
+    def goto(self, index):
+        if not 0 <= index < len(self.operations):
+            raise IndexError("No such history entry")
+        self.cursor = index
+        return self.view()
+
+    def _row_ids(self):
+        rows = self.rows
+        return None if rows is None else rows.astype(np.intp, copy=False)
+
+    def _select(self, mask):
+        rows = self._row_ids()
+        return np.flatnonzero(mask) if rows is None else rows[mask]
+
+
+def _compact(rows, length):
+    if rows is None:
+        return None
+    rows = np.asarray(rows)
+    # Des indices sur 32 bits suffisent et divisent la mémoire par deux
+    dtype = np.int32 if length < 2 ** 31 else np.int64
+    return rows.astype(dtype, copy=False)
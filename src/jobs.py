@@ -0,0 +1,106 @@
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+DEFAULT_POLL_INTERVAL = 50
+
+
+class Cancelled(Exception):
+    pass
+
+
+class Job:
+    def __init__(self, name):
+        self.name = name
+        self.progress = None
+        self.message = ""
+        self.future = None
+        self._cancelled = threading.Event()
+        self._scheduler = None
+        self._on_progress = None
+
+    @property
+    def cancelled(self):
+        return self._cancelled.is_set()
+
+    def cancel(self):
+        self._cancelled.set()
+
+    def check(self):
+        # Point d'annulation à appeler régulièrement par les traitements longs
+        if self._cancelled.is_set():
+            raise Cancelled(self.name)
+
+    def report(self, progress=None, message=""):
+        # progress : fraction entre 0 et 1, ou None si la durée totale est inconnue
+        self.progress = progress
+        self.message = message
+        if self._on_progress is not None:
+            self._scheduler.post(self._on_progress, self)
+
+
+class JobScheduler:
+    # Exécute les traitements dans un pool de threads ; les callbacks reviennent sur le thread de Tk
+    def __init__(self, root, max_workers=None, poll_interval=DEFAULT_POLL_INTERVAL):
+        self.root = root
+        self.poll_interval = poll_interval
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="pydatafilter")
+        self.callbacks = queue.Queue()
+        self.jobs = set()
+        self._polling = False
+
+    def submit(self, name, function, *args, on_done=None, on_error=None, on_cancel=None, on_progress=None):
+        # function reçoit le Job en premier argument pour signaler sa progression et vérifier l'annulation
+        job = Job(name)
+        job._scheduler = self
+        job._on_progress = on_progress
+        self.jobs.add(job)
+        job.future = self.executor.submit(self._run, job, function, args, on_done, on_error, on_cancel)
+        self._schedule_poll()
+        return job
+
+    def post(self, callback, *args):
+        # Appelable depuis n'importe quel thread : Tk ne doit être touché que depuis sa boucle principale
+        self.callbacks.put((callback, args))
+
+    def cancel_all(self):
+        for job in list(self.jobs):
+            job.cancel()
+
+    def shutdown(self):
+        self.cancel_all()
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+    def _run(self, job, function, args, on_done, on_error, on_cancel):
+        try:
+            result = function(job, *args)
+            job.check()
+        except Cancelled:
+            self.post(self._finish, job, on_cancel)
+        except Exception as error:
+            self.post(self._finish, job, on_error, error)
+        else:
+            self.post(self._finish, job, on_done, result)
+
+    def _finish(self, job, callback, *args):
+        self.jobs.discard(job)
+        if callback is not None:
+            callback(*args)
+
+    def _schedule_poll(self):
+        if not self._polling:
+            self._polling = True
+            self.root.after(self.poll_interval, self._poll)
+
+    def _poll(self):
+        while True:
+            try:
+                callback, args = self.callbacks.get_nowait()
+            except queue.Empty:
+                break
+            callback(*args)
+
+        if self.jobs or not self.callbacks.empty():
+            self.root.after(self.poll_interval, self._poll)
+        else:
+            self._polling = False
@@ -0,0 +1,230 @@
+import atexit
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from data_filter import Condition, compile_expression, filter_mask
+from data_stats import accumulate
+from dataset import Dataset, Records, lists_from_ragged
+
+# En dessous de ce nombre de lignes, lancer des processus coûte plus cher que le calcul
+DEFAULT_THRESHOLD = 200000
+
+_pool = None
+_pool_workers = None
+
+
+def parallel_filter(data, field, condition, value, workers=None, threshold=DEFAULT_THRESHOLD):
+    mask = parallel_filter_mask(data, field, condition, value, workers=workers, threshold=threshold)
+    return data.filter(mask)
+
+
+def parallel_filter_mask(dataset, field, condition, value, rows=None, workers=None, threshold=DEFAULT_THRESHOLD):
+    if dataset.find_index(field, condition) is not None:
+        # Un index répond déjà sans parcourir les données
+        return filter_mask(dataset, field, condition, value, rows)
+    return parallel_mask(dataset, Condition(field, condition, value), rows, workers, threshold)
+
+
+def parallel_mask(dataset, expression, rows=None, workers=None, threshold=DEFAULT_THRESHOLD):
+    compiled = compile_expression(expression)
+    workers = workers or os.cpu_count() or 1
+    size = len(dataset) if rows is None else len(rows)
+    if workers < 2 or size < threshold:
+        return compiled.mask(dataset, rows)
+
+    fields = [field for field in _expression_fields(compiled) if field in dataset]
+    shared = _SharedColumns(dataset, fields, rows)
+    output = shared.allocate(size, bool)
+    try:
+        tasks = [(shared.spec(start, stop), start, stop, compiled, output)
+                 for start, stop in _partitions(size, workers)]
+        list(_get_pool(workers).map(_mask_partition, tasks))
+        return shared.result(output)
+    finally:
+        shared.close()
+
+
+def parallel_statistics(data, workers=None, threshold=DEFAULT_THRESHOLD):
+    stats = parallel_accumulate(data, workers=workers, threshold=threshold)
+    return {key: column.summary() for key, column in stats.items()}
+
+
+def parallel_accumulate(data, keys=None, schema=None, workers=None, threshold=DEFAULT_THRESHOLD):
+    # Même résultat qu'accumulate ; un jeu de colonnes assez grand est réparti entre plusieurs processus
+    dataset, rows = (data.dataset, data.rows) if isinstance(data, Records) else (data, None)
+    workers = workers or os.cpu_count() or 1
+    size = len(data)
+    if not isinstance(dataset, Dataset) or workers < 2 or not size or size < threshold:
+        return accumulate(data, keys, schema)
+    keys = dataset.fields if keys is None else keys
+    if any(key not in dataset for key in keys):
+        return accumulate(data, keys, schema)
+
+    shared = _SharedColumns(dataset, keys, rows)
+    try:
+        tasks = [(shared.spec(start, stop), start, stop) for start, stop in _partitions(size, workers)]
+        partials = list(_get_pool(workers).map(_accumulate_partition, tasks))
+    finally:
+        shared.close()
+
+    # Les min, max, sommes et comptes partiels se combinent sans revoir les données
+    merged = partials[0]
+    for partial in partials[1:]:
+        merged = {key: merged[key].merge(partial[key]) for key in merged}
+    return {key: merged[key] for key in keys}
+
+
+class _SharedColumns:
+    # Colonnes copiées une fois en mémoire partagée ; les processus les relisent sans sérialisation.
+    # Le texte est partagé sous forme de codes et de dictionnaire, les listes de nombres sous forme
+    # de valeurs à plat (Dataset.ragged) ; le texte déjà calculé d'une colonne d'objets est partagé aussi
+    def __init__(self, dataset, fields, rows=None):
+        self.blocks = []
+        self.columns = {}
+        for field in fields:
+            kind, valid = dataset.kind(field), dataset.valid[field]
+            values, offsets = dataset.ragged(field, rows) if kind == 'list' else (None, None)
+            if field in dataset.dictionaries:
+                codes = dataset.columns[field]
+                data = ('text', self._share(codes if rows is None else codes[rows]),
+                        self._share(dataset.dictionaries[field]))
+            elif values is not None:
+                data = ('lists', self._share(values), self._share(offsets))
+            else:
+                data = ('column', self._share(dataset.column(field, rows)[0]))
+            text = None if field in dataset.dictionaries else dataset.texts.get((field, 'dictionary', False))
+            if text is not None:
+                uniques, codes = text
+                text = (self._share(uniques), self._share(codes if rows is None else codes[rows]))
+            self.columns[field] = (kind, data, self._share(valid if rows is None else valid[rows]), text)
+
+    def allocate(self, length, dtype):
+        return self._share(np.zeros(length, dtype=dtype))
+
+    def spec(self, start, stop):
+        # Les colonnes d'objets restantes ne peuvent pas être partagées : seule leur tranche est envoyée
+        return {field: (kind, data[:1] + tuple(_slice(entry, start, stop) for entry in data[1:]),
+                        _slice(valid, start, stop), text)
+                for field, (kind, data, valid, text) in self.columns.items()}
+
+    def result(self, entry):
+        block = next(block for block in self.blocks if block.name == entry[1])
+        return np.ndarray((entry[3],), dtype=entry[2], buffer=block.buf).copy()
+
+    def close(self):
+        for block in self.blocks:
+            block.close()
+            block.unlink()
+        self.blocks = []
+
+    def _share(self, array):
+        if array.dtype == object:
+            return ('inline', array)
+        block = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+        np.ndarray(array.shape, dtype=array.dtype, buffer=block.buf)[:] = array
+        self.blocks.append(block)
+        return ('shared', block.name, array.dtype.str, len(array))
+
+
+def _slice(entry, start, stop):
+    if entry[0] == 'inline':
+        return ('inline', entry[1][start:stop])
+    return entry
+
+
+def _attach(entry, start, stop, blocks):
+    if entry[0] == 'inline':
+        return entry[1]
+    _, name, dtype, length = entry
+    block = shared_memory.SharedMemory(name=name)
+    blocks.append(block)
+    return np.ndarray((length,), dtype=dtype, buffer=block.buf)[start:stop]
+
+
+def _partition_dataset(spec, start, stop):
+    blocks, columns, valid, kinds, dictionaries, lists, texts = [], {}, {}, {}, {}, {}, {}
+    for field, (kind, data, valid_entry, text) in spec.items():
+        if data[0] == 'text':
+            columns[field] = _attach(data[1], start, stop, blocks)
+            dictionaries[field] = _attach(data[2], None, None, blocks)
+        elif data[0] == 'lists':
+            offsets = _attach(data[2], start, stop + 1, blocks)
+            values = _attach(data[1], offsets[0], offsets[-1], blocks)
+            lists[field] = (values, offsets - offsets[0])
+            columns[field] = lists_from_ragged(*lists[field])
+        else:
+            columns[field] = _attach(data[1], start, stop, blocks)
+        valid[field] = _attach(valid_entry, start, stop, blocks)
+        kinds[field] = kind
+        if text is not None:
+            texts[(field, 'dictionary', False)] = (_attach(text[0], None, None, blocks),
+                                                   _attach(text[1], start, stop, blocks))
+    partition = Dataset(columns, valid, kinds, dictionaries)
+    partition.lists.update(lists)
+    partition.texts.update(texts)
+    return partition, blocks
+
+
+def _mask_partition(task):
+    spec, start, stop, compiled, output = task
+    partition, blocks = _partition_dataset(spec, start, stop)
+    result = _attach(output, start, stop, blocks)
+    try:
+        result[:] = compiled.mask(partition)
+    finally:
+        del partition, result
+        for block in blocks:
+            block.close()
+
+
+def _accumulate_partition(task):
+    spec, start, stop = task
+    partition, blocks = _partition_dataset(spec, start, stop)
+    try:
+        return accumulate(partition)
+    finally:
+        del partition
+        for block in blocks:
+            block.close()
+
+
+def _partitions(size, workers):
+    bounds = np.linspace(0, size, workers + 1, dtype=np.int64)
+    return [(int(start), int(stop)) for start, stop in zip(bounds[:-1], bounds[1:]) if stop > start]
+
+
+def _expression_fields(compiled):
+    if compiled.kind == 'condition':
+        condition = compiled.operands
+        fields = [condition.field]
+        if condition.condition.endswith("_field"):
+            fields.append(condition.value)
+        return fields
+    return [field for operand in compiled.operands for field in _expression_fields(operand)]
+
+
+def _get_pool(workers):
+    global _pool, _pool_workers
+    if _pool is None or _pool_workers != workers:
+        if _pool is not None:
+            _pool.shutdown()
+        _pool = ProcessPoolExecutor(max_workers=workers, mp_context=_context())
+        _pool_workers = workers
+    return _pool
+
+
+def _context():
+    # Pas de fork : le processus appelant a des threads (JobScheduler) et une boucle Tk qu'un enfant
+    # copié en plein travail hériterait dans un état incohérent (verrous tenus, connexion X11)
+    methods = multiprocessing.get_all_start_methods()
+    return multiprocessing.get_context('forkserver' if 'forkserver' in methods else 'spawn')
+
+
+@atexit.register
+def _shutdown_pool():
+    if _pool is not None:
+        _pool.shutdown(cancel_futures=True)
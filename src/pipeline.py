@@ -0,0 +1,59 @@
+from data_filter import And, Condition, compile_expression, filter_expression
+from data_loader import DEFAULT_CHUNK_SIZE, iter_file
+from data_saver import save_chunks
+from data_sort import DEFAULT_RUN_SIZE, external_sort, top_k
+
+
+class Pipeline:
+    def __init__(self, source, chunk_size=DEFAULT_CHUNK_SIZE):
+        # source : chemin d'un fichier ou itérable de paquets d'enregistrements
+        self.source = source
+        self.chunk_size = chunk_size
+        self.stages = []
+
+    def filter(self, field, condition, value):
+        return self.where(Condition(field, condition, value))
+
+    def where(self, expression):
+        # Les filtres consécutifs sont fusionnés en une seule passe
+        if self.stages and isinstance(self.stages[-1], And):
+            self.stages[-1].operands.append(expression)
+        else:
+            self.stages.append(And(expression))
+        return self
+
+    def sort(self, field, order=None, max_rows=DEFAULT_RUN_SIZE, tmp_dir=None, limit=None, nulls='last'):
+        if limit is not None:
+            # Seules les limit premières lignes sont gardées : pas de fichiers temporaires
+            self.stages.append(lambda chunks: top_k(chunks, field, order, limit, self.chunk_size, nulls))
+        else:
+            self.stages.append(lambda chunks: external_sort(chunks, field, order, max_rows=max_rows,
+                                                            chunk_size=self.chunk_size, tmp_dir=tmp_dir,
+                                                            nulls=nulls))
+        return self
+
+    def chunks(self):
+        if isinstance(self.source, str):
+            chunks = iter_file(self.source, self.chunk_size)
+        else:
+            chunks = iter(self.source)
+        for stage in self.stages:
+            if isinstance(stage, And):
+                chunks = _filter_chunks(chunks, compile_expression(stage))
+            else:
+                chunks = stage(chunks)
+        return chunks
+
+    def __iter__(self):
+        for chunk in self.chunks():
+            yield from chunk
+
+    def save(self, file_path):
+        save_chunks(self.chunks(), file_path)
+
+
+def _filter_chunks(chunks, expression):
+    for chunk in chunks:
+        filtered = filter_expression(chunk, expression)
+        if filtered:
+            yield filtered
@@ -0,0 +1,164 @@
+import collections
+import contextlib
+import datetime
+import functools
+import io
+import json
+import threading
+import time
+import tracemalloc
+
+MAX_MEASUREMENTS = 10000
+REPORT_LIMIT = 40
+
+
+class Measurement:
+    def __init__(self, name, rows_in=None, depth=0):
+        self.name = name
+        self.rows_in = rows_in
+        self.rows_out = None
+        self.seconds = None
+        # Octets alloués au plus fort de l'opération ; seulement en mode capture (tracemalloc)
+        self.peak_bytes = None
+        self.depth = depth
+        self.thread = threading.current_thread().name
+        self.timestamp = datetime.datetime.now()
+
+    def to_dict(self):
+        return {
+            'name': self.name,
+            'timestamp': self.timestamp.isoformat(),
+            'seconds': self.seconds,
+            'rows_in': self.rows_in,
+            'rows_out': self.rows_out,
+            'peak_bytes': self.peak_bytes,
+            'depth': self.depth,
+            'thread': self.thread,
+        }
+
+    def __str__(self):
+        parts = [f"{self.seconds * 1000:.1f} ms" if self.seconds is not None else "running"]
+        if self.rows_in is not None or self.rows_out is not None:
+            rows_in = "?" if self.rows_in is None else self.rows_in
+            rows_out = "?" if self.rows_out is None else self.rows_out
+            parts.append(f"{rows_in} → {rows_out} rows")
+        if self.peak_bytes is not None:
+            parts.append(f"{self.peak_bytes / 1e6:.1f} MB peak")
+        return ", ".join(parts)
+
+
+class Profiler:
+    # Mesure chaque opération ; le mode capture ajoute cProfile et tracemalloc, activables à chaud
+    def __init__(self, max_measurements=MAX_MEASUREMENTS):
+        self.measurements = collections.deque(maxlen=max_measurements)
+        self.capturing = False
+        self.stats = None
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._started_tracemalloc = False
+
+    @contextlib.contextmanager
+    def measure(self, name, rows_in=None):
+        depth = getattr(self._local, 'depth', 0)
+        measurement = Measurement(name, rows_in, depth)
+        # Seule l'opération la plus externe d'un thread est profilée : cProfile ne s'imbrique pas
+        capture = self.capturing and depth == 0
+        profile = self._start_profile() if capture else None
+        memory_start = None
+        if capture and tracemalloc.is_tracing():
+            # Le pic est remis à zéro : approximatif si plusieurs threads allouent en même temps
+            memory_start = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+
+        self._local.depth = depth + 1
+        start = time.perf_counter()
+        try:
+            yield measurement
+        finally:
+            measurement.seconds = time.perf_counter() - start
+            self._local.depth = depth
+            if memory_start is not None and tracemalloc.is_tracing():
+                measurement.peak_bytes = max(0, tracemalloc.get_traced_memory()[1] - memory_start)
+            if profile is not None:
+                profile.disable()
+                self._add_profile(profile)
+            with self._lock:
+                self.measurements.append(measurement)
+
+    def start_capture(self):
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracemalloc = True
+        self.capturing = True
+
+    def stop_capture(self):
+        self.capturing = False
+        if self._started_tracemalloc:
+            tracemalloc.stop()
+            self._started_tracemalloc = False
+
+    def clear(self):
+        with self._lock:
+            self.measurements.clear()
+            self.stats = None
+
+    def report(self, limit=REPORT_LIMIT):
+        # Fonctions les plus coûteuses (temps cumulé) sur toutes les opérations capturées
+        with self._lock:
+            if self.stats is None:
+                return ""
+            output = io.StringIO()
+            self.stats.stream = output
+            self.stats.sort_stats('cumulative').print_stats(limit)
+            return output.getvalue()
+
+    def to_dict(self):
+        with self._lock:
+            measurements = [measurement.to_dict() for measurement in self.measurements]
+        return {'measurements': measurements, 'profile': self.report()}
+
+    def export(self, file_path):
+        with open(file_path, 'w') as file:
+            json.dump(self.to_dict(), file, indent=4)
+
+    def _start_profile(self):
+        import cProfile
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError:
+            # Un autre profileur est déjà actif sur ce thread
+            return None
+        return profile
+
+    def _add_profile(self, profile):
+        import pstats
+        with self._lock:
+            if self.stats is None:
+                self.stats = pstats.Stats(profile)
+            else:
+                self.stats.add(profile)
+
+
+def count_rows(value):
+    if isinstance(value, (str, bytes, dict)) or not hasattr(value, '__len__'):
+        return None
+    return len(value)
+
+
+# Profileur partagé par les modules de données et l'interface
+PROFILER = Profiler()
+
+
+def profiled(name, rows_out=count_rows):
+    # rows_out : compte les lignes du résultat, ou None si ce n'est pas une liste de lignes (statistiques...)
+    def decorator(function):
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            with PROFILER.measure(name, count_rows(args[0]) if args else None) as measurement:
+                result = function(*args, **kwargs)
+                if rows_out is not None:
+                    measurement.rows_out = rows_out(result)
+                return result
+        return wrapper
+    return decorator
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# Les modules de src s'importent entre eux par leur nom (comme gui.py)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
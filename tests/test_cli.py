@@ -0,0 +1,62 @@
+import contextlib
+import io
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+from cli import main, parse_value
+from data_loader import load_json
+
+
+class TestCli(unittest.TestCase):
+    def run_cli(self, argv, stdin=""):
+        output = io.StringIO()
+        with mock.patch.object(sys, 'stdin', io.StringIO(stdin)), contextlib.redirect_stdout(output):
+            self.assertEqual(main(argv), 0)
+        return output.getvalue()
+
+    def test_stdin_to_stdout(self):
+        lines = "".join(json.dumps({'id': i, 'score': i % 4}) + "\n" for i in range(10))
+        output = self.run_cli(['run', '-w', 'score', 'greater_than', '1', '-s', 'id', 'descending'], lines)
+        self.assertEqual([json.loads(line)['id'] for line in output.splitlines()], [7, 6, 3, 2])
+
+    def test_files_to_file(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'out.json')
+            main(['run', 'data/sample_data.csv', '-w', 'apprentice', 'true', '-s', 'age', 'descending', '-o', path])
+            records = load_json(path)
+        self.assertEqual([item['firstname'] for item in records], ['John', 'Bob'])
+        self.assertTrue(all(item['apprentice'] is True for item in records))
+
+    def test_invalid_filter(self):
+        with contextlib.redirect_stderr(io.StringIO()), self.assertRaises(SystemExit):
+            main(['run', 'data/sample_data.csv', '-w', 'age', 'unknown', '1'])
+
+    def test_parse_value(self):
+        self.assertEqual(parse_value('greater_than', '2.5'), 2.5)
+        self.assertEqual(parse_value('less_than', '1e1'), 10.0)
+        self.assertEqual(parse_value('equals', '30'), '30')
+        self.assertEqual(parse_value('in_set', '007,abc'), '007,abc')
+        self.assertIs(parse_value('false', ''), False)
+
+    def test_values_follow_the_column_type(self):
+        lines = "".join(json.dumps(item) + "\n" for item in
+                        [{'code': '007', 'n': 7}, {'code': 'abc', 'n': 30}, {'code': '7', 'n': 8}])
+        output = self.run_cli(['run', '-w', 'code', 'equals', '007', '-w', 'n', 'equals', '7'], lines)
+        self.assertEqual([json.loads(line)['code'] for line in output.splitlines()], ['007'])
+        output = self.run_cli(['run', '-w', 'code', 'in_set', '007,abc'], lines)
+        self.assertEqual([json.loads(line)['n'] for line in output.splitlines()], [7, 30])
+
+    def test_no_gui_import(self):
+        src = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src')
+        code = f"import sys; sys.path.insert(0, {src!r}); import cli; print('tkinter' in sys.modules)"
+        result = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True)
+        self.assertEqual(result.stdout.strip(), 'False')
+
+
+if __name__ == '__main__':
+    unittest.main()
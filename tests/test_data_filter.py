@@ -0,0 +1,163 @@
+import unittest
+
+import numpy as np
+
+from data_filter import (And, Condition, FilterCache, Not, Or, compile_expression, filter_data, filter_expression,
+                         filter_mask)
+from dataset import Dataset
+
+
+class TestDataFilter(unittest.TestCase):
+    def setUp(self):
+        self.data = [
+            {'firstname': 'John', 'lastname': 'Doe', 'age': 20, 'apprentice': True, 'grades': [85, 90, 92]},
+            {'firstname': 'Jane', 'lastname': 'Smith', 'age': 22, 'apprentice': False, 'grades': [78, 80]},
+            {'firstname': 'Bob', 'lastname': 'Brown', 'age': 19, 'apprentice': True, 'grades': [70, 75, 80]},
+        ]
+
+    def test_list_adapter_keeps_records(self):
+        result = filter_data(self.data, 'age', 'greater_than', 19)
+        self.assertEqual(result, self.data[:2])
+        self.assertIs(result[0], self.data[0])
+
+    def test_string_conditions(self):
+        self.assertEqual(filter_data(self.data, 'firstname', 'contains', 'o'), [self.data[0], self.data[2]])
+        self.assertEqual(filter_data(self.data, 'lastname', 'starts_with', 'sm'), [self.data[1]])
+        self.assertEqual(filter_data(self.data, 'firstname', 'lexicographically_less_than', 'C'), [self.data[2]])
+        self.assertEqual(filter_data(self.data, 'firstname', 'lexicographically_greater_than_field', 'lastname'),
+                         [self.data[0]])
+
+    def test_string_kernels(self):
+        self.assertEqual(filter_data(self.data, 'lastname', 'starts_with', 'SM'), [self.data[1]])
+        self.assertEqual(filter_data(self.data, 'lastname', 'ends_with', 'WN'), [self.data[2]])
+        self.assertEqual(filter_data(self.data, 'firstname', 'regex', r'^J\w+e$'), [self.data[1]])
+        self.assertEqual(filter_data(self.data, 'firstname', 'in_set', 'Bob, Jane'), [self.data[1], self.data[2]])
+        self.assertEqual(filter_data(self.data, 'age', 'in_set', [19, 20]), [self.data[0], self.data[2]])
+        self.assertEqual(filter_data(self.data, 'grades', 'in_set', [[78, 80]]), [self.data[1]])
+        self.assertEqual(filter_data(self.data, 'age', 'in_set', '19, 20'), [self.data[0], self.data[2]])
+        with self.assertRaises(ValueError):
+            filter_data(self.data, 'age', 'in_set', '19, abc')
+
+    def test_text_cache_invalidated(self):
+        dataset = Dataset.from_records(self.data)
+        self.assertEqual(filter_mask(dataset, 'firstname', 'regex', 'o').tolist(), [True, False, True])
+        self.assertIs(dataset.dictionary('firstname', lower=True), dataset.dictionary('firstname', lower=True))
+        dataset.set_column('firstname', np.array(['Ann', 'Tom', 'Eve']))
+        self.assertEqual(filter_mask(dataset, 'firstname', 'regex', 'o').tolist(), [False, True, False])
+        self.assertEqual(filter_mask(dataset, 'firstname', 'starts_with', 'e').tolist(), [False, False, True])
+
+    def test_bool_and_list_conditions(self):
+        self.assertEqual(filter_data(self.data, 'apprentice', 'false', False), [self.data[1]])
+        self.assertEqual(filter_data(self.data, 'grades', 'exact_length', '2'), [self.data[1]])
+        self.assertEqual(filter_data(self.data, 'grades', 'average_greater', '80'), [self.data[0]])
+
+    def test_contains_in_list(self):
+        self.assertEqual(filter_data(self.data, 'grades', 'contains', 80), self.data[1:])
+        self.assertEqual(filter_data(self.data, 'grades', 'not_contains', 80), [self.data[0]])
+
+    def test_list_kernels(self):
+        data = self.data + [{'firstname': 'Eve', 'grades': []}, {'firstname': 'Max', 'grades': [1.5, 2.5]}]
+        dataset = Dataset.from_records(data)
+        self.assertEqual(filter_data(data, 'grades', 'average_less', 10), [data[4]])
+        self.assertEqual(filter_data(data, 'grades', 'max_length', 0), [data[3]])
+        rows = np.array([4, 0, 3, 1])
+        self.assertEqual(filter_mask(dataset, 'grades', 'average_greater', 78, rows).tolist(),
+                         [False, True, False, True])
+        self.assertEqual(filter_mask(dataset, 'grades', 'min_length', 2, rows).tolist(), [True, True, False, True])
+
+    def test_missing_field(self):
+        data = self.data + [{'firstname': 'Alice'}]
+        self.assertEqual(filter_data(data, 'age', 'less_than', 21), [self.data[0], self.data[2]])
+        self.assertEqual(filter_data(data, 'age', 'not_equals', 20), data[1:])
+
+    def test_dataset(self):
+        dataset = Dataset.from_records(self.data)
+        result = filter_data(dataset, 'age', 'equals', 22)
+        self.assertIsInstance(result, Dataset)
+        self.assertEqual(result.to_records(), [self.data[1]])
+
+
+class TestFilterExpression(unittest.TestCase):
+    def setUp(self):
+        self.data = [
+            {'firstname': 'John', 'age': 20, 'apprentice': True, 'grades': [85, 90, 92]},
+            {'firstname': 'Jane', 'age': 22, 'apprentice': False, 'grades': [78, 80]},
+            {'firstname': 'Bob', 'age': 19, 'apprentice': True, 'grades': [70, 75, 80]},
+            {'firstname': 'Alice', 'age': 21, 'apprentice': False, 'grades': []},
+        ]
+
+    def test_matches_chained_filters(self):
+        expression = And(Condition('age', 'greater_than', 19), Condition('firstname', 'contains', 'J'))
+        chained = filter_data(filter_data(self.data, 'age', 'greater_than', 19), 'firstname', 'contains', 'J')
+        self.assertEqual(filter_expression(self.data, expression), chained)
+
+    def test_or_and_not(self):
+        expression = Or(Condition('age', 'equals', 19), Not(Condition('apprentice', 'false')))
+        self.assertEqual(filter_expression(self.data, expression), [self.data[0], self.data[2]])
+        expression = Condition('apprentice', 'true') | (Condition('age', 'less_than', 22) & ~Condition('grades', 'min_length', 1))
+        self.assertEqual(filter_expression(self.data, expression), [self.data[0], self.data[2], self.data[3]])
+
+    def test_cheap_selective_conditions_first(self):
+        compiled = compile_expression(And(Condition('grades', 'average_greater', 80),
+                                          Condition('firstname', 'contains', 'o'),
+                                          Condition('age', 'equals', 20)))
+        self.assertEqual([op.operands.condition for op in compiled.operands],
+                         ['equals', 'contains', 'average_greater'])
+
+    def test_short_circuit_skips_rejected_rows(self):
+        # "less_than" lèverait une TypeError sur 'unknown' si la ligne n'était pas déjà exclue
+        data = [{'kind': 'num', 'age': 20}, {'kind': 'text', 'age': 'unknown'}, {'kind': 'num', 'age': 40}]
+        expression = And(Condition('age', 'less_than', 30), Condition('kind', 'equals', 'num'))
+        self.assertEqual(filter_expression(data, expression), [data[0]])
+
+    def test_dataset(self):
+        result = filter_expression(Dataset.from_records(self.data), Condition('age', 'greater_than_equals', 21))
+        self.assertEqual(result.to_records(), [self.data[1], self.data[3]])
+
+
+class TestFilterCache(unittest.TestCase):
+    def setUp(self):
+        self.dataset = Dataset.from_records([{'name': name, 'age': age} for name, age in
+                                             [('abc', 30), ('abd', 20), ('xabc', 40), ('b', 10), ('abcd', 25)]])
+        self.evaluated = []
+
+        def mask(dataset, field, condition, value, rows=None):
+            self.evaluated.append(None if rows is None else rows.tolist())
+            return filter_mask(dataset, field, condition, value, rows)
+        self.cache = FilterCache(max_size=4, mask=mask)
+
+    def test_reuses_cached_result(self):
+        first = self.cache.select(self.dataset, 'age', 'less_than', 30)
+        self.assertIs(self.cache.select(self.dataset, 'age', 'less_than', 30), first)
+        self.assertEqual(len(self.evaluated), 1)
+
+    def test_refinement_scans_previous_result(self):
+        self.assertEqual(self.cache.select(self.dataset, 'name', 'contains', 'ab').tolist(), [0, 1, 2, 4])
+        self.assertEqual(self.cache.select(self.dataset, 'name', 'contains', 'abc').tolist(), [0, 2, 4])
+        self.assertEqual(self.cache.select(self.dataset, 'age', 'less_than', 26).tolist(), [1, 3, 4])
+        self.assertEqual(self.cache.select(self.dataset, 'age', 'less_than', 20).tolist(), [3])
+        # Une condition élargie repart de toutes les lignes
+        self.assertEqual(self.cache.select(self.dataset, 'name', 'contains', 'a').tolist(), [0, 1, 2, 4])
+        self.assertEqual(self.evaluated, [None, [0, 1, 2, 4], None, [1, 3, 4], None])
+
+    def test_list_contains_is_not_narrowed(self):
+        dataset = Dataset.from_records([{'tags': ['ab']}, {'tags': ['abc']}, {'tags': ['ab', 'abc']}])
+        self.assertEqual(self.cache.select(dataset, 'tags', 'contains', 'ab').tolist(), [0, 2])
+        self.assertEqual(self.cache.select(dataset, 'tags', 'contains', 'abc').tolist(), [1, 2])
+
+    def test_starting_rows_and_version(self):
+        rows = np.array([4, 3, 0], dtype=np.int32)
+        self.assertEqual(self.cache.select(self.dataset, 'name', 'starts_with', 'A', rows).tolist(), [4, 0])
+        self.dataset.set_column('name', np.array(['b', 'b', 'b', 'b', 'ab']))
+        self.assertEqual(self.cache.select(self.dataset, 'name', 'starts_with', 'A', rows).tolist(), [4])
+        self.assertEqual(len(self.evaluated), 2)
+
+    def test_stale_result_is_not_narrowed(self):
+        self.assertEqual(self.cache.select(self.dataset, 'name', 'starts_with', 'a').tolist(), [0, 1, 4])
+        self.dataset.set_column('name', np.array(['b', 'abe', 'abf', 'b', 'b']))
+        self.assertEqual(self.cache.select(self.dataset, 'name', 'starts_with', 'ab').tolist(), [1, 2])
+        self.assertEqual(self.evaluated, [None, None])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,26 @@
+import unittest
+
+from data_grid import clamp_offset, format_cell, format_row, scroll_fractions
+
+
+class TestDataGrid(unittest.TestCase):
+    def test_clamp_offset(self):
+        self.assertEqual(clamp_offset(-5, 100, 25), 0)
+        self.assertEqual(clamp_offset(90, 100, 25), 75)
+        self.assertEqual(clamp_offset(10, 5, 25), 0)
+
+    def test_scroll_fractions(self):
+        self.assertEqual(scroll_fractions(0, 0, 25), (0.0, 1.0))
+        self.assertEqual(scroll_fractions(50, 100, 25), (0.5, 0.75))
+        self.assertEqual(scroll_fractions(0, 10, 25), (0.0, 1.0))
+
+    def test_format_row(self):
+        item = {'name': 'John', 'grades': [85, 90], 'note': 'x' * 200}
+        name, grades, missing, note = format_row(item, ['name', 'grades', 'age', 'note'])
+        self.assertEqual((name, grades, missing), ('John', '85, 90', ''))
+        self.assertEqual(len(note), 80)
+        self.assertEqual(format_cell(True), 'True')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,56 @@
+import unittest
+
+import numpy as np
+
+from data_filter import filter_mask
+from data_loader import load_dataset
+from dataset import Dataset
+
+
+class TestDataIndex(unittest.TestCase):
+    def setUp(self):
+        self.records = [
+            {'name': 'Smith', 'age': 20, 'score': 1.5},
+            {'name': 'smart', 'age': 22, 'score': float('nan')},
+            {'name': 'Brown', 'age': 19},
+            {'name': 'snow', 'age': 22, 'score': 3.0},
+            {'age': 30, 'score': 0.5},
+        ]
+        self.queries = [
+            ('name', 'equals', 'Brown'), ('name', 'not_equals', 'Brown'), ('name', 'starts_with', 'sm'), ('name', 'starts_with', 'SM'),
+            ('name', 'starts_with', ''), ('name', 'lexicographically_less_than', 'Sn'),
+            ('name', 'lexicographically_greater_than', 'smart'),
+            ('age', 'equals', 22), ('age', 'equals', '22'), ('age', 'not_equals', 22),
+            ('age', 'less_than', 22), ('age', 'less_than_equals', 22),
+            ('age', 'greater_than', 20), ('age', 'greater_than_equals', 20),
+            ('score', 'less_than', 2), ('score', 'greater_than', 1),
+        ]
+
+    def test_indexed_results_match_scan(self):
+        scanned = Dataset.from_records(self.records)
+        indexed = Dataset.from_records(self.records)
+        for field in ('name', 'age', 'score'):
+            indexed.create_index(field)
+        for field, condition, value in self.queries:
+            self.assertIsNotNone(indexed.find_index(field, condition))
+            np.testing.assert_array_equal(filter_mask(indexed, field, condition, value),
+                                          filter_mask(scanned, field, condition, value),
+                                          err_msg=f"{field} {condition} {value}")
+
+    def test_index_invalidated_on_change(self):
+        dataset = Dataset.from_records(self.records)
+        dataset.create_index('age')
+        version = dataset.version
+        dataset.set_column('age', np.array([1, 2, 3, 4, 5]))
+        self.assertIsNone(dataset.find_index('age', 'equals'))
+        self.assertGreater(dataset.version, version)
+        self.assertEqual(filter_mask(dataset, 'age', 'equals', 3).tolist(), [False, False, True, False, False])
+
+    def test_load_dataset_with_indexes(self):
+        dataset = load_dataset('data/sample_data.json', index_fields=['lastname'])
+        self.assertIsNotNone(dataset.find_index('lastname', 'starts_with'))
+        self.assertIsNone(dataset.find_index('age', 'equals'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,175 @@
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import unittest
+
+import data_loader
+from data_loader import load_csv, load_json, load_yaml, load_xml, iter_csv, iter_json, iter_yaml, iter_xml, iter_file, \
+    load_cached, apply_schema, infer_schema, load_dataset, load_many, expand_paths, load_binary
+from data_saver import save_binary
+
+def load_binary_round_trip(path, tmp):
+    binary_path = os.path.join(tmp, 'data.npd')
+    save_binary(load_dataset(path), binary_path)
+    return load_binary(binary_path)
+
+
+class TestDataLoader(unittest.TestCase):
+    def test_load_csv(self):
+        data = load_csv('data/sample_data.csv')
+        self.assertIsInstance(data, list)
+
+    def test_load_json(self):
+        data = load_json('data/sample_data.json')
+        self.assertIsInstance(data, list)
+
+    def test_load_yaml(self):
+        data = load_yaml('data/sample_data.yaml')
+        self.assertIsInstance(data, list)
+
+    def test_load_xml(self):
+        data = load_xml('data/sample_data.xml')
+        self.assertIsInstance(data, list)
+
+    def test_chunked_readers_match_full_load(self):
+        cases = [
+            (iter_csv, load_csv, 'data/sample_data.csv'),
+            (iter_json, load_json, 'data/sample_data.json'),
+            (iter_yaml, load_yaml, 'data/sample_data.yaml'),
+        ]
+        for iterator, loader, path in cases:
+            chunks = list(iterator(path, chunk_size=2))
+            self.assertTrue(all(len(chunk) <= 2 for chunk in chunks))
+            self.assertEqual([item for chunk in chunks for item in chunk], loader(path))
+
+        chunks = list(iter_xml('data/sample_data.xml', chunk_size=2))
+        self.assertEqual(chunks[0][0]['grades'], [85, 90, 92])
+
+    def test_iter_json_across_read_blocks(self):
+        records = [{'id': i, 'name': f'row {i}', 'values': [i, i * 2.5]} for i in range(500)]
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'data.json')
+            with open(path, 'w') as file:
+                json.dump(records, file, indent=4)
+            old_size = data_loader.READ_BLOCK_SIZE
+            data_loader.READ_BLOCK_SIZE = 7
+            try:
+                chunks = list(iter_file(path, chunk_size=64))
+            finally:
+                data_loader.READ_BLOCK_SIZE = old_size
+        self.assertEqual([item for chunk in chunks for item in chunk], records)
+
+    def test_iter_file_rejects_unknown_format(self):
+        with self.assertRaises(ValueError):
+            iter_file('data/sample_data.txt')
+
+    def test_schema_inference_and_coercion(self):
+        data = load_csv('data/sample_data.csv')
+        self.assertEqual(infer_schema(data), {'firstname': 'str', 'lastname': 'str', 'age': 'int',
+                                              'apprentice': 'bool', 'grades': 'list'})
+        self.assertEqual(apply_schema(data)['apprentice'], 'bool')
+        self.assertIs(data[0]['apprentice'], True)
+        self.assertEqual(data[0]['grades'], [85, 90, 92])
+
+    def test_nulls_do_not_change_the_schema(self):
+        data = [{'age': 20}, {'age': None}, {'age': 40}]
+        self.assertEqual(infer_schema(data), {'age': 'int'})
+        self.assertEqual(apply_schema(data), {'age': 'int'})
+
+    def test_schema_verified_beyond_sample(self):
+        data = [{'flag': 'true'} for _ in range(100)]
+        data[55] = {'flag': 'maybe', 'extra': 1}
+        self.assertEqual(infer_schema(data, sample_size=10), {'flag': 'bool'})
+        self.assertEqual(apply_schema(data, infer_schema(data, sample_size=10)), {'flag': 'object', 'extra': 'int'})
+
+    def test_load_dataset_uses_schema(self):
+        dataset = load_dataset('data/sample_data.csv')
+        self.assertEqual(dataset.schema, {'firstname': 'str', 'lastname': 'str', 'age': 'int',
+                                          'apprentice': 'bool', 'grades': 'list'})
+
+    def test_xml_lists_parsed_per_chunk(self):
+        xml = ("<root><item><grades>1, 2,3</grades><city>Paris, France</city></item>"
+               "<item><grades></grades><city>Lyon</city></item>"
+               "<item><grades>7</grades><scores>1.5,2</scores></item></root>")
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'data.xml')
+            with open(path, 'w') as file:
+                file.write(xml)
+            self.assertEqual(load_xml(path), [
+                {'grades': [1, 2, 3], 'city': 'Paris, France'},
+                {'grades': [], 'city': 'Lyon'},
+                {'grades': [7], 'scores': [1.5, 2.0]},
+            ])
+            dataset = load_binary_round_trip(path, tmp)
+            self.assertIsNotNone(dataset.lists.get('grades'))
+            self.assertEqual(dataset.row(0)['grades'], [1, 2, 3])
+
+    def test_xml_lists_decided_on_the_whole_file(self):
+        xml = ("<root><item><grades>7</grades></item><item><grades></grades></item>"
+               "<item><grades>1,2</grades></item><item><grades>4</grades></item></root>")
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'data.xml')
+            with open(path, 'w') as file:
+                file.write(xml)
+            dataset = load_dataset(path, chunk_size=2)
+            self.assertEqual(dataset.kind('grades'), 'list')
+            self.assertEqual([row['grades'] for row in dataset], [[7], [], [1, 2], [4]])
+
+    def test_load_cached(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'data.json')
+            cache_dir = os.path.join(tmp, 'cache')
+            shutil.copy('data/sample_data.json', path)
+            self.assertEqual(load_cached(path, cache_dir).to_records(), load_json(path))
+            self.assertEqual(len(os.listdir(cache_dir)), 1)
+
+            with open(path, 'w') as file:
+                json.dump([{'firstname': 'Zoe'}], file)
+            self.assertEqual(load_cached(path, cache_dir).to_records(), [{'firstname': 'Zoe'}])
+            # L'ancienne entrée du même fichier source est remplacée
+            self.assertEqual(len(os.listdir(cache_dir)), 1)
+
+    def test_load_many_unions_shards(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            os.makedirs(os.path.join(tmp, 'day2'))
+            with open(os.path.join(tmp, 'day1.json'), 'w') as file:
+                json.dump([{'id': 1, 'score': 3}, {'id': 2, 'score': 4}], file)
+            with open(os.path.join(tmp, 'day2', 'part.csv'), 'w') as file:
+                file.write('id,score,flag\n3,4.5,true\n')
+            with open(os.path.join(tmp, 'notes.txt'), 'w') as file:
+                file.write('ignored')
+
+            self.assertEqual(expand_paths(tmp), [os.path.join(tmp, 'day1.json')])
+            records, schema = load_many(os.path.join(tmp, '**', '*.*'), max_workers=2)
+            self.assertEqual(schema, {'id': 'int', 'score': 'float', 'source_file': 'str', 'flag': 'bool'})
+            self.assertEqual([item['source_file'] for item in records],
+                             ['day1.json', 'day1.json', os.path.join('day2', 'part.csv')])
+            self.assertIs(records[2]['flag'], True)
+
+            dataset = load_dataset(os.path.join(tmp, '**', '*.*'))
+            self.assertEqual(dataset.column('score')[0].tolist(), [3.0, 4.0, 4.5])
+            with self.assertRaises(FileNotFoundError):
+                load_many(os.path.join(tmp, '*.yaml'))
+
+    def test_null_shard_keeps_the_merged_kind(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            with open(os.path.join(tmp, 'a.json'), 'w') as file:
+                json.dump([{'a': 1, 'b': None}, {'a': 2}], file)
+            with open(os.path.join(tmp, 'b.json'), 'w') as file:
+                json.dump([{'a': None, 'b': None}], file)
+            _, schema = load_many(os.path.join(tmp, '*.json'), source_field=None)
+            self.assertEqual(schema, {'a': 'int', 'b': 'object'})
+
+    def test_format_backends_imported_on_first_use(self):
+        src = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src')
+        code = (f"import sys; sys.path.insert(0, {src!r}); import data_filter, data_loader, data_saver, cli; "
+                "print(sorted(name for name in ('pandas', 'yaml') if name in sys.modules)); "
+                "data_loader.load_yaml('data/sample_data.yaml'); print('yaml' in sys.modules)")
+        result = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True)
+        self.assertEqual(result.stdout.split(), ['[]', 'True'])
+
+if __name__ == '__main__':
+    unittest.main()
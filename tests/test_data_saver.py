@@ -0,0 +1,102 @@
+import json
+import os
+import tempfile
+import unittest
+
+import yaml
+
+from data_loader import iter_file, load_binary, load_csv, load_xml
+from data_saver import save_binary, save_csv, save_file, save_json, save_chunks
+from dataset import Dataset
+
+
+class TestDataSaver(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.data = [
+            {'firstname': 'John', 'age': 20, 'apprentice': True, 'grades': [85, 90, 92]},
+            {'firstname': 'Jane', 'age': 22, 'apprentice': False, 'grades': [78, 80, 82]},
+            {'firstname': 'Bob', 'age': 19, 'apprentice': True, 'grades': [70, 75, 80]},
+        ]
+        self.chunks = [self.data[:2], [], self.data[2:]]
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def path(self, name):
+        return os.path.join(self.tmp.name, name)
+
+    def test_json_chunks_match_save_json(self):
+        save_json(self.data, self.path('full.json'))
+        save_chunks(self.chunks, self.path('chunks.json'))
+        with open(self.path('full.json')) as full, open(self.path('chunks.json')) as chunks:
+            self.assertEqual(chunks.read(), full.read())
+
+    def test_yaml_chunks(self):
+        save_chunks(self.chunks, self.path('data.yaml'))
+        with open(self.path('data.yaml')) as file:
+            self.assertEqual(yaml.safe_load(file), self.data)
+
+    def test_csv_and_xml_chunks(self):
+        save_chunks(self.chunks, self.path('data.csv'))
+        self.assertEqual([row['firstname'] for row in load_csv(self.path('data.csv'))], ['John', 'Jane', 'Bob'])
+        save_chunks(self.chunks, self.path('data.xml'))
+        self.assertEqual(load_xml(self.path('data.xml'))[2]['grades'], [70, 75, 80])
+
+    def test_empty_json(self):
+        save_chunks([], self.path('empty.json'))
+        with open(self.path('empty.json')) as file:
+            self.assertEqual(json.load(file), [])
+
+    def test_save_csv_streams_all_columns(self):
+        data = self.data + [{'firstname': 'Alice', 'age': float('nan'), 'city': 'Paris'}]
+        save_csv(data, self.path('data.csv'))
+        rows = load_csv(self.path('data.csv'))
+        self.assertEqual(list(rows[0]), ['firstname', 'age', 'apprentice', 'grades', 'city'])
+        self.assertEqual(rows[3]['city'], 'Paris')
+        self.assertEqual(rows[0]['grades'], '[85, 90, 92]')
+
+    def test_csv_never_drops_late_fields(self):
+        data = [{'a': 1}, {'a': 2, 'b': 3}]
+        save_csv(Dataset.from_records(data), self.path('data.csv'))
+        self.assertEqual(list(load_csv(self.path('data.csv'))[0]), ['a', 'b'])
+        with self.assertRaises(ValueError):
+            save_chunks(iter([data[:1], data[1:]]), self.path('stream.csv'))
+
+    def test_compressed_and_line_formats_round_trip(self):
+        for name in ('data.jsonl', 'data.json.gz', 'data.jsonl.gz', 'data.yaml.gz', 'data.csv.gz'):
+            # Un générateur suffit : les enregistrements ne sont parcourus qu'une fois
+            save_file((item for item in self.data), self.path(name))
+            records = [item for chunk in iter_file(self.path(name), chunk_size=2) for item in chunk]
+            self.assertEqual([item['firstname'] for item in records], ['John', 'Jane', 'Bob'], name)
+        save_file(self.data, self.path('data.xml.gz'))
+        self.assertEqual(next(iter_file(self.path('data.xml.gz')))[1]['grades'], [78, 80, 82])
+
+    def test_compact_json(self):
+        save_json(self.data, self.path('data.json'), indent=None)
+        with open(self.path('data.json')) as file:
+            text = file.read()
+        self.assertEqual(json.loads(text), self.data)
+        self.assertEqual(len(text.splitlines()), len(self.data) + 2)
+
+    def test_binary_round_trip(self):
+        data = self.data + [{'firstname': 'Alice', 'tags': ['a', 1]}]
+        save_binary(data, self.path('data.npd'))
+        dataset = load_binary(self.path('data.npd'))
+        self.assertIsInstance(dataset, Dataset)
+        self.assertEqual(dataset.to_records(), data)
+        self.assertEqual(dataset.kind('grades'), 'list')
+        # Les colonnes typées sont des vues sur le fichier, sans copie
+        self.assertFalse(dataset.columns['age'].flags.writeable)
+        self.assertIn('firstname', dataset.dictionaries)
+
+    def test_binary_objects_are_not_pickled(self):
+        data = [{'ids': [2 ** 70, 1], 'extra': {'a': 1}}, {'ids': [3], 'extra': 'x'}]
+        save_binary(data, self.path('data.npd'))
+        with open(self.path('data.npd'), 'rb') as file:
+            self.assertNotIn(b'"pickle"', file.read())
+        self.assertEqual(load_binary(self.path('data.npd')).to_records(), data)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,87 @@
+import random
+import unittest
+
+import numpy as np
+
+from data_sort import SortCache, sort_data, sort_order, top_k
+from dataset import Dataset
+
+
+class TestDataSort(unittest.TestCase):
+    def setUp(self):
+        self.data = [
+            {'name': 'b', 'age': 20},
+            {'name': 'a', 'age': 22},
+            {'name': 'c', 'age': 20},
+        ]
+
+    def test_ascending_is_stable(self):
+        self.assertEqual(sort_data(self.data, 'age', 'ascending'), [self.data[0], self.data[2], self.data[1]])
+
+    def test_descending_is_stable(self):
+        self.assertEqual(sort_data(self.data, 'age', 'descending'), [self.data[1], self.data[0], self.data[2]])
+        self.assertEqual(sort_data(self.data, 'name', 'z_to_a'), [self.data[2], self.data[0], self.data[1]])
+
+    def test_missing_field_sorted_last(self):
+        data = [{'name': 'x'}] + self.data
+        self.assertEqual(sort_data(data, 'age', 'ascending')[-1], data[0])
+
+    def test_json_nulls_are_missing(self):
+        data = [{'n': 10}, {'n': 3}, {'n': None}, {'n': 25}]
+        self.assertEqual(sort_data(data, 'n', 'ascending'), [data[1], data[0], data[3], data[2]])
+        self.assertEqual(sort_data(data, 'n', 'descending', nulls='first'), [data[2], data[3], data[0], data[1]])
+        self.assertEqual(Dataset.from_records(data).kind('n'), 'int')
+
+    def test_dataset(self):
+        result = sort_data(Dataset.from_records(self.data), 'name', 'a_to_z')
+        self.assertEqual([row['name'] for row in result], ['a', 'b', 'c'])
+
+
+    def test_multiple_keys_and_nulls(self):
+        data = self.data + [{'name': 'd'}, {'name': 'a', 'age': 20}]
+        keys = [('age', 'descending'), ('name', 'a_to_z')]
+        self.assertEqual([row['name'] for row in sort_data(data, keys)], ['a', 'a', 'b', 'c', 'd'])
+        self.assertEqual([row['name'] for row in sort_data(data, keys, nulls='first')], ['d', 'a', 'a', 'b', 'c'])
+        self.assertEqual([row['name'] for row in sort_data(data, [('age', 'ascending', 'first'), 'name'])],
+                         ['d', 'a', 'b', 'c', 'a'])
+
+    def test_nan_and_mixed_objects(self):
+        data = [{'score': float('nan')}, {'score': 2.5}, {'score': 1.0}]
+        self.assertEqual([row['score'] for row in sort_data(data, 'score', 'descending')][:2], [2.5, 1.0])
+        mixed = [{'tags': ['b']}, {'tags': 'a'}, {'tags': [1]}]
+        self.assertEqual(len(sort_data(mixed, 'tags', 'ascending')), 3)
+
+    def test_limit_matches_full_sort(self):
+        rng = random.Random(1)
+        data = [{'age': rng.randint(0, 5), 'name': rng.choice('abc'), 'grades': [rng.randint(0, 3)]}
+                for _ in range(200)]
+        data += [{'name': 'z'} for _ in range(5)]
+        dataset = Dataset.from_records(data)
+        cases = [('age', 'ascending'), ('age', 'descending'), ('grades', 'descending'),
+                 ([('age', 'descending'), ('name', 'z_to_a')], None)]
+        for field, order in cases:
+            for nulls in ('last', 'first'):
+                full = sort_order(dataset, field, order, nulls=nulls)
+                for limit in (1, 7, 50, 300):
+                    np.testing.assert_array_equal(sort_order(dataset, field, order, nulls=nulls, limit=limit),
+                                                  full[:limit])
+
+    def test_top_k_stream(self):
+        chunks = [self.data[:2], self.data[2:]]
+        self.assertEqual(list(top_k(chunks, 'age', 'ascending', limit=2)), [[self.data[0], self.data[2]]])
+
+    def test_sort_cache(self):
+        dataset = Dataset.from_records(self.data)
+        cache = SortCache()
+        full = cache.sort_order(dataset, 'name', 'z_to_a')
+        self.assertIs(cache.sort_order(dataset, 'name', 'z_to_a'), full)
+        np.testing.assert_array_equal(cache.sort_order(dataset, 'name', 'z_to_a', rows=np.array([0, 1])), [0, 1])
+        # Des lignes déjà réordonnées gardent leur ordre entre égalités
+        np.testing.assert_array_equal(cache.sort_order(dataset, 'age', 'ascending', rows=np.array([2, 1, 0])),
+                                      [2, 0, 1])
+        dataset.set_column('name', ['c', 'b', 'a'])
+        np.testing.assert_array_equal(cache.sort_order(dataset, 'name', 'z_to_a'), [0, 1, 2])
+
+
+if __name__ == '__main__':
+    unittest.main()
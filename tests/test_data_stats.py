@@ -0,0 +1,71 @@
+import unittest
+
+from data_loader import load_json
+from data_stats import StatisticsCache, accumulate, calculate_statistics
+from dataset import Dataset, Records
+
+
+class TestDataStats(unittest.TestCase):
+    def test_sample_json(self):
+        stats = calculate_statistics(load_json('data/sample_data.json'))
+        self.assertIn('true_percentage', stats['apprentice'])
+        self.assertEqual(set(stats['age']), {'min', 'max', 'avg', 'count', 'null_count'})
+        self.assertEqual(stats['firstname'], {'note': 'Type non pris en charge ou mixte'})
+
+    def test_string_values_are_converted(self):
+        data = [{'flag': 'true', 'grades': '[1, 2]'}, {'flag': 'false', 'grades': '[3]'}]
+        stats = calculate_statistics(data)
+        self.assertEqual(stats['flag']['true_percentage'], 50.0)
+        self.assertEqual(stats['flag']['false_percentage'], 50.0)
+        self.assertEqual(stats['grades'], {'min': 1, 'max': 3, 'avg': 2.0, 'count': 2, 'null_count': 0,
+                                           'element_count': 3})
+
+    def test_dataset_matches_records(self):
+        data = [{'age': 20, 'flag': 'True', 'grades': [1, 5]}, {'age': 22, 'flag': 'false'}, {'grades': []}]
+        self.assertEqual(calculate_statistics(Dataset.from_records(data)), calculate_statistics(data))
+        self.assertEqual(calculate_statistics(Dataset.from_records(data))['age'],
+                         {'min': 20, 'max': 22, 'avg': 21.0, 'count': 2, 'null_count': 1})
+
+    def test_merge_partial_statistics(self):
+        data = [{'age': age, 'grades': [age, age + 1]} for age in range(10)]
+        left, right = accumulate(data[:4]), accumulate(data[4:])
+        merged = {key: left[key].merge(right[key]).summary() for key in left}
+        self.assertEqual(merged, calculate_statistics(data))
+
+    def test_view_reads_the_cached_lists(self):
+        data = [{'age': age, 'grades': [age] * (age % 3)} for age in range(10)]
+        dataset = Dataset.from_records(data)
+        values, _ = dataset.ragged('grades')
+        view = Records(dataset, [7, 2, 4])
+        self.assertEqual(calculate_statistics(view), calculate_statistics([data[7], data[2], data[4]]))
+        self.assertIs(dataset.ragged('grades')[0], values)
+
+
+class TestStatisticsCache(unittest.TestCase):
+    def setUp(self):
+        self.data = [{'age': age, 'apprentice': age % 2 == 0} for age in range(10)]
+
+    def test_cached_until_invalidated(self):
+        cache = StatisticsCache()
+        self.assertEqual(cache.statistics(self.data), calculate_statistics(self.data))
+        self.assertEqual(cache.statistics([]), {})
+        self.assertEqual(cache.statistics(self.data[:2]), calculate_statistics(self.data))
+        cache.invalidate()
+        self.assertEqual(cache.statistics(self.data[:2]), calculate_statistics(self.data[:2]))
+
+    def test_incremental_update_after_filter(self):
+        cache = StatisticsCache()
+        cache.statistics(self.data)
+        kept, removed = self.data[:3] + self.data[5:], self.data[3:5]
+        cache.remove_rows(removed)
+        # min et max inchangés : l'âge est mis à jour sans nouveau parcours
+        self.assertIn('age', cache.columns)
+        self.assertEqual(cache.statistics(kept), calculate_statistics(kept))
+
+        cache.remove_rows(kept[:1])
+        self.assertNotIn('age', cache.columns)
+        self.assertEqual(cache.statistics(kept[1:]), calculate_statistics(kept[1:]))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,102 @@
+import json
+import os
+import tempfile
+import unittest
+
+import numpy as np
+
+from data_filter import filter_data
+from data_saver import save_json
+from data_sort import sort_data
+from data_stats import calculate_statistics
+from dataset import Dataset, Records
+
+
+class TestDataset(unittest.TestCase):
+    def setUp(self):
+        self.records = [
+            {'name': 'John', 'age': 20, 'apprentice': True, 'grades': [85, 90]},
+            {'name': 'Jane', 'age': 22, 'apprentice': False},
+            {'name': 'Bob', 'score': 1.5, 'apprentice': True, 'grades': [70]},
+        ]
+
+    def test_columns_are_typed(self):
+        dataset = Dataset.from_records(self.records)
+        self.assertEqual(dataset.kind('name'), 'str')
+        self.assertEqual(dataset.kind('age'), 'int')
+        self.assertEqual(dataset.kind('apprentice'), 'bool')
+        self.assertEqual(dataset.kind('grades'), 'list')
+        self.assertEqual(dataset.columns['age'].dtype, np.int64)
+
+    def test_validity_masks(self):
+        dataset = Dataset.from_records(self.records)
+        self.assertEqual(dataset.valid['age'].tolist(), [True, True, False])
+        self.assertEqual(dataset.valid['score'].tolist(), [False, False, True])
+
+    def test_round_trip(self):
+        dataset = Dataset.from_records(self.records)
+        self.assertEqual(dataset.to_records(), self.records)
+        self.assertEqual(list(dataset), self.records)
+        self.assertEqual(dataset[1], self.records[1])
+
+    def test_take(self):
+        dataset = Dataset.from_records(self.records).take([2, 0])
+        self.assertEqual(dataset.to_records(), [self.records[2], self.records[0]])
+
+    def test_text_columns_are_encoded(self):
+        records = [{'city': 'Paris'}, {'city': 'x' * 300}] + [{'city': 'Lyon'}] * 10000
+        dataset = Dataset.from_records(records)
+        self.assertEqual(dataset.columns['city'].dtype, np.uint8)
+        self.assertEqual(dataset.dictionaries['city'].tolist(), ['Lyon', 'Paris', 'x' * 300])
+        self.assertEqual(dataset[1]['city'], 'x' * 300)
+        self.assertEqual(dataset.to_records(), records)
+        self.assertEqual(filter_data(dataset, 'city', 'starts_with', 'pa').to_records(), [records[0]])
+        self.assertEqual(sort_data(dataset.take([2, 1, 0]), 'city', 'descending')[0]['city'], 'x' * 300)
+
+    def test_set_column_encodes_text(self):
+        dataset = Dataset.from_records(self.records)
+        dataset.set_column('name', np.array(['b', 'a', 'b']))
+        self.assertEqual(dataset.dictionaries['name'].tolist(), ['a', 'b'])
+        self.assertEqual(dataset.column('name')[0].tolist(), ['b', 'a', 'b'])
+        self.assertEqual(len(filter_data(dataset, 'name', 'in_set', ['b'])), 2)
+
+
+class TestRecords(unittest.TestCase):
+    def setUp(self):
+        self.records = [
+            {'name': 'John', 'city': 'Paris', 'age': 20},
+            {'name': 'Jane', 'city': 'Lyon'},
+            {'name': 'Bob', 'city': 'Paris', 'age': 19},
+        ]
+        self.view = Records(Dataset.from_records(self.records))
+
+    def test_rows_behave_like_dicts(self):
+        row = self.view[1]
+        self.assertEqual(row, self.records[1])
+        self.assertEqual(dict(row), self.records[1])
+        self.assertNotIn('age', row)
+        self.assertIsNone(row.get('age'))
+        self.assertEqual(self.view[-1]['age'], 19)
+        self.assertEqual(self.view, self.records)
+        self.assertEqual(self.view[::2], [self.records[0], self.records[2]])
+
+    def test_operations_keep_the_view(self):
+        filtered = filter_data(self.view, 'city', 'equals', 'Paris')
+        self.assertIsInstance(filtered, Records)
+        self.assertIs(filtered.dataset, self.view.dataset)
+        ordered = sort_data(filtered, 'age', 'ascending')
+        self.assertEqual(ordered, [self.records[2], self.records[0]])
+        self.assertEqual(calculate_statistics(ordered)['age']['max'], 20)
+
+    def test_saved_and_shared_strings(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, 'out.json')
+            save_json(self.view[1:], path)
+            with open(path) as file:
+                self.assertEqual(json.load(file), self.records[1:])
+        records = self.view.to_records()
+        self.assertIs(records[0]['city'], records[2]['city'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,56 @@
+import unittest
+
+from data_filter import Condition
+from history import History, Operation
+
+
+class TestHistory(unittest.TestCase):
+    def setUp(self):
+        self.records = [{'name': name, 'age': age} for name, age in [('b', 20), ('a', 22), ('c', 19), ('d', 30)]]
+        self.history = History(self.records)
+        self.history.push(Operation("Load Data", "Loaded test"))
+
+    def apply_filter(self, field, condition, value):
+        rows = self.history.filter_rows(field, condition, value)
+        self.history.push(Operation("Filter Data", f"Filtered by {field} {condition} {value}"), rows)
+
+    def apply_sort(self, field, order):
+        rows = self.history.sort_rows(field, order)
+        self.history.push(Operation("Sort Data", f"Sorted by {field} in {order} order"), rows)
+
+    def test_operations_compose_on_current_state(self):
+        self.apply_sort('name', 'a_to_z')
+        self.apply_filter('age', 'less_than', 25)
+        self.assertEqual([item['name'] for item in self.history.view()], ['a', 'b', 'c'])
+        self.assertEqual(self.history.records_for(self.history.expression_rows(Condition('age', 'equals', 22))),
+                         [self.records[1]])
+
+    def test_undo_redo_and_goto(self):
+        self.apply_filter('age', 'greater_than', 19)
+        self.apply_sort('age', 'descending')
+        sorted_view = self.history.view()
+        self.assertEqual(self.history.undo(), [self.records[0], self.records[1], self.records[3]])
+        self.assertEqual(self.history.redo(), sorted_view)
+        self.assertEqual(self.history.goto(0), self.records)
+        self.assertFalse(self.history.can_undo())
+        self.assertTrue(self.history.can_redo())
+
+    def test_new_operation_discards_redo_states(self):
+        self.apply_filter('age', 'greater_than', 19)
+        self.history.undo()
+        self.apply_filter('name', 'equals', 'c')
+        self.assertEqual(len(self.history.operations), 2)
+        self.assertFalse(self.history.can_redo())
+        self.assertEqual(self.history.view(), [self.records[2]])
+
+    def test_states_share_loaded_records(self):
+        self.apply_filter('age', 'greater_than', 19)
+        view = self.history.view()
+        self.assertIs(view.dataset, self.history.dataset)
+        self.assertEqual(view[0], self.records[0])
+        self.assertEqual(self.history.states[-1].tolist(), [0, 1, 3])
+        self.assertEqual(str(self.history.current).split(" - ")[1], "Filter Data: Filtered by age greater_than 19")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,73 @@
+import threading
+import time
+import unittest
+
+from jobs import JobScheduler
+
+
+class FakeRoot:
+    # Remplace la boucle de Tk : les callbacks programmés par after() sont exécutés à la demande
+    def __init__(self):
+        self.pending = []
+
+    def after(self, delay, callback):
+        self.pending.append(callback)
+
+    def run_until(self, predicate, timeout=5):
+        deadline = time.monotonic() + timeout
+        while not predicate() and time.monotonic() < deadline:
+            pending, self.pending = self.pending, []
+            for callback in pending:
+                callback()
+            time.sleep(0.01)
+
+
+class TestJobScheduler(unittest.TestCase):
+    def setUp(self):
+        self.root = FakeRoot()
+        self.scheduler = JobScheduler(self.root, max_workers=2)
+        self.events = []
+
+    def tearDown(self):
+        self.scheduler.shutdown()
+
+    def test_result_delivered_on_main_thread(self):
+        main_thread = threading.current_thread()
+
+        def on_done(result):
+            self.events.append((result, threading.current_thread() is main_thread))
+
+        self.scheduler.submit("sum", lambda job, values: sum(values), [1, 2, 3], on_done=on_done)
+        self.root.run_until(lambda: self.events)
+        self.assertEqual(self.events, [(6, True)])
+
+    def test_progress_and_cancellation(self):
+        started = threading.Event()
+
+        def task(job):
+            for i in range(1000):
+                job.check()
+                job.report(i / 1000, f"step {i}")
+                started.set()
+                time.sleep(0.005)
+            return "finished"
+
+        job = self.scheduler.submit("long", task, on_done=self.events.append,
+                                    on_cancel=lambda: self.events.append("cancelled"),
+                                    on_progress=lambda job: self.events.append(job.message))
+        started.wait(5)
+        job.cancel()
+        self.root.run_until(lambda: "cancelled" in self.events)
+        self.assertIn("cancelled", self.events)
+        self.assertNotIn("finished", self.events)
+        self.assertTrue(any(str(event).startswith("step") for event in self.events))
+
+    def test_errors_are_reported(self):
+        self.scheduler.submit("fail", lambda job: 1 / 0, on_error=self.events.append)
+        self.root.run_until(lambda: self.events)
+        self.assertIsInstance(self.events[0], ZeroDivisionError)
+        self.assertFalse(self.scheduler.jobs)
+
+
+if __name__ == '__main__':
+    unittest.main()
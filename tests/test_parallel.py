@@ -0,0 +1,77 @@
+import functools
+import random
+import unittest
+
+import numpy as np
+
+from data_filter import And, Condition, Or, filter_mask
+from data_stats import StatisticsCache, calculate_statistics
+from dataset import Dataset, Records
+from parallel import _SharedColumns, _context, parallel_accumulate, parallel_filter, parallel_mask, parallel_statistics
+
+
+class TestParallel(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        rng = random.Random(0)
+        records = []
+        for i in range(2000):
+            item = {'name': rng.choice(['alpha', 'beta', 'Gamma']), 'age': rng.randint(0, 80),
+                    'score': rng.random(), 'active': rng.random() < 0.3,
+                    'grades': [rng.randint(0, 20) for _ in range(rng.randint(1, 4))]}
+            if i % 7 == 0:
+                del item['age']
+            records.append(item)
+        cls.dataset = Dataset.from_records(records)
+
+    def test_mask_matches_serial(self):
+        expression = Or(And(Condition('age', 'greater_than', 40), Condition('name', 'starts_with', 'g')),
+                        Condition('grades', 'average_less', 5))
+        np.testing.assert_array_equal(parallel_mask(self.dataset, expression, workers=3, threshold=0),
+                                      parallel_mask(self.dataset, expression, workers=1))
+        result = parallel_filter(self.dataset, 'age', 'greater_than', 40, workers=2, threshold=0)
+        self.assertEqual(result.to_records(),
+                         self.dataset.filter(filter_mask(self.dataset, 'age', 'greater_than', 40)).to_records())
+
+    def test_mask_on_row_subset(self):
+        rows = np.arange(0, len(self.dataset), 3)
+        expression = Condition('active', 'true')
+        np.testing.assert_array_equal(parallel_mask(self.dataset, expression, rows, workers=2, threshold=0),
+                                      filter_mask(self.dataset, 'active', 'true', None, rows))
+
+    def test_lists_and_text_are_shared(self):
+        rows = np.arange(1, len(self.dataset), 2)
+        expression = Or(Condition('grades', 'contains', 7), Condition('name', 'regex', '^a'))
+        np.testing.assert_array_equal(parallel_mask(self.dataset, expression, rows, workers=2, threshold=0),
+                                      parallel_mask(self.dataset, expression, rows, workers=1))
+        shared = _SharedColumns(self.dataset, ['grades', 'name'], rows)
+        try:
+            entries = [entry for _, data, _, _ in shared.columns.values() for entry in data[1:]]
+            self.assertNotIn('inline', [entry[0] for entry in entries])
+        finally:
+            shared.close()
+
+    def test_statistics_match_serial(self):
+        parallel = parallel_statistics(self.dataset, workers=3, threshold=0)
+        serial = calculate_statistics(self.dataset)
+        self.assertEqual(parallel.keys(), serial.keys())
+        for key in serial:
+            for stat, value in serial[key].items():
+                self.assertAlmostEqual(parallel[key][stat], value, msg=f"{key} {stat}")
+
+
+    def test_workers_are_not_forked(self):
+        self.assertIn(_context().get_start_method(), ('forkserver', 'spawn'))
+
+
+    def test_statistics_cache_on_a_view(self):
+        view = Records(self.dataset, np.arange(0, len(self.dataset), 2))
+        cache = StatisticsCache(accumulate=functools.partial(parallel_accumulate, workers=2, threshold=0))
+        parallel, serial = cache.statistics(view), calculate_statistics(view.to_dataset())
+        for key in serial:
+            for stat, value in serial[key].items():
+                self.assertAlmostEqual(parallel[key][stat], value, msg=f"{key} {stat}")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,57 @@
+import math
+import os
+import random
+import tempfile
+import unittest
+
+from data_loader import load_json
+from data_sort import sort_data
+from pipeline import Pipeline
+
+
+class TestPipeline(unittest.TestCase):
+    def test_filter_sort_save(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            output = os.path.join(tmp, 'out.json')
+            Pipeline('data/sample_data.csv', chunk_size=2) \
+                .filter('age', 'greater_than', 19) \
+                .sort('firstname', 'z_to_a', max_rows=1) \
+                .save(output)
+            names = [item['firstname'] for item in load_json(output)]
+        self.assertEqual(names, sorted(names, reverse=True))
+        self.assertNotIn('Bob', names)
+
+    def test_external_sort_matches_in_memory_sort(self):
+        rng = random.Random(0)
+        records = [{'id': i, 'value': rng.randint(0, 20)} for i in range(1000)]
+        records[10] = {'id': 10}
+        chunks = [records[i:i + 64] for i in range(0, len(records), 64)]
+        expected = sorted((r for r in records if 'value' in r), key=lambda r: r['value'], reverse=True)
+        result = list(Pipeline(chunks).sort('value', 'descending', max_rows=100))
+        self.assertEqual(result, expected + [records[10]])
+
+    def test_external_sort_multiple_keys(self):
+        rng = random.Random(1)
+        records = [{'id': i, 'group': rng.choice('abc'), 'value': rng.choice([None, 1, 2, 3])} for i in range(500)]
+        chunks = [records[i:i + 50] for i in range(0, len(records), 50)]
+        keys = [('group', 'z_to_a'), ('value', 'ascending')]
+        expected = sort_data(records, keys, nulls='first')
+        self.assertEqual(list(Pipeline(chunks).sort(keys, max_rows=60, nulls='first')), expected)
+
+    def test_external_sort_spills_nan_last(self):
+        chunks = [[{'v': 5}, {'v': float('nan')}], [{'v': 7}, {'v': 3}], [{'v': 1}, {'v': None}]]
+        result = [item['v'] for item in Pipeline(chunks).sort('v', 'descending', max_rows=2)]
+        self.assertEqual(result[:4], [7, 5, 3, 1])
+        self.assertTrue(math.isnan(result[4]))
+        self.assertIsNone(result[5])
+
+    def test_external_sort_mixed_types(self):
+        chunks = [[{'v': 10}, {'v': 9}], [{'v': 'a'}, {'v': 100}], [{'v': 2}, {'v': 1}]]
+        self.assertEqual([item['v'] for item in Pipeline(chunks).sort('v', 'ascending', max_rows=2)],
+                         [1, 2, 9, 10, 100, 'a'])
+        self.assertEqual([item['v'] for item in sort_data([item for chunk in chunks for item in chunk], 'v',
+                                                           'descending')], ['a', 100, 10, 9, 2, 1])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,61 @@
+import json
+import os
+import tempfile
+import unittest
+
+from data_filter import filter_data
+from profiling import PROFILER, Profiler, count_rows, profiled
+
+
+class TestProfiler(unittest.TestCase):
+    def test_measure_records_rows_and_depth(self):
+        profiler = Profiler()
+        with profiler.measure("outer", 10) as outer:
+            with profiler.measure("inner"):
+                pass
+            outer.rows_out = 4
+        inner, outer = profiler.measurements
+        self.assertEqual((inner.name, inner.depth), ("inner", 1))
+        self.assertEqual((outer.rows_in, outer.rows_out, outer.depth), (10, 4, 0))
+        self.assertGreaterEqual(outer.seconds, inner.seconds)
+        self.assertIsNone(outer.peak_bytes)
+        self.assertIn("10 → 4 rows", str(outer))
+
+    def test_capture_mode(self):
+        profiler = Profiler()
+        profiler.start_capture()
+        try:
+            with profiler.measure("allocate"):
+                data = [list(range(100)) for _ in range(1000)]
+        finally:
+            profiler.stop_capture()
+        self.assertGreater(profiler.measurements[0].peak_bytes, 100000)
+        self.assertIn("function calls", profiler.report())
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'timings.json')
+            profiler.export(path)
+            with open(path) as file:
+                exported = json.load(file)
+        self.assertEqual(exported['measurements'][0]['name'], "allocate")
+        self.assertTrue(exported['profile'])
+        del data
+
+    def test_library_functions_are_instrumented(self):
+        PROFILER.clear()
+        data = [{'age': 20}, {'age': 30}, {'age': 40}]
+        filter_data(data, 'age', 'greater_than', 25)
+        measurement = PROFILER.measurements[-1]
+        self.assertEqual((measurement.name, measurement.rows_in, measurement.rows_out), ('filter_data', 3, 2))
+
+    def test_profiled_rows_out(self):
+        @profiled('summary', rows_out=None)
+        def summary(data):
+            return {'count': len(data)}
+
+        summary([1, 2])
+        self.assertIsNone(PROFILER.measurements[-1].rows_out)
+        self.assertIsNone(count_rows("text"))
+
+
+if __name__ == '__main__':
+    unittest.main()